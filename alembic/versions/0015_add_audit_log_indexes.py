@@ -0,0 +1,36 @@
+"""add audit log indexes
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+
+revision = "0015"
+down_revision = "0014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_audit_log_performed_at", "audit_log", ["performed_at"], unique=False)
+    op.create_index(
+        "ix_audit_log_entity_performed_at",
+        "audit_log",
+        ["entity_type", "entity_id", "performed_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_audit_log_performed_by_performed_at",
+        "audit_log",
+        ["performed_by", "performed_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_audit_log_performed_by_performed_at", table_name="audit_log")
+    op.drop_index("ix_audit_log_entity_performed_at", table_name="audit_log")
+    op.drop_index("ix_audit_log_performed_at", table_name="audit_log")
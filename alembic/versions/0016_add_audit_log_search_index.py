@@ -0,0 +1,43 @@
+"""add audit log full-text search index
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+from backend.audit_search import (
+    POSTGRES_SEARCH_DDL,
+    POSTGRES_SEARCH_DROP_DDL,
+    SQLITE_FTS_TABLE,
+    SQLITE_SEARCH_DDL,
+    SQLITE_SEARCH_DROP_DDL,
+)
+
+
+revision = "0016"
+down_revision = "0015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for statement in POSTGRES_SEARCH_DDL:
+            op.execute(statement)
+    elif dialect == "sqlite":
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+        op.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for statement in POSTGRES_SEARCH_DROP_DDL:
+            op.execute(statement)
+    elif dialect == "sqlite":
+        for statement in SQLITE_SEARCH_DROP_DDL:
+            op.execute(statement)
@@ -0,0 +1,60 @@
+"""add normalized user identity keys
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0017"
+down_revision = "0016"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade():
+    op.add_column("users", sa.Column("username_key", sa.String(), nullable=True))
+    op.add_column("users", sa.Column("full_name_key", sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    select_stmt = sa.text(
+        "SELECT id, username, full_name FROM users WHERE id > :after_id ORDER BY id LIMIT :batch_size"
+    )
+    update_stmt = sa.text(
+        "UPDATE users SET username_key = :username_key, full_name_key = :full_name_key WHERE id = :id"
+    )
+    after_id = 0
+    while True:
+        rows = bind.execute(select_stmt, {"after_id": after_id, "batch_size": BACKFILL_BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            update_stmt,
+            [
+                {
+                    "id": user_id,
+                    "username_key": (username or "").strip().lower(),
+                    "full_name_key": (full_name or "").strip().lower(),
+                }
+                for user_id, username, full_name in rows
+            ],
+        )
+        after_id = rows[-1][0]
+
+    with op.batch_alter_table("users") as batch:
+        batch.alter_column("username_key", existing_type=sa.String(), nullable=False)
+        batch.alter_column("full_name_key", existing_type=sa.String(), nullable=False)
+    op.create_index("ix_users_username_key", "users", ["username_key"], unique=False)
+    op.create_index("ix_users_full_name_key", "users", ["full_name_key"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_users_full_name_key", table_name="users")
+    op.drop_index("ix_users_username_key", table_name="users")
+    op.drop_column("users", "full_name_key")
+    op.drop_column("users", "username_key")
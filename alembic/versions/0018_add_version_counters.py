@@ -0,0 +1,28 @@
+"""add version counters
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0018"
+down_revision = "0017"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "version_counters",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("value", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute("INSERT INTO version_counters (name, value) VALUES ('user_directory', 0)")
+
+
+def downgrade():
+    op.drop_table("version_counters")
@@ -0,0 +1,44 @@
+"""add sync revisions and tombstones
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0019"
+down_revision = "0018"
+branch_labels = None
+depends_on = None
+
+SYNCED_TABLES = ("samples", "planned_analyses", "planned_analysis_assignees")
+
+
+def upgrade():
+    for table in SYNCED_TABLES:
+        op.add_column(table, sa.Column("updated_at", sa.String(), nullable=True))
+        op.add_column(table, sa.Column("revision", sa.Integer(), nullable=False, server_default="0"))
+        op.create_index(f"ix_{table}_revision", table, ["revision"], unique=False)
+    op.create_table(
+        "sync_tombstones",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("entity_type", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.String(), nullable=False),
+        sa.Column("revision", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.String(), nullable=False),
+    )
+    op.create_index("ix_sync_tombstones_revision", "sync_tombstones", ["revision"], unique=False)
+    op.execute("INSERT INTO version_counters (name, value) VALUES ('sync_revision', 0)")
+
+
+def downgrade():
+    op.execute("DELETE FROM version_counters WHERE name = 'sync_revision'")
+    op.drop_index("ix_sync_tombstones_revision", table_name="sync_tombstones")
+    op.drop_table("sync_tombstones")
+    for table in reversed(SYNCED_TABLES):
+        op.drop_index(f"ix_{table}_revision", table_name=table)
+        op.drop_column(table, "revision")
+        op.drop_column(table, "updated_at")
@@ -0,0 +1,29 @@
+"""add session revocations
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0020"
+down_revision = "0019"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "session_revocations",
+        sa.Column("user_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("revoked_at", sa.BigInteger(), nullable=False),
+    )
+    op.create_index("ix_session_revocations_revoked_at", "session_revocations", ["revoked_at"])
+
+
+def downgrade():
+    op.drop_index("ix_session_revocations_revoked_at", table_name="session_revocations")
+    op.drop_table("session_revocations")
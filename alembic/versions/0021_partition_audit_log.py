@@ -0,0 +1,187 @@
+"""store audit timestamps as timestamptz and partition audit_log by month
+
+Revision ID: 0021
+Revises: 0020
+Create Date: 2026-10-17
+"""
+
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.audit_retention import ensure_audit_partitions
+from backend.audit_search import (
+    POSTGRES_SEARCH_DDL,
+    POSTGRES_SEARCH_DROP_DDL,
+    SQLITE_FTS_TABLE,
+    SQLITE_SEARCH_DDL,
+    SQLITE_SEARCH_DROP_DDL,
+)
+
+
+revision = "0021"
+down_revision = "0020"
+branch_labels = None
+depends_on = None
+
+AUDIT_INDEXES = [
+    ("ix_audit_log_performed_at", "performed_at"),
+    ("ix_audit_log_entity_performed_at", "entity_type, entity_id, performed_at"),
+    ("ix_audit_log_performed_by_performed_at", "performed_by, performed_at"),
+]
+AUDIT_COLUMNS = "id, entity_type, entity_id, action, performed_by, performed_at, details"
+BACKFILL_BATCH_SIZE = 5000
+# What SQLAlchemy's SQLite DateTime type writes and parses back.
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def create_audit_archives():
+    op.create_table(
+        "audit_archives",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("range_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("range_end", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("location", sa.String(), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("sha256", sa.String(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_audit_archives_range_start", "audit_archives", ["range_start"])
+    op.create_index("ix_audit_archives_range_end", "audit_archives", ["range_end"])
+
+
+def drop_audit_indexes():
+    for statement in POSTGRES_SEARCH_DROP_DDL:
+        op.execute(statement)
+    for name, _ in AUDIT_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def create_audit_indexes():
+    for name, columns in AUDIT_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON audit_log ({columns})")
+    for statement in POSTGRES_SEARCH_DDL:
+        op.execute(statement)
+
+
+def to_sqlite_datetime(value: str) -> str:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime(SQLITE_DATETIME_FORMAT)
+
+
+def to_iso_string(value: str) -> str:
+    parsed = datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+    return parsed.isoformat(timespec="microseconds")
+
+
+def rewrite_sqlite_performed_at(convert) -> None:
+    """Rewrite performed_at in place, batch by batch.
+
+    SQLite has no column types to change, and batch_alter_table would CAST the
+    strings while copying the table (turning '2024-01-01T10:00:00+00:00' into
+    2024) and drop the FTS triggers with it. The triggers are dropped around the
+    rewrite and the FTS index is rebuilt afterwards.
+    """
+    bind = op.get_bind()
+    for statement in SQLITE_SEARCH_DROP_DDL:
+        if not statement.startswith("DROP TABLE"):
+            op.execute(statement)
+    select_stmt = sa.text(
+        "SELECT id, performed_at FROM audit_log WHERE id > :after_id ORDER BY id LIMIT :batch_size"
+    )
+    update_stmt = sa.text("UPDATE audit_log SET performed_at = :performed_at WHERE id = :id")
+    after_id = 0
+    while True:
+        rows = bind.execute(select_stmt, {"after_id": after_id, "batch_size": BACKFILL_BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            update_stmt,
+            [{"id": row_id, "performed_at": convert(str(performed_at))} for row_id, performed_at in rows],
+        )
+        after_id = rows[-1][0]
+    for statement in SQLITE_SEARCH_DDL:
+        op.execute(statement)
+    op.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def upgrade():
+    create_audit_archives()
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        rewrite_sqlite_performed_at(to_sqlite_datetime)
+        return
+
+    drop_audit_indexes()
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_legacy")
+    op.execute("ALTER TABLE audit_log_legacy RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey")
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY NONE")
+    # The partition key has to be part of the primary key; ids still come from the shared sequence.
+    op.execute(
+        """
+        CREATE TABLE audit_log (
+            id integer NOT NULL DEFAULT nextval('audit_log_id_seq'),
+            entity_type varchar NOT NULL,
+            entity_id varchar NOT NULL,
+            action varchar NOT NULL,
+            performed_by varchar,
+            performed_at timestamptz NOT NULL,
+            details varchar,
+            PRIMARY KEY (id, performed_at)
+        ) PARTITION BY RANGE (performed_at)
+        """
+    )
+    op.execute("CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT")
+    oldest = bind.execute(sa.text("SELECT min(performed_at::timestamptz) FROM audit_log_legacy")).scalar()
+    ensure_audit_partitions(bind, start=oldest)
+    op.execute(
+        f"""
+        INSERT INTO audit_log ({AUDIT_COLUMNS})
+        SELECT id, entity_type, entity_id, action, performed_by, performed_at::timestamptz, details
+        FROM audit_log_legacy
+        """
+    )
+    op.execute("DROP TABLE audit_log_legacy")
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+    create_audit_indexes()
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        drop_audit_indexes()
+        op.execute("ALTER TABLE audit_log RENAME TO audit_log_partitioned")
+        op.execute("ALTER TABLE audit_log_partitioned RENAME CONSTRAINT audit_log_pkey TO audit_log_partitioned_pkey")
+        op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY NONE")
+        op.execute(
+            """
+            CREATE TABLE audit_log (
+                id integer PRIMARY KEY DEFAULT nextval('audit_log_id_seq'),
+                entity_type varchar NOT NULL,
+                entity_id varchar NOT NULL,
+                action varchar NOT NULL,
+                performed_by varchar,
+                performed_at varchar NOT NULL,
+                details varchar
+            )
+            """
+        )
+        op.execute(
+            f"""
+            INSERT INTO audit_log ({AUDIT_COLUMNS})
+            SELECT id, entity_type, entity_id, action, performed_by,
+                   to_char(performed_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'), details
+            FROM audit_log_partitioned
+            """
+        )
+        op.execute("DROP TABLE audit_log_partitioned")
+        op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+        create_audit_indexes()
+    else:
+        rewrite_sqlite_performed_at(to_iso_string)
+    op.drop_index("ix_audit_archives_range_end", table_name="audit_archives")
+    op.drop_index("ix_audit_archives_range_start", table_name="audit_archives")
+    op.drop_table("audit_archives")
@@ -0,0 +1,28 @@
+"""add sample filter indexes
+
+Revision ID: 0022
+Revises: 0021
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = "0022"
+down_revision = "0021"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_samples_status", "samples", ["status"], unique=False)
+    op.create_index("ix_samples_well_id", "samples", ["well_id"], unique=False)
+    op.create_index("ix_samples_horizon", "samples", ["horizon"], unique=False)
+    op.create_index("ix_samples_arrival_date", "samples", ["arrival_date", "sample_id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_samples_arrival_date", table_name="samples")
+    op.drop_index("ix_samples_horizon", table_name="samples")
+    op.drop_index("ix_samples_well_id", table_name="samples")
+    op.drop_index("ix_samples_status", table_name="samples")
@@ -0,0 +1,99 @@
+"""store sample dates as native DATE columns
+
+Revision ID: 0023
+Revises: 0022
+Create Date: 2026-10-17
+"""
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0023"
+down_revision = "0022"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+samples = sa.table(
+    "samples",
+    sa.column("sample_id", sa.String()),
+    sa.column("sampling_date", sa.String()),
+    sa.column("arrival_date", sa.String()),
+    sa.column("sampling_date_value", sa.Date()),
+    sa.column("arrival_date_value", sa.Date()),
+)
+
+
+def parse_date(value: str | None) -> date:
+    return date.fromisoformat((value or "").strip())
+
+
+def upgrade():
+    bind = op.get_bind()
+    op.add_column("samples", sa.Column("sampling_date_value", sa.Date(), nullable=True))
+    op.add_column("samples", sa.Column("arrival_date_value", sa.Date(), nullable=True))
+
+    fill = (
+        sa.update(samples)
+        .where(samples.c.sample_id == sa.bindparam("b_sample_id"))
+        .values(sampling_date_value=sa.bindparam("b_sampling_date"), arrival_date_value=sa.bindparam("b_arrival_date"))
+    )
+    invalid: list[str] = []
+    last_id = None
+    while True:
+        stmt = sa.select(samples.c.sample_id, samples.c.sampling_date, samples.c.arrival_date)
+        if last_id is not None:
+            stmt = stmt.where(samples.c.sample_id > last_id)
+        rows = bind.execute(stmt.order_by(samples.c.sample_id).limit(BACKFILL_BATCH_SIZE)).all()
+        if not rows:
+            break
+        batch = []
+        for sample_id, sampling_date, arrival_date in rows:
+            try:
+                batch.append(
+                    {
+                        "b_sample_id": sample_id,
+                        "b_sampling_date": parse_date(sampling_date),
+                        "b_arrival_date": parse_date(arrival_date),
+                    }
+                )
+            except ValueError:
+                invalid.append(sample_id)
+        if batch:
+            bind.execute(fill, batch)
+        last_id = rows[-1].sample_id
+    if invalid:
+        raise RuntimeError(
+            f"{len(invalid)} samples have dates that are not YYYY-MM-DD "
+            f"(first: {', '.join(invalid[:20])}); fix them and rerun the migration."
+        )
+
+    op.drop_index("ix_samples_arrival_date", table_name="samples")
+    with op.batch_alter_table("samples") as batch_op:
+        batch_op.drop_column("sampling_date")
+        batch_op.drop_column("arrival_date")
+        batch_op.alter_column("sampling_date_value", new_column_name="sampling_date", nullable=False)
+        batch_op.alter_column("arrival_date_value", new_column_name="arrival_date", nullable=False)
+    op.create_index("ix_samples_arrival_date", "samples", ["arrival_date", "sample_id"], unique=False)
+    op.create_index("ix_samples_sampling_date", "samples", ["sampling_date", "sample_id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_samples_sampling_date", table_name="samples")
+    op.drop_index("ix_samples_arrival_date", table_name="samples")
+    op.add_column("samples", sa.Column("sampling_date_text", sa.String(), nullable=True))
+    op.add_column("samples", sa.Column("arrival_date_text", sa.String(), nullable=True))
+    op.execute(
+        "UPDATE samples SET sampling_date_text = CAST(sampling_date AS VARCHAR), "
+        "arrival_date_text = CAST(arrival_date AS VARCHAR)"
+    )
+    with op.batch_alter_table("samples") as batch_op:
+        batch_op.drop_column("sampling_date")
+        batch_op.drop_column("arrival_date")
+        batch_op.alter_column("sampling_date_text", new_column_name="sampling_date", nullable=False)
+        batch_op.alter_column("arrival_date_text", new_column_name="arrival_date", nullable=False)
+    op.create_index("ix_samples_arrival_date", "samples", ["arrival_date", "sample_id"], unique=False)
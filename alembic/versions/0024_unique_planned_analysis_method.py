@@ -0,0 +1,91 @@
+"""make planned analyses unique per sample and method
+
+Revision ID: 0024
+Revises: 0023
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0024"
+down_revision = "0023"
+branch_labels = None
+depends_on = None
+
+# Same ranking the board uses when it merges duplicate methods on a card.
+STATUS_PRIORITY = {"completed": 4, "review": 3, "in_progress": 2, "planned": 1, "failed": 0}
+
+
+def merge_duplicate_analyses(bind) -> None:
+    """Collapse each (sample_id, analysis_type) group onto one row.
+
+    Concurrent ensure-defaults calls could insert the same method twice. The most
+    advanced copy is kept (lowest id on ties), the other copies' assignees are
+    moved onto it and the copies are deleted.
+    """
+    groups = bind.execute(
+        sa.text(
+            "SELECT sample_id, analysis_type FROM planned_analyses "
+            "GROUP BY sample_id, analysis_type HAVING count(*) > 1"
+        )
+    ).fetchall()
+    for sample_id, analysis_type in groups:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, status, assigned_to FROM planned_analyses "
+                "WHERE sample_id = :sample_id AND analysis_type = :analysis_type ORDER BY id"
+            ),
+            {"sample_id": sample_id, "analysis_type": analysis_type},
+        ).fetchall()
+        keeper = min(rows, key=lambda row: (-STATUS_PRIORITY.get(str(row.status), 0), row.id))
+        duplicate_ids = [row.id for row in rows if row.id != keeper.id]
+        params = {"ids": duplicate_ids}
+        expanding = sa.bindparam("ids", expanding=True)
+        kept = set(
+            bind.execute(
+                sa.text("SELECT assignee FROM planned_analysis_assignees WHERE analysis_id = :keeper_id"),
+                {"keeper_id": keeper.id},
+            ).scalars()
+        )
+        moved = bind.execute(
+            sa.text(
+                "SELECT assignee, updated_at, revision FROM planned_analysis_assignees "
+                "WHERE analysis_id IN :ids ORDER BY id"
+            ).bindparams(expanding),
+            params,
+        ).fetchall()
+        for assignee, updated_at, assignee_revision in moved:
+            if assignee in kept:
+                continue
+            kept.add(assignee)
+            bind.execute(
+                sa.text(
+                    "INSERT INTO planned_analysis_assignees (analysis_id, assignee, updated_at, revision) "
+                    "VALUES (:analysis_id, :assignee, :updated_at, :revision)"
+                ),
+                {"analysis_id": keeper.id, "assignee": assignee, "updated_at": updated_at, "revision": assignee_revision},
+            )
+        if keeper.assigned_to is None:
+            assigned_to = next((row.assigned_to for row in rows if row.assigned_to), None)
+            if assigned_to is not None:
+                bind.execute(
+                    sa.text("UPDATE planned_analyses SET assigned_to = :assigned_to WHERE id = :id"),
+                    {"assigned_to": assigned_to, "id": keeper.id},
+                )
+        bind.execute(
+            sa.text("DELETE FROM planned_analysis_assignees WHERE analysis_id IN :ids").bindparams(expanding), params
+        )
+        bind.execute(sa.text("DELETE FROM planned_analyses WHERE id IN :ids").bindparams(expanding), params)
+
+
+def upgrade():
+    merge_duplicate_analyses(op.get_bind())
+    with op.batch_alter_table("planned_analyses") as batch:
+        batch.create_unique_constraint("uq_planned_analysis_sample_method", ["sample_id", "analysis_type"])
+
+
+def downgrade():
+    with op.batch_alter_table("planned_analyses") as batch:
+        batch.drop_constraint("uq_planned_analysis_sample_method", type_="unique")
@@ -0,0 +1,40 @@
+"""index audit actor and entity_id filters case-insensitively
+
+Revision ID: 0025
+Revises: 0024
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = "0025"
+down_revision = "0024"
+branch_labels = None
+depends_on = None
+
+# (name, expression list) for the lower(...) indexes behind the actor/entity_id prefix filters.
+LOWER_INDEXES = [
+    ("ix_audit_log_performed_by_lower", "lower(performed_by){ops}, performed_at"),
+    ("ix_audit_log_entity_id_lower", "lower(entity_id){ops}"),
+]
+
+
+def upgrade():
+    # text_pattern_ops lets Postgres use the index for LIKE 'key%' under a non-C collation.
+    # On the partitioned audit_log the index cascades to every partition.
+    ops = " text_pattern_ops" if op.get_bind().dialect.name == "postgresql" else ""
+    for name, columns in LOWER_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON audit_log ({columns.format(ops=ops)})")
+    op.drop_index("ix_audit_log_performed_by_performed_at", table_name="audit_log")
+
+
+def downgrade():
+    op.create_index(
+        "ix_audit_log_performed_by_performed_at",
+        "audit_log",
+        ["performed_by", "performed_at"],
+        unique=False,
+    )
+    for name, _ in reversed(LOWER_INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
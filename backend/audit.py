@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+try:
+    from .database import SessionLocal
+    from .metrics import AUDIT_EVENTS_WRITTEN
+    from .models import AuditLogModel
+except ImportError:  # pragma: no cover
+    from database import SessionLocal  # type: ignore
+    from metrics import AUDIT_EVENTS_WRITTEN  # type: ignore
+    from models import AuditLogModel  # type: ignore
+
+
+AUDIT_INSERT_CHUNK_SIZE = 1000
+
+
+def log_audit(db: Session, *, entity_type: str, entity_id: str, action: str, performed_by: str | None, details: str | None = None):
+    """Stage an audit event; it is written together with the rest of db's transaction."""
+    log_audit_many(
+        db,
+        [{"entity_type": entity_type, "entity_id": entity_id, "action": action, "performed_by": performed_by, "details": details}],
+    )
+
+
+def log_audit_many(db: Session, events: list[dict]):
+    if not events:
+        return
+    performed_at = datetime.now(timezone.utc)
+    db.info.setdefault("pending_audit_events", []).extend(
+        {"performed_at": performed_at, "details": None, **item} for item in events
+    )
+
+
+def as_utc(value: datetime) -> datetime:
+    """SQLite hands back naive datetimes; audit timestamps are always stored in UTC."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def flush_audit_events(db: Session) -> None:
+    """Write staged events with one multi-row INSERT per chunk, inside the committing transaction."""
+    pending = db.info.pop("pending_audit_events", [])
+    for start in range(0, len(pending), AUDIT_INSERT_CHUNK_SIZE):
+        db.execute(insert(AuditLogModel).values(pending[start:start + AUDIT_INSERT_CHUNK_SIZE]))
+    AUDIT_EVENTS_WRITTEN.inc(len(pending))
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _write_staged_audit_events(db: Session) -> None:
+    flush_audit_events(db)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_staged_audit_events(db: Session) -> None:
+    db.info.pop("pending_audit_events", None)
@@ -0,0 +1,308 @@
+"""Monthly audit_log partitions and the retention/archival job.
+
+On Postgres audit_log is range-partitioned by performed_at, one partition per
+UTC month (audit_log_pYYYYMM) plus a default partition. Retention archives whole
+months older than the configured age into gzip JSONL files, records them in
+audit_archives and drops the partitions. On other databases the same months are
+archived and deleted row-wise.
+
+Run it from cron, e.g. daily:
+
+    python -m backend.audit_retention --older-than-months 24 --archive-dir /var/lib/labsync/audit-archive
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+try:
+    from .audit import as_utc
+    from .database import SessionLocal
+    from .models import AuditArchiveModel, AuditLogModel
+except ImportError:  # pragma: no cover
+    from audit import as_utc  # type: ignore
+    from database import SessionLocal  # type: ignore
+    from models import AuditArchiveModel, AuditLogModel  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "24"))
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", "audit-archive")
+AUDIT_PARTITION_MONTHS_AHEAD = int(os.getenv("AUDIT_PARTITION_MONTHS_AHEAD", "3"))
+AUDIT_ARCHIVE_BATCH_SIZE = 5000
+PARTITION_PREFIX = "audit_log_p"
+DEFAULT_PARTITION = "audit_log_default"
+AUDIT_COLUMNS = "id, entity_type, entity_id, action, performed_by, performed_at, details"
+
+
+def month_start(value: datetime) -> datetime:
+    value = as_utc(value)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARTITION_PREFIX}{start:%Y%m}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(
+        connection.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = 'audit_log'"
+            )
+        ).scalar()
+    )
+
+
+def create_month_partition(connection: Connection, start: datetime) -> None:
+    """Create one month's partition, moving any rows the default partition already holds for it."""
+    name, end = partition_name(start), add_months(start, 1)
+    if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return
+    bounds = {"start": start, "end": end}
+    in_range = "performed_at >= :start AND performed_at < :end"
+    create = (
+        f"CREATE TABLE {name} PARTITION OF audit_log "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    stranded = connection.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"), bounds
+    ).scalar()
+    if not stranded:
+        connection.execute(text(create))
+        return
+    # Postgres refuses the new partition while the default one holds rows in its range.
+    connection.execute(text(f"ALTER TABLE audit_log DETACH PARTITION {DEFAULT_PARTITION}"))
+    connection.execute(text(create))
+    connection.execute(
+        text(f"INSERT INTO {name} ({AUDIT_COLUMNS}) SELECT {AUDIT_COLUMNS} FROM {DEFAULT_PARTITION} WHERE {in_range}"),
+        bounds,
+    )
+    connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+    connection.execute(text(f"ALTER TABLE audit_log ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    logger.info("Moved %s audit rows from %s into %s", start.strftime("%Y-%m"), DEFAULT_PARTITION, name)
+
+
+def ensure_audit_partitions(
+    connection: Connection,
+    *,
+    start: datetime | None = None,
+    months_ahead: int = AUDIT_PARTITION_MONTHS_AHEAD,
+) -> None:
+    """Create monthly partitions from start (default: this month) up to months_ahead from now.
+
+    A month that cannot be created is logged and skipped so that startup never fails here.
+    """
+    if not is_partitioned(connection):
+        return
+    now = datetime.now(timezone.utc)
+    month = month_start(start or now)
+    last = add_months(month_start(now), months_ahead)
+    while month <= last:
+        try:
+            with connection.begin_nested():
+                create_month_partition(connection, month)
+        except SQLAlchemyError:
+            logger.exception("Could not create audit_log partition for %s", month.strftime("%Y-%m"))
+        month = add_months(month, 1)
+
+
+def ensure_audit_partitions_for(bind: Engine) -> None:
+    with bind.begin() as connection:
+        ensure_audit_partitions(connection)
+
+
+def list_partitions(connection: Connection) -> list[tuple[str, datetime, datetime]]:
+    names = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'audit_log' AND c.relname LIKE :prefix ORDER BY c.relname"
+        ),
+        {"prefix": f"{PARTITION_PREFIX}%"},
+    ).scalars().all()
+    partitions = []
+    for name in names:
+        try:
+            start = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m").replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        partitions.append((name, start, add_months(start, 1)))
+    return partitions
+
+
+def expired_ranges(db: Session, cutoff: datetime) -> list[tuple[str | None, datetime, datetime]]:
+    connection = db.connection()
+    if is_partitioned(connection):
+        return [(name, start, end) for name, start, end in list_partitions(connection) if end <= cutoff]
+    oldest = db.execute(select(func.min(AuditLogModel.performed_at)).where(AuditLogModel.performed_at < cutoff)).scalar()
+    ranges = []
+    if oldest is not None:
+        month = month_start(oldest)
+        while month < cutoff:
+            ranges.append((None, month, add_months(month, 1)))
+            month = add_months(month, 1)
+    return ranges
+
+
+def archive_path(db: Session, start: datetime, archive_dir: Path) -> Path:
+    """File name for a month's archive; repeat runs get .v2, .v3, ... rather than replacing earlier files."""
+    version = 1 + db.execute(
+        select(func.count()).select_from(AuditArchiveModel).where(AuditArchiveModel.range_start == start)
+    ).scalar_one()
+    while True:
+        suffix = "" if version == 1 else f".v{version}"
+        path = archive_dir / f"audit_log_{start:%Y%m}{suffix}.jsonl.gz"
+        if not path.exists():
+            return path
+        version += 1
+
+
+def write_archive(db: Session, start: datetime, end: datetime, archive_dir: Path) -> tuple[Path, int, str]:
+    """Stream one month of events into a new gzip JSONL file; returns (path, rows, sha256)."""
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_path(db, start, archive_dir)
+    partial = path.with_suffix(".gz.partial")
+    rows = db.execute(
+        select(AuditLogModel)
+        .where(AuditLogModel.performed_at >= start, AuditLogModel.performed_at < end)
+        .order_by(AuditLogModel.performed_at, AuditLogModel.id)
+        .execution_options(yield_per=AUDIT_ARCHIVE_BATCH_SIZE)
+    ).scalars()
+    row_count = 0
+    with gzip.open(partial, "wt", encoding="utf-8") as archive:
+        for row in rows:
+            archive.write(
+                json.dumps(
+                    {
+                        "id": row.id,
+                        "entity_type": row.entity_type,
+                        "entity_id": row.entity_id,
+                        "action": row.action,
+                        "performed_by": row.performed_by,
+                        "performed_at": as_utc(row.performed_at).isoformat(),
+                        "details": row.details,
+                    },
+                    separators=(",", ":"),
+                )
+                + "\n"
+            )
+            row_count += 1
+    with open(partial, "rb") as archive:
+        os.fsync(archive.fileno())
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: archive.read(1 << 20), b""):
+            digest.update(chunk)
+    os.replace(partial, path)
+    return path, row_count, digest.hexdigest()
+
+
+def archive_range(db: Session, partition: str | None, start: datetime, end: datetime, archive_dir: Path) -> AuditArchiveModel | None:
+    path, row_count, sha256 = write_archive(db, start, end, archive_dir)
+    if partition is not None:
+        db.execute(text(f"ALTER TABLE audit_log DETACH PARTITION {partition}"))
+        db.execute(text(f"DROP TABLE {partition}"))
+    else:
+        db.execute(delete(AuditLogModel).where(AuditLogModel.performed_at >= start, AuditLogModel.performed_at < end))
+    if row_count == 0:
+        path.unlink()
+        db.commit()
+        return None
+    archive = AuditArchiveModel(
+        range_start=start,
+        range_end=end,
+        location=str(path),
+        row_count=row_count,
+        sha256=sha256,
+        archived_at=datetime.now(timezone.utc),
+    )
+    db.add(archive)
+    # The file is on disk before the rows go, so a crash in between only repeats work.
+    db.commit()
+    return archive
+
+
+def run_retention(
+    db: Session,
+    *,
+    older_than_months: int = AUDIT_RETENTION_MONTHS,
+    archive_dir: str | Path = AUDIT_ARCHIVE_DIR,
+    now: datetime | None = None,
+    dry_run: bool = False,
+) -> list[AuditArchiveModel | tuple[datetime, datetime]]:
+    """Archive and drop every whole month older than older_than_months."""
+    ensure_audit_partitions(db.connection())
+    db.commit()
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -older_than_months)
+    ranges = expired_ranges(db, cutoff)
+    if dry_run:
+        return [(start, end) for _, start, end in ranges]
+    archives = [archive_range(db, partition, start, end, Path(archive_dir)) for partition, start, end in ranges]
+    return [archive for archive in archives if archive is not None]
+
+
+def archived_ranges(
+    db: Session,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    *,
+    limit: int | None = None,
+) -> list[tuple[datetime, datetime]]:
+    """Archived ranges overlapping [since, until); open ends are unbounded.
+
+    With a limit only the newest ranges are kept; the result is ordered oldest first.
+    """
+    stmt = select(AuditArchiveModel.range_start, AuditArchiveModel.range_end).distinct()
+    if since is not None:
+        stmt = stmt.where(AuditArchiveModel.range_end > since)
+    if until is not None:
+        stmt = stmt.where(AuditArchiveModel.range_start < until)
+    rows = db.execute(stmt.order_by(AuditArchiveModel.range_start.desc()).limit(limit)).all()
+    return [(as_utc(start), as_utc(end)) for start, end in reversed(rows)]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Archive and drop old audit_log months.")
+    parser.add_argument("--older-than-months", type=int, default=AUDIT_RETENTION_MONTHS)
+    parser.add_argument("--archive-dir", default=AUDIT_ARCHIVE_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="list the months that would be archived")
+    args = parser.parse_args(argv)
+    db = SessionLocal()
+    try:
+        results = run_retention(
+            db,
+            older_than_months=args.older_than_months,
+            archive_dir=args.archive_dir,
+            dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+    for result in results:
+        if isinstance(result, AuditArchiveModel):
+            print(f"archived {result.range_start:%Y-%m}: {result.row_count} rows -> {result.location}")
+        else:
+            print(f"would archive {result[0]:%Y-%m}")
+    if not results:
+        print("nothing to archive")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from sqlalchemy import DDL, event, func, literal_column, or_, select, text
+
+try:
+    from .models import AuditLogModel
+except ImportError:  # pragma: no cover
+    from models import AuditLogModel  # type: ignore
+
+
+# Trigram matching needs at least three characters; shorter keys fall back to a scan.
+MIN_INDEXED_QUERY_LENGTH = 3
+
+SQLITE_FTS_TABLE = "audit_log_fts"
+POSTGRES_TRGM_INDEX = "ix_audit_log_search_trgm"
+
+SQLITE_SEARCH_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        entity_type, action, entity_id, performed_by, details,
+        content='audit_log', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS audit_log_fts_ai AFTER INSERT ON audit_log BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, entity_type, action, entity_id, performed_by, details)
+        VALUES (new.id, new.entity_type, new.action, new.entity_id, new.performed_by, new.details);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS audit_log_fts_ad AFTER DELETE ON audit_log BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, entity_type, action, entity_id, performed_by, details)
+        VALUES ('delete', old.id, old.entity_type, old.action, old.entity_id, old.performed_by, old.details);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS audit_log_fts_au AFTER UPDATE ON audit_log BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, entity_type, action, entity_id, performed_by, details)
+        VALUES ('delete', old.id, old.entity_type, old.action, old.entity_id, old.performed_by, old.details);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, entity_type, action, entity_id, performed_by, details)
+        VALUES (new.id, new.entity_type, new.action, new.entity_id, new.performed_by, new.details);
+    END
+    """,
+]
+
+SQLITE_SEARCH_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS audit_log_fts_au",
+    "DROP TRIGGER IF EXISTS audit_log_fts_ad",
+    "DROP TRIGGER IF EXISTS audit_log_fts_ai",
+    f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}",
+]
+
+# The index expression must match search_document() exactly for the planner to use it.
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    CREATE INDEX IF NOT EXISTS {POSTGRES_TRGM_INDEX} ON audit_log USING gin (
+        lower(entity_type || ' ' || action || ' ' || entity_id || ' '
+              || coalesce(performed_by, '') || ' ' || coalesce(details, '')) gin_trgm_ops
+    )
+    """,
+]
+
+POSTGRES_SEARCH_DROP_DDL = [f"DROP INDEX IF EXISTS {POSTGRES_TRGM_INDEX}"]
+
+
+def search_document():
+    space = literal_column("' '")
+    return func.lower(
+        AuditLogModel.entity_type
+        + space
+        + AuditLogModel.action
+        + space
+        + AuditLogModel.entity_id
+        + space
+        + func.coalesce(AuditLogModel.performed_by, literal_column("''"))
+        + space
+        + func.coalesce(AuditLogModel.details, literal_column("''"))
+    )
+
+
+def scan_search_clause(key: str):
+    return or_(
+        func.lower(AuditLogModel.entity_type).contains(key, autoescape=True),
+        func.lower(AuditLogModel.action).contains(key, autoescape=True),
+        func.lower(AuditLogModel.entity_id).contains(key, autoescape=True),
+        func.lower(func.coalesce(AuditLogModel.performed_by, "")).contains(key, autoescape=True),
+        func.lower(func.coalesce(AuditLogModel.details, "")).contains(key, autoescape=True),
+    )
+
+
+def audit_search_clause(q: str, dialect_name: str):
+    """Build a WHERE clause matching audit rows whose columns contain q (case-insensitive)."""
+    key = q.strip().lower()
+    if len(key) < MIN_INDEXED_QUERY_LENGTH:
+        return scan_search_clause(key)
+    if dialect_name == "postgresql":
+        return search_document().contains(key, autoescape=True)
+    if dialect_name == "sqlite":
+        phrase = '"' + key.replace('"', '""') + '"'
+        matches = select(literal_column("rowid")).select_from(text(SQLITE_FTS_TABLE)).where(
+            text(f"{SQLITE_FTS_TABLE} MATCH :audit_search_phrase").bindparams(audit_search_phrase=phrase)
+        )
+        return AuditLogModel.id.in_(matches)
+    return scan_search_clause(key)
+
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(AuditLogModel.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in POSTGRES_SEARCH_DDL:
+    event.listen(AuditLogModel.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
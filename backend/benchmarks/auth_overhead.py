@@ -0,0 +1,66 @@
+"""Compare per-request authentication cost of the old and the signed session tokens.
+
+    python -m backend.benchmarks.auth_overhead --iterations 5000
+
+The old path opened a session and loaded the user row for every authenticated
+call (``fake-<id>`` tokens); the new path verifies an HMAC signature and checks
+the in-process revocation list. Uses DATABASE_URL, or a throwaway SQLite file.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tempfile.mkdtemp()}/auth_overhead.db"
+
+from backend.database import Base, SessionLocal, engine  # noqa: E402
+from backend.models import UserModel  # noqa: E402
+from backend.session_tokens import issue_session_token, verify_session_token  # noqa: E402
+
+
+def per_call_us(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def main(iterations: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = db.query(UserModel).filter(UserModel.username == "auth.bench").first()
+        if user is None:
+            user = UserModel(username="auth.bench", full_name="Auth Bench", password_hash="x", role="admin", roles="admin")
+            db.add(user)
+            db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+    token = issue_session_token(user_id, ["admin"], None)
+
+    def database_lookup():
+        session = SessionLocal()
+        try:
+            assert session.get(UserModel, user_id) is not None
+        finally:
+            session.close()
+
+    def signed_token():
+        assert verify_session_token(token) is not None
+
+    database_lookup()
+    signed_token()
+    before = per_call_us(database_lookup, iterations)
+    after = per_call_us(signed_token, iterations)
+    print(f"db lookup per request:    {before:8.1f} us")
+    print(f"signed token per request: {after:8.1f} us")
+    print(f"speedup:                  {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    main(parser.parse_args().iterations)
@@ -0,0 +1,88 @@
+"""Measure how request throughput scales with the number of in-flight requests.
+
+Run against a live server (uvicorn with a single worker makes the effect obvious):
+
+    uvicorn backend.main:app --workers 1 --port 8000
+    python -m backend.benchmarks.concurrency --base-url http://127.0.0.1:8000
+
+For every concurrency level the script fires --requests calls at each scenario and
+prints requests/second and latency percentiles. With blocking work on the event
+loop throughput stays flat as concurrency grows; with threadpool routes it scales
+until the DB pool or CPU saturates.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+SCENARIOS = {
+    "login": ("POST", "/auth/login", {"username": "admin", "password": "admin"}),
+    "planned-analyses": ("GET", "/planned-analyses", None),
+    "samples": ("GET", "/samples", None),
+}
+
+
+async def run_level(client: httpx.AsyncClient, scenario: str, concurrency: int, total: int) -> dict:
+    method, path, body = SCENARIOS[scenario]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    failures = 0
+
+    async def one() -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": total,
+        "failures": failures,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+async def main(args: argparse.Namespace) -> list[dict]:
+    levels = [int(level) for level in args.concurrency.split(",")]
+    headers = {"x-user": "admin", "x-role": "admin", "x-roles": "admin"}
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    results = []
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=60) as client:
+        for scenario in args.scenarios.split(","):
+            for level in levels:
+                result = await run_level(client, scenario, level, args.requests)
+                results.append(result)
+                if not args.json:
+                    print(
+                        f"{scenario:<18} c={level:<4} {result['throughput_rps']:>8} req/s  "
+                        f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms failures={result['failures']}"
+                    )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", default="login,planned-analyses")
+    parser.add_argument("--concurrency", default="1,2,4,8,16")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and concurrency level")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parsed = parser.parse_args()
+    report = asyncio.run(main(parsed))
+    if parsed.json:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,30 @@
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+try:
+    from .models import VersionCounterModel
+except ImportError:  # pragma: no cover
+    from models import VersionCounterModel  # type: ignore
+
+
+def read_counter(db: Session, name: str) -> int:
+    value = db.execute(select(VersionCounterModel.value).where(VersionCounterModel.name == name)).scalar()
+    return int(value or 0)
+
+
+def bump_counter(db: Session, name: str) -> int:
+    """Increment a named counter inside the caller's transaction and return the new value.
+
+    A single upsert creates a missing row or increments an existing one, so
+    concurrent first writers cannot both insert. The row lock is held until
+    commit, so writers are serialized and values become visible in increasing order.
+    """
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    # Core statement (not db.add) so this is safe to call from flush hooks.
+    stmt = dialect_insert(VersionCounterModel).values(name=name, value=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VersionCounterModel.name],
+        set_={"value": VersionCounterModel.value + 1},
+    ).returning(VersionCounterModel.value)
+    return int(db.execute(stmt).scalar_one())
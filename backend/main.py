@@ -1,31 +1,82 @@
+import asyncio
+import base64
+from contextlib import asynccontextmanager
+import csv
+import io
+import json
+import logging
 import os
 from datetime import date, datetime, timezone
 import re
 import secrets
 import smtplib
 from email.message import EmailMessage
+from typing import Any
 
-from fastapi import Depends, FastAPI, HTTPException, Request
+import anyio
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from sqlalchemy import select, distinct, delete
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, or_, select, distinct, delete, func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 
 # Support running as a module or script
 try:
-    from .database import Base, engine, get_db
-    from .models import ActionBatchModel, ActionBatchStatus, AuditLogModel, ConflictModel, ConflictStatus, FilterMethodModel, SampleModel, SampleStatus, PlannedAnalysisModel, PlannedAnalysisAssigneeModel, AnalysisStatus, UserModel, UserMethodPermissionModel, PasswordResetTokenModel
-    from .schemas import ActionBatchCreate, ActionBatchOut, AuditEventOut, ConflictCreate, ConflictOut, ConflictUpdate, FilterMethodsOut, FilterMethodsUpdate, PlannedAnalysisCreate, PlannedAnalysisOut, PlannedAnalysisUpdate, UserOut, UserCreate, UserCreateOut, UserUpdate
+    from .database import Base, SessionLocal, engine, env_flag, get_db, pool_status
+    from .models import ActionBatchModel, ActionBatchStatus, AuditLogModel, ConflictModel, ConflictStatus, FilterMethodModel, SampleModel, SampleStatus, PlannedAnalysisModel, PlannedAnalysisAssigneeModel, AnalysisStatus, UserModel, UserMethodPermissionModel, PasswordResetTokenModel, SyncTombstoneModel, identity_key
+    from .schemas import ActionBatchCreate, ActionBatchOut, AuditEventOut, ConflictCreate, ConflictOut, ConflictUpdate, FilterMethodsOut, FilterMethodsUpdate, PlannedAnalysisBulkUpdate, PlannedAnalysisCreate, PlannedAnalysisEnsureDefaults, PlannedAnalysisOut, PlannedAnalysisUpdate, UserOut, UserCreate, UserCreateOut, UserUpdate
     from .seed import seed_users
-    from .security import hash_password, verify_password, hash_token
+    from .audit import as_utc, log_audit, log_audit_many
+    from .audit_retention import archived_ranges, ensure_audit_partitions_for
+    from .audit_search import audit_search_clause
+    from .user_directory import user_directory
+    from .sync import current_revision, record_sample_tombstones, record_tombstones, transaction_revision
+    from .realtime import broadcaster, change_bus, format_sse, notify_change
+    from .session_tokens import DEV_SESSION_TOKEN_SECRET, SESSION_TOKEN_SECRET, SessionClaims, issue_session_token, password_epoch, session_revocations, verify_session_token
+    from .security import PasswordHasherBusy, hash_token, needs_rehash, password_hasher
+    from .metrics import render_metrics
+    from .request_metrics import ProfiledRoute, RequestMetricsMiddleware, instrument_engine
+    from .sample_import import SAMPLE_IMPORT_BATCH_SIZE, SAMPLE_IMPORT_MAX_ERRORS, batched, import_sample_batch, iter_csv_rows
 except ImportError:  # pragma: no cover - fallback for script execution
-  from database import Base, engine, get_db  # type: ignore
-  from models import ActionBatchModel, ActionBatchStatus, AuditLogModel, ConflictModel, ConflictStatus, FilterMethodModel, SampleModel, SampleStatus, PlannedAnalysisModel, PlannedAnalysisAssigneeModel, AnalysisStatus, UserModel, UserMethodPermissionModel, PasswordResetTokenModel  # type: ignore
-  from schemas import ActionBatchCreate, ActionBatchOut, AuditEventOut, ConflictCreate, ConflictOut, ConflictUpdate, FilterMethodsOut, FilterMethodsUpdate, PlannedAnalysisCreate, PlannedAnalysisOut, PlannedAnalysisUpdate, UserOut, UserCreate, UserCreateOut, UserUpdate  # type: ignore
+  from database import Base, SessionLocal, engine, env_flag, get_db, pool_status  # type: ignore
+  from models import ActionBatchModel, ActionBatchStatus, AuditLogModel, ConflictModel, ConflictStatus, FilterMethodModel, SampleModel, SampleStatus, PlannedAnalysisModel, PlannedAnalysisAssigneeModel, AnalysisStatus, UserModel, UserMethodPermissionModel, PasswordResetTokenModel, SyncTombstoneModel, identity_key  # type: ignore
+  from schemas import ActionBatchCreate, ActionBatchOut, AuditEventOut, ConflictCreate, ConflictOut, ConflictUpdate, FilterMethodsOut, FilterMethodsUpdate, PlannedAnalysisBulkUpdate, PlannedAnalysisCreate, PlannedAnalysisEnsureDefaults, PlannedAnalysisOut, PlannedAnalysisUpdate, UserOut, UserCreate, UserCreateOut, UserUpdate  # type: ignore
   from seed import seed_users  # type: ignore
-  from security import hash_password, verify_password, hash_token  # type: ignore
+  from audit import as_utc, log_audit, log_audit_many  # type: ignore
+  from audit_retention import archived_ranges, ensure_audit_partitions_for  # type: ignore
+  from audit_search import audit_search_clause  # type: ignore
+  from user_directory import user_directory  # type: ignore
+  from sync import current_revision, record_sample_tombstones, record_tombstones, transaction_revision  # type: ignore
+  from realtime import broadcaster, change_bus, format_sse, notify_change  # type: ignore
+  from session_tokens import DEV_SESSION_TOKEN_SECRET, SESSION_TOKEN_SECRET, SessionClaims, issue_session_token, password_epoch, session_revocations, verify_session_token  # type: ignore
+  from security import PasswordHasherBusy, hash_token, needs_rehash, password_hasher  # type: ignore
+  from metrics import render_metrics  # type: ignore
+  from request_metrics import ProfiledRoute, RequestMetricsMiddleware, instrument_engine  # type: ignore
+  from sample_import import SAMPLE_IMPORT_BATCH_SIZE, SAMPLE_IMPORT_MAX_ERRORS, batched, import_sample_batch, iter_csv_rows  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Sync routes run in the AnyIO worker threadpool; keep it in step with DB_POOL_SIZE + DB_MAX_OVERFLOW.
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "40"))
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+  anyio.to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
+  change_bus.start()
+  try:
+    yield
+  finally:
+    change_bus.stop()
+    password_hasher.shutdown()
+
 
-app = FastAPI(title="LabSync backend", version="0.1.0")
+app = FastAPI(title="LabSync backend", version="0.1.0", lifespan=lifespan)
+# Lets ?profile=1 run sync endpoints under cProfile; must be set before routes are declared.
+app.router.route_class = ProfiledRoute
 
 DEFAULT_PASSWORD = "Tatneft123"
 DEFAULT_METHOD_PERMISSIONS = ["SARA", "IR", "Mass Spectrometry", "Viscosity", "Electrophoresis"]
@@ -39,11 +90,18 @@ SMTP_USER = os.getenv("SMTP_USER", "").strip()
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "").strip()
 SMTP_FROM = os.getenv("SMTP_FROM", SMTP_USER or "no-reply@labsync.local").strip()
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "http://127.0.0.1:8080").strip()
+# Development only: requests without an Authorization header may claim roles via x-role/x-roles.
+ALLOW_ROLE_HEADERS = env_flag("ALLOW_ROLE_HEADERS", False)
 
 if IS_PRODUCTION and BOOTSTRAP_ADMIN_PASSWORD == "admin":
   raise RuntimeError("Set BOOTSTRAP_ADMIN_PASSWORD in production; default 'admin' is blocked.")
+if IS_PRODUCTION and SESSION_TOKEN_SECRET == DEV_SESSION_TOKEN_SECRET:
+  raise RuntimeError("Set SESSION_TOKEN_SECRET in production; the development secret is blocked.")
+if IS_PRODUCTION and ALLOW_ROLE_HEADERS:
+  raise RuntimeError("ALLOW_ROLE_HEADERS is for development only; unset it in production.")
 
 Base.metadata.create_all(bind=engine)
+ensure_audit_partitions_for(engine)
 seed_users(bootstrap_admin_password=BOOTSTRAP_ADMIN_PASSWORD)
 
 app.add_middleware(
@@ -52,7 +110,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Audit-Archived-Ranges", "Server-Timing"],
 )
+instrument_engine(engine)
+app.add_middleware(RequestMetricsMiddleware, can_profile=lambda request: has_admin_session(request))
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(_: Request, __: PasswordHasherBusy):
+  return JSONResponse(status_code=503, content={"detail": "Server busy, try again"}, headers={"Retry-After": "1"})
 
 
 @app.get("/health")
@@ -60,6 +126,12 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+  body, content_type = render_metrics()
+  return Response(content=body, media_type=content_type)
+
+
 class LoginRequest(BaseModel):
   username: str
   password: str
@@ -94,24 +166,47 @@ class ConfirmPasswordResetRequest(BaseModel):
   new_password: str
 
 
-def get_user_from_authorization(authorization: str | None, db: Session) -> tuple[UserModel, str]:
+def bearer_token(authorization: str | None) -> str | None:
   if not authorization or not authorization.lower().startswith("bearer "):
+    return None
+  return authorization.split(" ", 1)[1].strip()
+
+
+def get_session_claims(request: Request) -> SessionClaims | None:
+  """Verified claims of the request's bearer token, without touching the database."""
+  if not hasattr(request.state, "session_claims"):
+    request.state.session_claims = verify_session_token(bearer_token(request.headers.get("authorization")))
+  return request.state.session_claims
+
+
+def get_user_from_authorization(authorization: str | None, db: Session) -> tuple[UserModel, str]:
+  token = bearer_token(authorization)
+  if not token:
     raise HTTPException(status_code=401, detail="Unauthorized")
-  token = authorization.split(" ", 1)[1]
-  user_id = token.split("-", 1)[1] if token.startswith("fake-") else token
-  try:
-    user_id_int = int(user_id)
-  except Exception:
+  claims = verify_session_token(token)
+  if claims is None:
     raise HTTPException(status_code=401, detail="Invalid token")
-  user = db.get(UserModel, user_id_int)
-  if not user:
+  user = db.get(UserModel, claims.user_id)
+  if not user or not user.is_active or password_epoch(user.password_changed_at) != claims.password_changed_at:
     raise HTTPException(status_code=401, detail="Invalid token")
   return user, token
 
 
+def issue_token_for(user: UserModel) -> str:
+  return issue_session_token(user.id, parse_roles(user.roles) or [user.role], user.password_changed_at)
+
+
 def send_password_reset_email(email: str, token: str):
   if not SMTP_HOST:
     return
+  try:
+    deliver_password_reset_email(email, token)
+  except Exception:
+    # Runs as a background task; do not leak transport details to clients.
+    logger.exception("Failed to send password reset email")
+
+
+def deliver_password_reset_email(email: str, token: str):
   reset_link = f"{FRONTEND_BASE_URL}/login?resetToken={token}"
   message = EmailMessage()
   message["Subject"] = "LabSync password reset"
@@ -132,14 +227,18 @@ def send_password_reset_email(email: str, token: str):
 
 
 @app.post("/auth/login", response_model=LoginResponse)
-async def login(payload: LoginRequest, db: Session = Depends(get_db)):
+def login(payload: LoginRequest, db: Session = Depends(get_db)):
   username = payload.username.strip()
   if not username:
     raise HTTPException(status_code=401, detail="Invalid username or password")
   user = db.execute(select(UserModel).where(UserModel.username == username)).scalars().first()
-  if not user or not verify_password(payload.password, user.password_hash) or not user.is_active:
+  if not user or not password_hasher.verify(payload.password, user.password_hash) or not user.is_active:
     raise HTTPException(status_code=401, detail="Invalid username or password")
-  token = f"fake-{user.id}"
+  if needs_rehash(user.password_hash):
+    # Upgrade hashes made with older scrypt parameters while the plaintext is at hand.
+    user.password_hash = password_hasher.hash(payload.password)
+    db.commit()
+  token = issue_token_for(user)
   roles = parse_roles(user.roles)
   return LoginResponse(
     token=token,
@@ -151,7 +250,7 @@ async def login(payload: LoginRequest, db: Session = Depends(get_db)):
 
 
 @app.post("/auth/request-password-reset", response_model=RequestPasswordResetResponse)
-async def request_password_reset(payload: RequestPasswordResetRequest, db: Session = Depends(get_db)):
+def request_password_reset(payload: RequestPasswordResetRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
   username = (payload.username or "").strip()
   email = (payload.email or "").strip().lower()
   if not username:
@@ -184,12 +283,6 @@ async def request_password_reset(payload: RequestPasswordResetRequest, db: Sessi
       used_at=None,
     )
   )
-  db.commit()
-  try:
-    send_password_reset_email(email, raw_token)
-  except Exception:
-    # Do not leak transport details to clients.
-    pass
   log_audit(
     db,
     entity_type="user",
@@ -198,6 +291,9 @@ async def request_password_reset(payload: RequestPasswordResetRequest, db: Sessi
     performed_by=user.username,
     details=f"username={username};email={email}",
   )
+  db.commit()
+  # Sent after the response so a slow SMTP server does not hold the request.
+  background_tasks.add_task(send_password_reset_email, email, raw_token)
   # In development, expose token in response for testing without SMTP.
   dev_token = raw_token if not IS_PRODUCTION and not SMTP_HOST else None
   return RequestPasswordResetResponse(
@@ -207,7 +303,7 @@ async def request_password_reset(payload: RequestPasswordResetRequest, db: Sessi
 
 
 @app.post("/auth/confirm-password-reset", response_model=LoginResponse)
-async def confirm_password_reset(payload: ConfirmPasswordResetRequest, db: Session = Depends(get_db)):
+def confirm_password_reset(payload: ConfirmPasswordResetRequest, db: Session = Depends(get_db)):
   token = (payload.token or "").strip()
   if not token:
     raise HTTPException(status_code=400, detail="Reset token is required")
@@ -230,12 +326,13 @@ async def confirm_password_reset(payload: ConfirmPasswordResetRequest, db: Sessi
   user = db.get(UserModel, reset_row.user_id)
   if not user or not user.is_active:
     raise HTTPException(status_code=400, detail="Reset token is invalid")
-  if verify_password(new_password, user.password_hash):
+  if password_hasher.verify(new_password, user.password_hash):
     raise HTTPException(status_code=400, detail="New password must be different")
-  user.password_hash = hash_password(new_password)
+  user.password_hash = password_hasher.hash(new_password)
   user.must_change_password = False
   user.password_changed_at = now_iso
   reset_row.used_at = now_iso
+  session_revocations.revoke(db, user.id)
   db.execute(
     delete(PasswordResetTokenModel).where(
       PasswordResetTokenModel.user_id == user.id,
@@ -244,8 +341,6 @@ async def confirm_password_reset(payload: ConfirmPasswordResetRequest, db: Sessi
   )
   db.add(user)
   db.add(reset_row)
-  db.commit()
-  db.refresh(user)
   log_audit(
     db,
     entity_type="user",
@@ -254,7 +349,9 @@ async def confirm_password_reset(payload: ConfirmPasswordResetRequest, db: Sessi
     performed_by=user.username,
     details="email_flow",
   )
-  token_out = f"fake-{user.id}"
+  db.commit()
+  db.refresh(user)
+  token_out = issue_token_for(user)
   roles = parse_roles(user.roles)
   return LoginResponse(
     token=token_out,
@@ -266,7 +363,7 @@ async def confirm_password_reset(payload: ConfirmPasswordResetRequest, db: Sessi
 
 
 @app.get("/auth/me", response_model=LoginResponse)
-async def me(request: Request, db: Session = Depends(get_db)):
+def me(request: Request, db: Session = Depends(get_db)):
   user, token = get_user_from_authorization(request.headers.get("authorization"), db)
   roles = parse_roles(user.roles)
   return LoginResponse(
@@ -279,21 +376,20 @@ async def me(request: Request, db: Session = Depends(get_db)):
 
 
 @app.post("/auth/change-password", response_model=LoginResponse)
-async def change_password(payload: ChangePasswordRequest, request: Request, db: Session = Depends(get_db)):
+def change_password(payload: ChangePasswordRequest, request: Request, db: Session = Depends(get_db)):
   user, token = get_user_from_authorization(request.headers.get("authorization"), db)
-  if not verify_password(payload.current_password, user.password_hash):
+  if not password_hasher.verify(payload.current_password, user.password_hash):
     raise HTTPException(status_code=401, detail="Current password is invalid")
   new_password = (payload.new_password or "").strip()
   if len(new_password) < 8:
     raise HTTPException(status_code=400, detail="New password must be at least 8 characters")
   if payload.current_password == new_password:
     raise HTTPException(status_code=400, detail="New password must be different")
-  user.password_hash = hash_password(new_password)
+  user.password_hash = password_hasher.hash(new_password)
   user.must_change_password = False
   user.password_changed_at = datetime.now(timezone.utc).isoformat()
+  session_revocations.revoke(db, user.id)
   db.add(user)
-  db.commit()
-  db.refresh(user)
   log_audit(
     db,
     entity_type="user",
@@ -302,6 +398,9 @@ async def change_password(payload: ChangePasswordRequest, request: Request, db:
     performed_by=user.username,
     details="self_service",
   )
+  db.commit()
+  db.refresh(user)
+  token = issue_token_for(user)
   roles = parse_roles(user.roles)
   return LoginResponse(
     token=token,
@@ -323,7 +422,9 @@ class Sample(BaseModel):
   assigned_to: str | None = None
 
 
-def parse_iso_date_or_400(value: str, field_name: str) -> date:
+def parse_iso_date_or_400(value: str | date, field_name: str) -> date:
+  if isinstance(value, date):
+    return value
   try:
     return date.fromisoformat((value or "").strip())
   except Exception:
@@ -334,17 +435,134 @@ class SamplePurgeRequest(BaseModel):
   sample_ids: list[str]
 
 
+SAMPLE_BULK_MAX_ROWS = 10 * SAMPLE_IMPORT_BATCH_SIZE
+
+
+class SampleBulkCreate(BaseModel):
+  # Rows stay untyped so one bad row is reported instead of failing the whole request.
+  samples: list[Any] = Field(
+    max_length=SAMPLE_BULK_MAX_ROWS,
+    description=f"At most {SAMPLE_BULK_MAX_ROWS} rows; stream larger loads as CSV to /samples/import.",
+  )
+
+
+class SampleBulkUpdate(BaseModel):
+  sample_ids: list[str] = Field(min_length=1, max_length=1000)
+  status: str | None = None
+  storage_location: str | None = None
+  assigned_to: str | None = None
+
+
+SAMPLE_FIELDS = list(Sample.model_fields)
+SAMPLE_ORDER_COLUMNS = {
+  "sample_id": [SampleModel.sample_id],
+  "arrival_date": [SampleModel.arrival_date, SampleModel.sample_id],
+  "sampling_date": [SampleModel.sampling_date, SampleModel.sample_id],
+}
+
+
+def parse_sample_fields(fields: str | None) -> list[str]:
+  if not fields:
+    return SAMPLE_FIELDS
+  requested = [name.strip() for name in fields.split(",") if name.strip()]
+  unknown = [name for name in requested if name not in SAMPLE_FIELDS]
+  if unknown:
+    raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+  # sample_id is the row identity and the pagination key, so it is always included.
+  return ["sample_id", *[name for name in dict.fromkeys(requested) if name != "sample_id"]]
+
+
+def keyset_after(columns: list, values: list, descending: bool):
+  """Rows strictly after values in (columns...) order, as nested OR/AND so indexes apply."""
+  column, value = columns[0], values[0]
+  beyond = column < value if descending else column > value
+  if len(columns) == 1:
+    return beyond
+  return or_(beyond, and_(column == value, keyset_after(columns[1:], values[1:], descending)))
+
+
+def decode_keyset_cursor(cursor: str, columns: list) -> list:
+  """Cursor values checked against their columns' types, so a bad cursor is a 400 rather than a SQL error."""
+  values = []
+  for column, value in zip(columns, decode_cursor(cursor, len(columns))):
+    python_type = column.type.python_type
+    try:
+      if python_type is date:
+        value = date.fromisoformat(value)
+      elif not isinstance(value, python_type) or isinstance(value, bool):
+        raise TypeError(value)
+    except (TypeError, ValueError):
+      raise HTTPException(status_code=400, detail="Invalid cursor")
+    values.append(value)
+  return values
+
+
 @app.get("/samples")
-async def list_samples(status: str | None = None, db: Session = Depends(get_db)):
-  stmt = select(SampleModel)
+def list_samples(
+  response: Response,
+  status: str | None = None,
+  well_id: str | None = None,
+  horizon: str | None = None,
+  assigned_to: str | None = None,
+  storage_location: str | None = None,
+  sampling_from: str | None = None,
+  sampling_to: str | None = None,
+  arrival_from: str | None = None,
+  arrival_to: str | None = None,
+  order_by: str = "sample_id",
+  sort: str = "asc",
+  limit: int | None = None,
+  cursor: str | None = None,
+  fields: str | None = None,
+  db: Session = Depends(get_db),
+):
+  if order_by not in SAMPLE_ORDER_COLUMNS:
+    raise HTTPException(status_code=400, detail="order_by must be sample_id, arrival_date or sampling_date")
+  selected = parse_sample_fields(fields)
+  order_columns = SAMPLE_ORDER_COLUMNS[order_by]
+  descending = sort == "desc"
+  # Order keys are always fetched so the next cursor can be built from the last row.
+  fetched = list(dict.fromkeys([*selected, *(column.key for column in order_columns)]))
+  stmt = select(*[getattr(SampleModel, name) for name in fetched])
   if status:
     stmt = stmt.where(SampleModel.status == SampleStatus(status))
-  rows = db.execute(stmt).scalars().all()
-  return [to_sample_out(r) for r in rows]
+  for column, value in (
+    (SampleModel.well_id, well_id),
+    (SampleModel.horizon, horizon),
+    (SampleModel.assigned_to, assigned_to),
+    (SampleModel.storage_location, storage_location),
+  ):
+    if value is not None:
+      stmt = stmt.where(column == value)
+  for column, bound, field_name, is_upper in (
+    (SampleModel.sampling_date, sampling_from, "sampling_from", False),
+    (SampleModel.sampling_date, sampling_to, "sampling_to", True),
+    (SampleModel.arrival_date, arrival_from, "arrival_from", False),
+    (SampleModel.arrival_date, arrival_to, "arrival_to", True),
+  ):
+    if bound:
+      value = parse_iso_date_or_400(bound, field_name)
+      stmt = stmt.where(column <= value if is_upper else column >= value)
+  if cursor:
+    after = decode_keyset_cursor(cursor, order_columns)
+    stmt = stmt.where(keyset_after(order_columns, after, descending))
+  stmt = stmt.order_by(*[column.desc() if descending else column.asc() for column in order_columns])
+  page_size = max(1, min(limit, 1000)) if limit is not None else None
+  if page_size is not None:
+    stmt = stmt.limit(page_size + 1)
+  rows = db.execute(stmt).mappings().all()
+  if page_size is not None and len(rows) > page_size:
+    rows = rows[:page_size]
+    last = [rows[-1][column.key] for column in order_columns]
+    response.headers["X-Next-Cursor"] = encode_cursor([value.isoformat() if isinstance(value, date) else value for value in last])
+  return [
+    {name: row[name].value if name == "status" else row[name] for name in selected}
+    for row in rows
+  ]
 
 
 @app.get("/samples/{sample_id}")
-async def get_sample(sample_id: str, db: Session = Depends(get_db)):
+def get_sample(sample_id: str, db: Session = Depends(get_db)):
   row = db.get(SampleModel, sample_id)
   if not row:
     raise HTTPException(status_code=404, detail="Sample not found")
@@ -352,17 +570,18 @@ async def get_sample(sample_id: str, db: Session = Depends(get_db)):
 
 
 @app.delete("/samples/{sample_id}")
-async def delete_sample(sample_id: str, db: Session = Depends(get_db)):
+def delete_sample(sample_id: str, db: Session = Depends(get_db)):
   row = db.get(SampleModel, sample_id)
   if not row:
     raise HTTPException(status_code=404, detail="Sample not found")
   db.delete(row)
+  notify_change(db, "sample", "deleted", sample_id)
   db.commit()
   return {"deleted": True}
 
 
 @app.post("/samples", status_code=201)
-async def create_sample(sample: Sample, db: Session = Depends(get_db)):
+def create_sample(sample: Sample, db: Session = Depends(get_db)):
   existing = db.get(SampleModel, sample.sample_id)
   if existing:
     raise HTTPException(status_code=400, detail="Sample exists")
@@ -374,20 +593,139 @@ async def create_sample(sample: Sample, db: Session = Depends(get_db)):
     sample_id=sample.sample_id,
     well_id=sample.well_id,
     horizon=sample.horizon,
-    sampling_date=sample.sampling_date,
-    arrival_date=sample.arrival_date,
+    sampling_date=sampling_date_value,
+    arrival_date=arrival_date_value,
     status=SampleStatus(sample.status),
     storage_location=sample.storage_location,
     assigned_to=sample.assigned_to,
   )
   db.add(row)
+  notify_change(db, "sample", "created", row.sample_id)
   db.commit()
   db.refresh(row)
   return to_sample_out(row)
 
 
+class SampleImportReport:
+  def __init__(self):
+    self.created = 0
+    self.failed = 0
+    self.errors: list[dict] = []
+
+  def add(self, created: int, errors: list[dict]):
+    self.created += created
+    self.failed += len(errors)
+    self.errors.extend(errors[: max(0, SAMPLE_IMPORT_MAX_ERRORS - len(self.errors))])
+
+  def as_dict(self):
+    return {"created": self.created, "failed": self.failed, "errors": self.errors}
+
+
+@app.post("/samples/bulk")
+def create_samples_bulk(payload: SampleBulkCreate, request: Request, db: Session = Depends(get_db)):
+  """Register up to SAMPLE_BULK_MAX_ROWS samples from a JSON body; larger loads go to /samples/import."""
+  actor = request.headers.get("x-user")
+  report = SampleImportReport()
+  for batch in batched(enumerate(payload.samples, start=1)):
+    report.add(*import_sample_batch(db, batch, actor))
+    db.commit()
+  return report.as_dict()
+
+
+def import_sample_batch_in_session(batch: list[tuple[int, dict]], actor: str | None) -> tuple[int, list[dict]]:
+  db = SessionLocal()
+  try:
+    result = import_sample_batch(db, batch, actor)
+    db.commit()
+    return result
+  finally:
+    db.close()
+
+
+@app.post("/samples/import")
+async def import_samples_csv(request: Request):
+  """Register samples from a CSV body (text/csv), committed batch by batch as the upload streams in."""
+  actor = request.headers.get("x-user")
+  report = SampleImportReport()
+  batch: list[tuple[int, dict]] = []
+  try:
+    async for item in iter_csv_rows(request.stream()):
+      batch.append(item)
+      if len(batch) >= SAMPLE_IMPORT_BATCH_SIZE:
+        report.add(*await anyio.to_thread.run_sync(import_sample_batch_in_session, batch, actor))
+        batch = []
+  except UnicodeDecodeError:
+    raise HTTPException(status_code=400, detail=f"CSV must be UTF-8 encoded ({report.created} samples imported before the error)")
+  if batch:
+    report.add(*await anyio.to_thread.run_sync(import_sample_batch_in_session, batch, actor))
+  return report.as_dict()
+
+
+SAMPLE_BULK_UPDATE_FIELDS = ("status", "storage_location", "assigned_to")
+
+
+@app.patch("/samples/bulk")
+def update_samples_bulk(payload: SampleBulkUpdate, request: Request, db: Session = Depends(get_db)):
+  sample_ids = list(dict.fromkeys(sid.strip() for sid in payload.sample_ids if sid.strip()))
+  if not sample_ids:
+    raise HTTPException(status_code=400, detail="Sample IDs required")
+  # Only fields present in the body change, so an explicit null clears a field.
+  changes = {key: getattr(payload, key) for key in SAMPLE_BULK_UPDATE_FIELDS if key in payload.model_fields_set}
+  if not changes:
+    raise HTTPException(status_code=400, detail="Nothing to update")
+  if "status" in changes:
+    try:
+      changes["status"] = SampleStatus(changes["status"])
+    except ValueError:
+      raise HTTPException(status_code=400, detail="Unknown sample status")
+  rows = db.execute(
+    select(SampleModel.sample_id, *[getattr(SampleModel, key) for key in changes]).where(SampleModel.sample_id.in_(sample_ids))
+  ).mappings().all()
+  missing = sorted(set(sample_ids) - {row["sample_id"] for row in rows})
+  if missing:
+    raise HTTPException(status_code=404, detail=f"Samples not found: {', '.join(missing)}")
+  db.execute(
+    update(SampleModel)
+    .where(SampleModel.sample_id.in_(sample_ids))
+    .values(**changes, revision=transaction_revision(db), updated_at=datetime.now(timezone.utc).isoformat())
+    .execution_options(synchronize_session=False)
+  )
+  actor = request.headers.get("x-user")
+  events: list[dict] = []
+  for row in rows:
+    notify_change(db, "sample", "updated", row["sample_id"])
+    if "status" in changes and row["status"] != changes["status"]:
+      events.append(
+        {
+          "entity_type": "sample",
+          "entity_id": row["sample_id"],
+          "action": "status_change",
+          "performed_by": actor,
+          "details": f"status:{row['status'].value}->{changes['status'].value}",
+        }
+      )
+    detail_parts = [
+      f"{key}:{row[key] or ''}->{changes[key] or ''}"
+      for key in ("storage_location", "assigned_to")
+      if key in changes and (row[key] or "") != (changes[key] or "")
+    ]
+    if detail_parts:
+      events.append(
+        {
+          "entity_type": "sample",
+          "entity_id": row["sample_id"],
+          "action": "updated",
+          "performed_by": actor,
+          "details": ";".join(detail_parts),
+        }
+      )
+  log_audit_many(db, events)
+  db.commit()
+  return {"updated": len(rows)}
+
+
 @app.patch("/samples/{sample_id}")
-async def update_sample(sample_id: str, payload: dict, request: Request, db: Session = Depends(get_db)):
+def update_sample(sample_id: str, payload: dict, request: Request, db: Session = Depends(get_db)):
   row = db.get(SampleModel, sample_id)
   if not row:
     raise HTTPException(status_code=404, detail="Sample not found")
@@ -400,8 +738,8 @@ async def update_sample(sample_id: str, payload: dict, request: Request, db: Ses
   old_values = {
     "well_id": row.well_id,
     "horizon": row.horizon,
-    "sampling_date": row.sampling_date,
-    "arrival_date": row.arrival_date,
+    "sampling_date": row.sampling_date.isoformat(),
+    "arrival_date": row.arrival_date.isoformat(),
     "status": row.status.value,
     "storage_location": row.storage_location or "",
     "assigned_to": row.assigned_to or "",
@@ -412,17 +750,20 @@ async def update_sample(sample_id: str, payload: dict, request: Request, db: Ses
       setattr(row, key, SampleStatus(value))
     elif key == "assigned_to":
       setattr(row, key, value)
+    elif key == "sampling_date":
+      row.sampling_date = sampling_date_value
+    elif key == "arrival_date":
+      row.arrival_date = arrival_date_value
     elif hasattr(row, key):
       setattr(row, key, value)
   db.add(row)
-  db.commit()
-  db.refresh(row)
+  notify_change(db, "sample", "updated", sample_id)
   actor = request.headers.get("x-user")
   new_values = {
     "well_id": row.well_id,
     "horizon": row.horizon,
-    "sampling_date": row.sampling_date,
-    "arrival_date": row.arrival_date,
+    "sampling_date": row.sampling_date.isoformat(),
+    "arrival_date": row.arrival_date.isoformat(),
     "status": row.status.value,
     "storage_location": row.storage_location or "",
     "assigned_to": row.assigned_to or "",
@@ -451,28 +792,33 @@ async def update_sample(sample_id: str, payload: dict, request: Request, db: Ses
       performed_by=actor,
       details=";".join(detail_parts),
     )
+  db.commit()
+  db.refresh(row)
   return to_sample_out(row)
 
 
 @app.delete("/admin/samples")
-async def delete_samples(payload: SamplePurgeRequest, request: Request, db: Session = Depends(get_db)):
-  roles_header = (request.headers.get("x-roles") or "").lower()
-  role_header = (request.headers.get("x-role") or "").lower()
-  is_admin = "admin" in roles_header.split(",") or role_header == "admin"
-  if not is_admin:
+def delete_samples(payload: SamplePurgeRequest, request: Request, db: Session = Depends(get_db)):
+  if not is_admin_from_headers(request):
     raise HTTPException(status_code=403, detail="Admin only")
   sample_ids = [sid.strip() for sid in payload.sample_ids if sid.strip()]
   if not sample_ids:
     raise HTTPException(status_code=400, detail="Sample IDs required")
+  existing_ids = db.execute(select(SampleModel.sample_id).where(SampleModel.sample_id.in_(sample_ids))).scalars().all()
+  record_sample_tombstones(db, list(existing_ids))
+  for sid in existing_ids:
+    notify_change(db, "sample", "deleted", sid)
   deleted = (
     db.query(SampleModel)
     .filter(SampleModel.sample_id.in_(sample_ids))
     .delete(synchronize_session=False)
   )
-  db.commit()
   actor = request.headers.get("x-user")
-  for sid in sample_ids:
-    log_audit(db, entity_type="sample", entity_id=sid, action="delete", performed_by=actor)
+  log_audit_many(
+    db,
+    [{"entity_type": "sample", "entity_id": sid, "action": "delete", "performed_by": actor} for sid in sample_ids],
+  )
+  db.commit()
   return {"deleted": deleted}
 
 
@@ -481,8 +827,8 @@ def to_sample_out(row: SampleModel):
     sample_id=row.sample_id,
     well_id=row.well_id,
     horizon=row.horizon,
-    sampling_date=row.sampling_date,
-    arrival_date=row.arrival_date,
+    sampling_date=row.sampling_date.isoformat(),
+    arrival_date=row.arrival_date.isoformat(),
     status=row.status.value,
     storage_location=row.storage_location,
     assigned_to=row.assigned_to,
@@ -519,31 +865,52 @@ def normalize_method_key(name: str | None) -> str:
   return (name or "").strip().lower()
 
 
-def get_user_method_permissions(db: Session, user_id: int) -> list[str]:
-  rows = db.execute(
-    select(UserMethodPermissionModel.method_name).where(UserMethodPermissionModel.user_id == user_id)
-  ).all()
-  methods = [r[0] for r in rows if r and r[0]]
-  return normalize_methods(methods)
+def user_method_permissions(row: UserModel) -> list[str]:
+  return normalize_methods([permission.method_name for permission in row.method_permissions])
 
 
-def set_user_method_permissions(db: Session, user_id: int, methods: list[str]):
+def set_user_method_permissions(db: Session, user_id: int, methods: list[str]) -> list[str]:
+  """Replace a user's permissions and return the stored, normalized method names."""
+  normalized = normalize_methods(methods)
   db.execute(delete(UserMethodPermissionModel).where(UserMethodPermissionModel.user_id == user_id))
-  for method in normalize_methods(methods):
+  for method in normalized:
     db.add(UserMethodPermissionModel(user_id=user_id, method_name=method))
+  user_directory.invalidate(db)
+  return normalized
+
+def has_admin_session(request: Request) -> bool:
+  claims = get_session_claims(request)
+  return claims is not None and claims.has_role("admin")
 
 def is_admin_from_headers(request: Request) -> bool:
+  if request.headers.get("authorization"):
+    return has_admin_session(request)
+  if not ALLOW_ROLE_HEADERS:
+    return False
   roles_header = (request.headers.get("x-roles") or "").lower()
   role_header = (request.headers.get("x-role") or "").lower()
   return "admin" in roles_header.split(",") or role_header == "admin"
 
-def get_assignees(db: Session, analysis_id: int, fallback: str | None = None) -> list[str]:
-  rows = db.execute(
-    select(PlannedAnalysisAssigneeModel.assignee).where(
-      PlannedAnalysisAssigneeModel.analysis_id == analysis_id
-    )
-  ).all()
-  assignees = [r[0] for r in rows if r and r[0]]
+ASSIGNEE_LOAD_CHUNK_SIZE = 1000
+
+
+def load_assignees(db: Session, rows: list[PlannedAnalysisModel]) -> dict[int, list[str]]:
+  grouped: dict[int, list[str]] = {row.id: [] for row in rows}
+  ids = list(grouped)
+  for start in range(0, len(ids), ASSIGNEE_LOAD_CHUNK_SIZE):
+    chunk = ids[start : start + ASSIGNEE_LOAD_CHUNK_SIZE]
+    assignee_rows = db.execute(
+      select(PlannedAnalysisAssigneeModel.analysis_id, PlannedAnalysisAssigneeModel.assignee)
+      .where(PlannedAnalysisAssigneeModel.analysis_id.in_(chunk))
+      .order_by(PlannedAnalysisAssigneeModel.id)
+    ).all()
+    for analysis_id, assignee in assignee_rows:
+      if assignee:
+        grouped[analysis_id].append(assignee)
+  return {row.id: with_assignee_fallback(grouped[row.id], row.assigned_to) for row in rows}
+
+
+def with_assignee_fallback(assignees: list[str], fallback: str | None) -> list[str]:
   if assignees:
     return assignees
   if fallback and fallback.strip():
@@ -552,16 +919,17 @@ def get_assignees(db: Session, analysis_id: int, fallback: str | None = None) ->
 
 
 @app.get("/planned-analyses")
-async def list_planned_analyses(status: str | None = None, db: Session = Depends(get_db)):
+def list_planned_analyses(status: str | None = None, db: Session = Depends(get_db)):
   stmt = select(PlannedAnalysisModel)
   if status:
     stmt = stmt.where(PlannedAnalysisModel.status == AnalysisStatus(status))
   rows = db.execute(stmt).scalars().all()
-  return [to_planned_out(r, db) for r in rows]
+  assignees_by_id = load_assignees(db, rows)
+  return [to_planned_out(r, assignees_by_id[r.id]) for r in rows]
 
 
 @app.post("/planned-analyses", response_model=PlannedAnalysisOut, status_code=201)
-async def create_planned_analysis(payload: PlannedAnalysisCreate, request: Request, db: Session = Depends(get_db)):
+def create_planned_analysis(payload: PlannedAnalysisCreate, request: Request, db: Session = Depends(get_db)):
   default_allowed = {"SARA", "IR", "Mass Spectrometry", "Viscosity", "Electrophoresis"}
   is_admin = is_admin_from_headers(request)
   name = payload.analysis_type.strip()
@@ -571,31 +939,38 @@ async def create_planned_analysis(payload: PlannedAnalysisCreate, request: Reque
     raise HTTPException(status_code=403, detail="Only these analysis types are allowed: SARA, IR, Mass Spectrometry, Viscosity, Electrophoresis")
   assignees = normalize_assignees(payload.assigned_to)
   method_key = normalize_method_key(name)
+  assignee_users_by_key = user_directory.get_many(db, assignees)
   for assignee in assignees:
-    assignee_user = find_user_by_identity(db, assignee)
+    assignee_user = assignee_users_by_key.get(identity_key(assignee))
     if assignee_user is None:
       raise HTTPException(status_code=400, detail="Assignee user not found")
-    if not has_role(assignee_user, "lab_operator"):
+    if not assignee_user.has_role("lab_operator"):
       raise HTTPException(status_code=400, detail="Assignee must have lab operator role")
-    allowed_methods = {normalize_method_key(method_name) for method_name in get_user_method_permissions(db, assignee_user.id)}
-    if method_key not in allowed_methods:
+    if method_key not in assignee_user.method_keys:
       raise HTTPException(status_code=400, detail=f"{assignee_user.full_name} is not allowed for {name}")
+  already_planned = select(PlannedAnalysisModel.id).where(
+    PlannedAnalysisModel.sample_id == payload.sample_id, PlannedAnalysisModel.analysis_type == name
+  )
+  if db.execute(already_planned).first():
+    raise HTTPException(status_code=409, detail="Analysis already planned for this sample")
   row = PlannedAnalysisModel(
     sample_id=payload.sample_id,
     analysis_type=name,
-    assigned_to=None,
+    assigned_to=assignees[0] if assignees else None,
     status=AnalysisStatus.planned,
   )
   db.add(row)
-  db.commit()
-  db.refresh(row)
+  try:
+    db.flush()
+  except IntegrityError:
+    # A concurrent request inserted the same pair after the check above.
+    db.rollback()
+    if db.execute(already_planned).first():
+      raise HTTPException(status_code=409, detail="Analysis already planned for this sample")
+    raise
   for assignee in assignees:
     db.add(PlannedAnalysisAssigneeModel(analysis_id=row.id, assignee=assignee))
-  if assignees:
-    row.assigned_to = assignees[0]
-    db.add(row)
-  db.commit()
-  db.refresh(row)
+  notify_change(db, "planned_analysis", "created", row.id)
   actor = request.headers.get("x-user")
   log_audit(
     db,
@@ -605,53 +980,216 @@ async def create_planned_analysis(payload: PlannedAnalysisCreate, request: Reque
     performed_by=actor,
     details=f"sample={row.sample_id};method={row.analysis_type};assignees={','.join(assignees) if assignees else ''}",
   )
-  return to_planned_out(row, db)
+  db.commit()
+  db.refresh(row)
+  return to_planned_out(row, assignees)
 
 
-@app.patch("/planned-analyses/{analysis_id}", response_model=PlannedAnalysisOut)
-async def update_planned_analysis(analysis_id: int, payload: PlannedAnalysisUpdate, request: Request, db: Session = Depends(get_db)):
-  row = db.get(PlannedAnalysisModel, analysis_id)
-  if not row:
-    raise HTTPException(status_code=404, detail="Planned analysis not found")
-  old_status = row.status.value
-  prev_assignees = get_assignees(db, row.id, row.assigned_to)
-  if payload.status:
-    row.status = AnalysisStatus(payload.status)
-  if payload.assigned_to is not None:
+@app.post("/planned-analyses/ensure-defaults", response_model=list[PlannedAnalysisOut])
+def ensure_default_analyses(payload: PlannedAnalysisEnsureDefaults, request: Request, db: Session = Depends(get_db)):
+  methods = normalize_methods(payload.methods) if payload.methods is not None else list(DEFAULT_METHOD_PERMISSIONS)
+  if not is_admin_from_headers(request):
+    # Non-admins may only create default methods; others are skipped rather than failing the batch.
+    methods = [method for method in methods if method in DEFAULT_METHOD_PERMISSIONS]
+  requested_ids = list(dict.fromkeys(sid.strip() for sid in payload.sample_ids if sid.strip()))
+  if not requested_ids or not methods:
+    return []
+  sample_ids = set(
+    db.execute(select(SampleModel.sample_id).where(SampleModel.sample_id.in_(requested_ids))).scalars().all()
+  )
+  existing = set(
+    db.execute(
+      select(PlannedAnalysisModel.sample_id, PlannedAnalysisModel.analysis_type).where(
+        PlannedAnalysisModel.sample_id.in_(sample_ids),
+        PlannedAnalysisModel.analysis_type.in_(methods),
+      )
+    ).all()
+  )
+  missing = [
+    (sample_id, method)
+    for sample_id in requested_ids
+    if sample_id in sample_ids
+    for method in methods
+    if (sample_id, method) not in existing
+  ]
+  if not missing:
+    return []
+  revision = transaction_revision(db)
+  now_iso = datetime.now(timezone.utc).isoformat()
+  dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+  # A concurrent call may have inserted some of these pairs since the check above; skip those.
+  created = db.execute(
+    dialect_insert(PlannedAnalysisModel)
+    .on_conflict_do_nothing(index_elements=[PlannedAnalysisModel.sample_id, PlannedAnalysisModel.analysis_type])
+    .returning(PlannedAnalysisModel.id, PlannedAnalysisModel.sample_id, PlannedAnalysisModel.analysis_type),
+    [
+      {
+        "sample_id": sample_id,
+        "analysis_type": method,
+        "status": AnalysisStatus.planned,
+        "assigned_to": None,
+        "revision": revision,
+        "updated_at": now_iso,
+      }
+      for sample_id, method in missing
+    ],
+  ).all()
+  actor = request.headers.get("x-user")
+  log_audit_many(
+    db,
+    [
+      {
+        "entity_type": "planned_analysis",
+        "entity_id": str(analysis_id),
+        "action": "created",
+        "performed_by": actor,
+        "details": f"sample={sample_id};method={method};assignees=",
+      }
+      for analysis_id, sample_id, method in created
+    ],
+  )
+  for analysis_id, _, _ in created:
+    notify_change(db, "planned_analysis", "created", analysis_id)
+  db.commit()
+  return [
+    {"id": analysis_id, "sample_id": sample_id, "analysis_type": method, "status": AnalysisStatus.planned.value, "assigned_to": []}
+    for analysis_id, sample_id, method in created
+  ]
+
+
+def resolve_assignment_check(db: Session, request: Request, assignees: list[str]):
+  """Resolve the actor and assignees once; returns check(analysis_type, prev_assignees) raising HTTPException."""
+  claims = get_session_claims(request)
+  if claims is not None:
+    directory_users = user_directory.get_many(db, assignees)
+    actor_user = user_directory.get_by_id(db, claims.user_id)
+    is_admin = claims.has_role("admin")
+  elif ALLOW_ROLE_HEADERS and not request.headers.get("authorization"):
+    # Development only: the actor is whoever the x-user header names.
     actor_identity = (request.headers.get("x-user") or "").strip()
-    actor_user = find_user_by_identity(db, actor_identity)
-    is_admin = is_admin_from_headers(request) or (actor_user is not None and has_role(actor_user, "admin"))
-    assignees = normalize_assignees(payload.assigned_to)
-    method_key = normalize_method_key(row.analysis_type)
+    directory_users = user_directory.get_many(db, [actor_identity, *assignees])
+    actor_user = directory_users.get(identity_key(actor_identity))
+    is_admin = is_admin_from_headers(request) or (actor_user is not None and actor_user.has_role("admin"))
+  else:
+    directory_users = user_directory.get_many(db, assignees)
+    actor_user, is_admin = None, False
+  requested_assignees = [name.strip().lower() for name in assignees]
+  assignee_users = [directory_users.get(identity_key(assignee)) for assignee in assignees]
+
+  def check(analysis_type: str, prev_assignees: list[str]) -> None:
+    method_key = normalize_method_key(analysis_type)
     if not is_admin:
-      if actor_user is None or not has_role(actor_user, "lab_operator"):
+      if actor_user is None or not actor_user.has_role("lab_operator"):
         raise HTTPException(status_code=403, detail="Only lab operator can self-assign")
-      actor_names = {
-        (actor_user.username or "").strip().lower(),
-        (actor_user.full_name or "").strip().lower(),
-      }
-      existing_assignees = [name.strip().lower() for name in get_assignees(db, row.id, row.assigned_to)]
-      requested_assignees = [name.strip().lower() for name in assignees]
+      actor_names = actor_user.identity_keys
+      existing_assignees = [name.strip().lower() for name in prev_assignees]
       if not set(actor_names).intersection(requested_assignees):
         raise HTTPException(status_code=403, detail="Lab operator can assign only themselves")
       existing_non_actor = {name for name in existing_assignees if name and name not in actor_names}
       requested_non_actor = {name for name in requested_assignees if name and name not in actor_names}
       if existing_non_actor != requested_non_actor:
         raise HTTPException(status_code=403, detail="Lab operator can only add or remove self")
-      allowed_methods = {normalize_method_key(name) for name in get_user_method_permissions(db, actor_user.id)}
-      if method_key and method_key not in allowed_methods:
-        raise HTTPException(status_code=400, detail=f"{actor_user.full_name} is not allowed for {row.analysis_type}")
-    else:
-      assignee_users = [find_user_by_identity(db, assignee) for assignee in assignees]
-      if any(user is None for user in assignee_users):
-        raise HTTPException(status_code=400, detail="Assignee user not found")
-      assignee_users = [user for user in assignee_users if user is not None]
-      if any(not has_role(user, "lab_operator") for user in assignee_users):
-        raise HTTPException(status_code=400, detail="Assignee must have lab operator role")
-      for user in assignee_users:
-        allowed_methods = {normalize_method_key(name) for name in get_user_method_permissions(db, user.id)}
-        if method_key and method_key not in allowed_methods:
-          raise HTTPException(status_code=400, detail=f"{user.full_name} is not allowed for {row.analysis_type}")
+      if method_key and method_key not in actor_user.method_keys:
+        raise HTTPException(status_code=400, detail=f"{actor_user.full_name} is not allowed for {analysis_type}")
+      return
+    if any(user is None for user in assignee_users):
+      raise HTTPException(status_code=400, detail="Assignee user not found")
+    if any(not user.has_role("lab_operator") for user in assignee_users):
+      raise HTTPException(status_code=400, detail="Assignee must have lab operator role")
+    for user in assignee_users:
+      if method_key and method_key not in user.method_keys:
+        raise HTTPException(status_code=400, detail=f"{user.full_name} is not allowed for {analysis_type}")
+
+  return check
+
+
+def assignment_audit_events(row: PlannedAnalysisModel, prev_assignees: list[str], next_assignees: list[str], actor: str | None) -> list[dict]:
+  old_assignees_text = ",".join(prev_assignees)
+  new_assignees_text = ",".join(next_assignees)
+  changes = [("operator_assigned", name) for name in next_assignees if name not in prev_assignees]
+  changes += [("operator_unassigned", name) for name in prev_assignees if name not in next_assignees]
+  return [
+    {
+      "entity_type": "planned_analysis",
+      "entity_id": str(row.id),
+      "action": action,
+      "performed_by": actor,
+      "details": f"sample={row.sample_id};method={row.analysis_type};target={target};assignees:{old_assignees_text}->{new_assignees_text}",
+    }
+    for action, target in changes
+  ]
+
+
+@app.patch("/planned-analyses/bulk", response_model=list[PlannedAnalysisOut])
+def update_planned_analyses_bulk(payload: PlannedAnalysisBulkUpdate, request: Request, db: Session = Depends(get_db)):
+  ids = list(dict.fromkeys(payload.ids))
+  if payload.status is None and payload.assigned_to is None:
+    raise HTTPException(status_code=400, detail="Nothing to update")
+  rows = db.execute(select(PlannedAnalysisModel).where(PlannedAnalysisModel.id.in_(ids))).scalars().all()
+  missing = sorted(set(ids) - {row.id for row in rows})
+  if missing:
+    raise HTTPException(status_code=404, detail=f"Planned analyses not found: {', '.join(map(str, missing))}")
+  prev_by_id = load_assignees(db, rows)
+  old_status_by_id = {row.id: row.status.value for row in rows}
+  next_by_id = dict(prev_by_id)
+  values: dict = {"revision": transaction_revision(db), "updated_at": datetime.now(timezone.utc).isoformat()}
+  if payload.status:
+    values["status"] = AnalysisStatus(payload.status)
+  if payload.assigned_to is not None:
+    assignees = normalize_assignees(payload.assigned_to)
+    check_assignment = resolve_assignment_check(db, request, assignees)
+    for row in rows:
+      check_assignment(row.analysis_type, prev_by_id[row.id])
+      next_by_id[row.id] = assignees
+    values["assigned_to"] = assignees[0] if assignees else None
+    db.execute(delete(PlannedAnalysisAssigneeModel).where(PlannedAnalysisAssigneeModel.analysis_id.in_(ids)))
+    if assignees:
+      db.execute(
+        insert(PlannedAnalysisAssigneeModel),
+        [
+          {"analysis_id": row.id, "assignee": assignee, "revision": values["revision"], "updated_at": values["updated_at"]}
+          for row in rows
+          for assignee in assignees
+        ],
+      )
+  # Set-based write; the loaded rows are synchronized in Python so the response needs no reload.
+  db.execute(update(PlannedAnalysisModel).where(PlannedAnalysisModel.id.in_(ids)).values(**values))
+  actor = request.headers.get("x-user")
+  events: list[dict] = []
+  for row in rows:
+    notify_change(db, "planned_analysis", "updated", row.id)
+    if payload.status and old_status_by_id[row.id] != row.status.value:
+      events.append(
+        {
+          "entity_type": "planned_analysis",
+          "entity_id": str(row.id),
+          "action": "status_change",
+          "performed_by": actor,
+          "details": f"status:{old_status_by_id[row.id]}->{row.status.value}",
+        }
+      )
+    if payload.assigned_to is not None:
+      events.extend(assignment_audit_events(row, prev_by_id[row.id], next_by_id[row.id], actor))
+  log_audit_many(db, events)
+  updated = [to_planned_out(row, next_by_id[row.id]) for row in rows]
+  db.commit()
+  return updated
+
+
+@app.patch("/planned-analyses/{analysis_id}", response_model=PlannedAnalysisOut)
+def update_planned_analysis(analysis_id: int, payload: PlannedAnalysisUpdate, request: Request, db: Session = Depends(get_db)):
+  row = db.get(PlannedAnalysisModel, analysis_id)
+  if not row:
+    raise HTTPException(status_code=404, detail="Planned analysis not found")
+  old_status = row.status.value
+  prev_assignees = load_assignees(db, [row])[row.id]
+  next_assignees = prev_assignees
+  if payload.status:
+    row.status = AnalysisStatus(payload.status)
+  if payload.assigned_to is not None:
+    assignees = normalize_assignees(payload.assigned_to)
+    check_assignment = resolve_assignment_check(db, request, assignees)
+    check_assignment(row.analysis_type, prev_assignees)
     db.execute(
       delete(PlannedAnalysisAssigneeModel).where(
         PlannedAnalysisAssigneeModel.analysis_id == row.id
@@ -663,9 +1201,9 @@ async def update_planned_analysis(analysis_id: int, payload: PlannedAnalysisUpda
       row.assigned_to = assignees[0]
     else:
       row.assigned_to = None
+    next_assignees = assignees
   db.add(row)
-  db.commit()
-  db.refresh(row)
+  notify_change(db, "planned_analysis", "updated", analysis_id)
   if payload.status and old_status != row.status.value:
     actor = request.headers.get("x-user")
     log_audit(
@@ -677,42 +1215,158 @@ async def update_planned_analysis(analysis_id: int, payload: PlannedAnalysisUpda
       details=f"status:{old_status}->{row.status.value}",
     )
   if payload.assigned_to is not None:
-    actor = request.headers.get("x-user")
-    next_assignees = assignees
-    old_assignees_text = ",".join(prev_assignees)
-    new_assignees_text = ",".join(next_assignees)
-    added = [name for name in next_assignees if name not in prev_assignees]
-    removed = [name for name in prev_assignees if name not in next_assignees]
-    for target in added:
-      log_audit(
-        db,
-        entity_type="planned_analysis",
-        entity_id=str(analysis_id),
-        action="operator_assigned",
-        performed_by=actor,
-        details=f"sample={row.sample_id};method={row.analysis_type};target={target};assignees:{old_assignees_text}->{new_assignees_text}",
-      )
-    for target in removed:
-      log_audit(
-        db,
-        entity_type="planned_analysis",
-        entity_id=str(analysis_id),
-        action="operator_unassigned",
-        performed_by=actor,
-        details=f"sample={row.sample_id};method={row.analysis_type};target={target};assignees:{old_assignees_text}->{new_assignees_text}",
-      )
-  return to_planned_out(row, db)
+    log_audit_many(db, assignment_audit_events(row, prev_assignees, next_assignees, request.headers.get("x-user")))
+  db.commit()
+  db.refresh(row)
+  return to_planned_out(row, next_assignees)
+
+
+BOARD_SAMPLE_STATUSES_BY_ROLE = {
+  "warehouse_worker": ["new", "progress", "review", "done"],
+  "lab_operator": ["new", "progress", "review", "done"],
+  "action_supervision": ["new", "progress", "done"],
+  "admin": ["new", "progress", "review", "done"],
+}
+
+
+@app.get("/board")
+def get_board(
+  role: str | None = None,
+  status: list[str] | None = Query(default=None),
+  analysis_status: list[str] | None = Query(default=None),
+  analysis_type: list[str] | None = Query(default=None),
+  assignee: str | None = None,
+  db: Session = Depends(get_db),
+):
+  sample_statuses = set(status or [])
+  if role:
+    if role not in BOARD_SAMPLE_STATUSES_BY_ROLE:
+      raise HTTPException(status_code=400, detail="Unknown role")
+    role_statuses = set(BOARD_SAMPLE_STATUSES_BY_ROLE[role])
+    sample_statuses = sample_statuses & role_statuses if sample_statuses else role_statuses
+  try:
+    sample_status_values = [SampleStatus(value) for value in sorted(sample_statuses)]
+    analysis_status_values = [AnalysisStatus(value) for value in analysis_status or []]
+  except ValueError:
+    raise HTTPException(status_code=400, detail="Unknown status")
+
+  analysis_criteria = []
+  if analysis_status_values:
+    analysis_criteria.append(PlannedAnalysisModel.status.in_(analysis_status_values))
+  if analysis_type:
+    analysis_criteria.append(PlannedAnalysisModel.analysis_type.in_(analysis_type))
+  if assignee and assignee.strip():
+    assigned = select(PlannedAnalysisAssigneeModel.analysis_id).where(
+      PlannedAnalysisAssigneeModel.assignee == assignee.strip()
+    )
+    analysis_criteria.append(
+      or_(PlannedAnalysisModel.id.in_(assigned), PlannedAnalysisModel.assigned_to == assignee.strip())
+    )
+
+  analyses_option = SampleModel.analyses.and_(*analysis_criteria) if analysis_criteria else SampleModel.analyses
+  stmt = (
+    select(SampleModel)
+    .options(selectinload(analyses_option).selectinload(PlannedAnalysisModel.assignee_rows))
+    .order_by(SampleModel.sample_id)
+  )
+  if sample_status_values:
+    stmt = stmt.where(SampleModel.status.in_(sample_status_values))
+  if analysis_criteria:
+    stmt = stmt.where(
+      SampleModel.sample_id.in_(select(PlannedAnalysisModel.sample_id).where(*analysis_criteria))
+    )
+  samples = db.execute(stmt).scalars().all()
+  return [
+    {
+      **to_sample_out(sample).model_dump(),
+      "planned_analyses": [
+        to_planned_out(
+          analysis,
+          with_assignee_fallback([item.assignee for item in analysis.assignee_rows if item.assignee], analysis.assigned_to),
+        )
+        for analysis in sample.analyses
+      ],
+    }
+    for sample in samples
+  ]
+
+
+@app.get("/sync")
+def sync_board(since: int = 0, db: Session = Depends(get_db)):
+  revision = current_revision(db)
+  full = since <= 0
+  sample_stmt = select(SampleModel)
+  analysis_stmt = select(PlannedAnalysisModel)
+  deleted_samples: list[str] = []
+  deleted_analyses: list[str] = []
+  if not full:
+    sample_stmt = sample_stmt.where(SampleModel.revision > since)
+    changed_assignments = select(PlannedAnalysisAssigneeModel.analysis_id).where(
+      PlannedAnalysisAssigneeModel.revision > since
+    )
+    analysis_stmt = analysis_stmt.where(
+      or_(PlannedAnalysisModel.revision > since, PlannedAnalysisModel.id.in_(changed_assignments))
+    )
+    tombstones = db.execute(
+      select(SyncTombstoneModel.entity_type, SyncTombstoneModel.entity_id)
+      .where(SyncTombstoneModel.revision > since)
+      .order_by(SyncTombstoneModel.id)
+    ).all()
+    deleted_samples = [entity_id for entity_type, entity_id in tombstones if entity_type == "sample"]
+    deleted_analyses = [entity_id for entity_type, entity_id in tombstones if entity_type == "planned_analysis"]
+  samples = db.execute(sample_stmt).scalars().all()
+  analyses = db.execute(analysis_stmt).scalars().all()
+  assignees_by_id = load_assignees(db, analyses)
+  changed_sample_ids = {row.sample_id for row in samples}
+  changed_analysis_ids = {str(row.id) for row in analyses}
+  return {
+    "revision": revision,
+    "full": full,
+    "samples": [to_sample_out(row) for row in samples],
+    "planned_analyses": [to_planned_out(row, assignees_by_id[row.id]) for row in analyses],
+    "deleted_samples": [sample_id for sample_id in deleted_samples if sample_id not in changed_sample_ids],
+    "deleted_planned_analyses": [
+      analysis_id for analysis_id in deleted_analyses if analysis_id not in changed_analysis_ids
+    ],
+  }
+
+
+CHANGE_STREAM_KEEPALIVE_SECONDS = 15
+
+
+@app.get("/changes/stream")
+async def stream_changes(request: Request):
+  queue = broadcaster.subscribe()
+
+  async def event_source():
+    try:
+      yield "retry: 5000\n\n"
+      while not await request.is_disconnected():
+        try:
+          change = await asyncio.wait_for(queue.get(), timeout=CHANGE_STREAM_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+          yield ": keep-alive\n\n"
+          continue
+        yield format_sse(change)
+    finally:
+      broadcaster.unsubscribe(queue)
+
+  return StreamingResponse(
+    event_source(),
+    media_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+  )
 
 
 @app.get("/filter-methods", response_model=FilterMethodsOut)
-async def list_filter_methods(db: Session = Depends(get_db)):
+def list_filter_methods(db: Session = Depends(get_db)):
   rows = db.execute(select(FilterMethodModel.method_name).where(FilterMethodModel.visible == True)).all()
   methods = [r[0] for r in rows if r and r[0]]
   return {"methods": methods}
 
 
 @app.put("/filter-methods", response_model=FilterMethodsOut)
-async def update_filter_methods(payload: FilterMethodsUpdate, request: Request, db: Session = Depends(get_db)):
+def update_filter_methods(payload: FilterMethodsUpdate, request: Request, db: Session = Depends(get_db)):
   if not is_admin_from_headers(request):
     raise HTTPException(status_code=403, detail="Admin only")
   methods = normalize_methods(payload.methods)
@@ -723,18 +1377,18 @@ async def update_filter_methods(payload: FilterMethodsUpdate, request: Request,
   return {"methods": methods}
 
 
-def to_planned_out(row: PlannedAnalysisModel, db: Session):
+def to_planned_out(row: PlannedAnalysisModel, assignees: list[str]):
   return {
     "id": row.id,
     "sample_id": row.sample_id,
     "analysis_type": row.analysis_type,
     "status": row.status.value,
-    "assigned_to": get_assignees(db, row.id, row.assigned_to),
+    "assigned_to": assignees,
   }
 
 
 @app.post("/action-batches", response_model=ActionBatchOut, status_code=201)
-async def create_action_batch(payload: ActionBatchCreate, db: Session = Depends(get_db)):
+def create_action_batch(payload: ActionBatchCreate, db: Session = Depends(get_db)):
   row = ActionBatchModel(
     title=payload.title,
     date=payload.date,
@@ -747,31 +1401,33 @@ async def create_action_batch(payload: ActionBatchCreate, db: Session = Depends(
 
 
 @app.get("/action-batches", response_model=list[ActionBatchOut])
-async def list_action_batches(db: Session = Depends(get_db)):
+def list_action_batches(db: Session = Depends(get_db)):
   rows = db.execute(select(ActionBatchModel)).scalars().all()
   return [to_action_batch_out(r) for r in rows]
 
 
 @app.post("/conflicts", response_model=ConflictOut, status_code=201)
-async def create_conflict(payload: ConflictCreate, db: Session = Depends(get_db)):
+def create_conflict(payload: ConflictCreate, db: Session = Depends(get_db)):
   row = ConflictModel(
     old_payload=payload.old_payload,
     new_payload=payload.new_payload,
     status=ConflictStatus(payload.status),
   )
   db.add(row)
+  db.flush()
+  notify_change(db, "conflict", "created", row.id)
   db.commit()
   db.refresh(row)
   return to_conflict_out(row)
 
 @app.get("/conflicts", response_model=list[ConflictOut])
-async def list_conflicts(db: Session = Depends(get_db)):
+def list_conflicts(db: Session = Depends(get_db)):
   rows = db.execute(select(ConflictModel)).scalars().all()
   return [to_conflict_out(r) for r in rows]
 
 
 @app.patch("/conflicts/{conflict_id}", response_model=ConflictOut)
-async def update_conflict(conflict_id: int, payload: ConflictUpdate, request: Request, db: Session = Depends(get_db), authorization: str | None = None):
+def update_conflict(conflict_id: int, payload: ConflictUpdate, request: Request, db: Session = Depends(get_db), authorization: str | None = None):
   row = db.get(ConflictModel, conflict_id)
   if not row:
     raise HTTPException(status_code=404, detail="Conflict not found")
@@ -782,11 +1438,13 @@ async def update_conflict(conflict_id: int, payload: ConflictUpdate, request: Re
   if payload.resolution_note is not None:
     row.resolution_note = payload.resolution_note
   row.updated_at = datetime.now(timezone.utc).isoformat()
-  if authorization and authorization.lower().startswith("bearer "):
+  claims = get_session_claims(request)
+  if claims is not None:
+    row.updated_by = str(claims.user_id)
+  elif authorization and authorization.lower().startswith("bearer "):
     row.updated_by = authorization.split(" ", 1)[1]
   db.add(row)
-  db.commit()
-  db.refresh(row)
+  notify_change(db, "conflict", "updated", conflict_id)
   actor = request.headers.get("x-user") or row.updated_by
   if payload.status and old_status != row.status.value:
     log_audit(
@@ -806,6 +1464,8 @@ async def update_conflict(conflict_id: int, payload: ConflictUpdate, request: Re
       performed_by=actor,
       details=f"resolution_note:{old_resolution_note}->{row.resolution_note or ''}",
     )
+  db.commit()
+  db.refresh(row)
   return to_conflict_out(row)
 
 
@@ -825,13 +1485,14 @@ def to_conflict_out(row: ConflictModel):
   }
 
 @app.delete("/admin/purge-nondefault-analyses")
-async def purge_nondefault_analyses(request: Request, db: Session = Depends(get_db)):
+def purge_nondefault_analyses(request: Request, db: Session = Depends(get_db)):
   allowed = {"sara", "ir", "mass spectrometry", "viscosity"}
-  roles_header = (request.headers.get("x-roles") or "").lower()
-  role_header = (request.headers.get("x-role") or "").lower()
-  is_admin = "admin" in roles_header.split(",") or role_header == "admin"
-  if not is_admin:
+  if not is_admin_from_headers(request):
     raise HTTPException(status_code=403, detail="Admin only")
+  purged_ids = db.execute(
+    select(PlannedAnalysisModel.id).where(~PlannedAnalysisModel.analysis_type.in_(allowed))
+  ).scalars().all()
+  record_tombstones(db, "planned_analysis", [str(analysis_id) for analysis_id in purged_ids])
   deleted = (
     db.query(PlannedAnalysisModel)
     .filter(~PlannedAnalysisModel.analysis_type.in_(allowed))
@@ -841,19 +1502,6 @@ async def purge_nondefault_analyses(request: Request, db: Session = Depends(get_
   return {"deleted": deleted}
 
 
-def log_audit(db: Session, *, entity_type: str, entity_id: str, action: str, performed_by: str | None, details: str | None = None):
-  log_row = AuditLogModel(
-    entity_type=entity_type,
-    entity_id=entity_id,
-    action=action,
-    performed_by=performed_by,
-    performed_at=datetime.now(timezone.utc).isoformat(),
-    details=details,
-  )
-  db.add(log_row)
-  db.commit()
-
-
 def parse_roles(role_str: str | None) -> list[str]:
   if not role_str:
     return []
@@ -871,92 +1519,290 @@ def has_role(user: UserModel, role_name: str) -> bool:
   return role_name.strip().lower() in normalized
 
 
-def find_user_by_identity(db: Session, identity: str | None) -> UserModel | None:
-  value = (identity or "").strip().lower()
-  if not value:
+def encode_cursor(values: list) -> str:
+  raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+  return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+  try:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+  except Exception:
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+  if not isinstance(values, list) or len(values) != size:
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+  return values
+
+
+def build_audit_filters(
+  *,
+  entity_type: str | None = None,
+  action: str | None = None,
+  actor: str | None = None,
+  entity_id: str | None = None,
+  q: str | None = None,
+  since: datetime | None = None,
+  until: datetime | None = None,
+  dialect_name: str = "",
+) -> list:
+  conditions = []
+  if since is not None:
+    conditions.append(AuditLogModel.performed_at >= as_utc(since))
+  if until is not None:
+    conditions.append(AuditLogModel.performed_at < as_utc(until))
+  if entity_type:
+    conditions.append(AuditLogModel.entity_type == entity_type)
+  if action:
+    conditions.append(AuditLogModel.action == action)
+  # Case-insensitive prefix matches, served by the lower(...) indexes on audit_log.
+  if actor and actor.strip():
+    conditions.append(func.lower(AuditLogModel.performed_by).startswith(actor.strip().lower(), autoescape=True))
+  if entity_id and entity_id.strip():
+    conditions.append(func.lower(AuditLogModel.entity_id).startswith(entity_id.strip().lower(), autoescape=True))
+  if q and q.strip():
+    conditions.append(audit_search_clause(q, dialect_name))
+  return conditions
+
+
+def to_audit_event_out(row: AuditLogModel) -> AuditEventOut:
+  return AuditEventOut(
+    id=row.id,
+    entity_type=row.entity_type,
+    entity_id=row.entity_id,
+    action=row.action,
+    performed_by=row.performed_by,
+    performed_at=as_utc(row.performed_at).isoformat(),
+    details=row.details,
+  )
+
+
+AUDIT_ARCHIVED_RANGES_LIMIT = 24
+
+
+def archived_ranges_header(db: Session, since: datetime | None, until: datetime | None) -> str | None:
+  """Newest archived months overlapping the window, as start/end pairs; those rows are not in the results."""
+  archived = archived_ranges(
+    db, as_utc(since) if since else None, as_utc(until) if until else None, limit=AUDIT_ARCHIVED_RANGES_LIMIT
+  )
+  if not archived:
     return None
-  rows = db.execute(select(UserModel)).scalars().all()
-  for user in rows:
-    if (user.username or "").strip().lower() == value:
-      return user
-    if (user.full_name or "").strip().lower() == value:
-      return user
-  return None
+  return ",".join(f"{start.isoformat()}/{end.isoformat()}" for start, end in archived)
 
 
 @app.get("/admin/events", response_model=list[AuditEventOut])
-async def list_admin_events(
+def list_admin_events(
   request: Request,
+  response: Response,
   db: Session = Depends(get_db),
   entity_type: str | None = None,
   action: str | None = None,
   actor: str | None = None,
   entity_id: str | None = None,
   q: str | None = None,
+  since: datetime | None = None,
+  until: datetime | None = None,
   sort: str = "desc",
   limit: int = 200,
+  cursor: str | None = None,
 ):
   if not is_admin_from_headers(request):
     raise HTTPException(status_code=403, detail="Admin only")
-  rows = db.execute(select(AuditLogModel)).scalars().all()
-  events = [
-    AuditEventOut(
-      id=row.id,
-      entity_type=row.entity_type,
-      entity_id=row.entity_id,
-      action=row.action,
-      performed_by=row.performed_by,
-      performed_at=row.performed_at,
-      details=row.details,
+  page_size = max(1, min(limit, 1000))
+  descending = sort != "asc"
+  stmt = select(AuditLogModel).where(
+    *build_audit_filters(
+      entity_type=entity_type,
+      action=action,
+      actor=actor,
+      entity_id=entity_id,
+      q=q,
+      since=since,
+      until=until,
+      dialect_name=db.get_bind().dialect.name,
     )
-    for row in rows
-  ]
-  if entity_type:
-    events = [e for e in events if e.entity_type == entity_type]
-  if action:
-    events = [e for e in events if e.action == action]
-  if actor:
-    key = actor.strip().lower()
-    events = [e for e in events if (e.performed_by or "").strip().lower().find(key) >= 0]
-  if entity_id:
-    key = entity_id.strip()
-    events = [e for e in events if key in e.entity_id]
-  if q:
-    key = q.strip().lower()
-    events = [
-      e
-      for e in events
-      if key in e.entity_type.lower()
-      or key in e.action.lower()
-      or key in (e.entity_id or "").lower()
-      or key in (e.performed_by or "").lower()
-      or key in (e.details or "").lower()
-    ]
-  reverse = sort != "asc"
-  events = sorted(events, key=lambda e: e.performed_at or "", reverse=reverse)
-  return events[: max(1, min(limit, 1000))]
+  )
+  window_start, window_end = since, until
+  if cursor:
+    after_at_text, after_id = decode_cursor(cursor, 2)
+    try:
+      after_at = as_utc(datetime.fromisoformat(after_at_text))
+    except (TypeError, ValueError):
+      raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(after_id, int) or isinstance(after_id, bool):
+      raise HTTPException(status_code=400, detail="Invalid cursor")
+    if descending:
+      window_end = after_at
+    else:
+      window_start = after_at
+    if descending:
+      stmt = stmt.where(
+        or_(
+          AuditLogModel.performed_at < after_at,
+          and_(AuditLogModel.performed_at == after_at, AuditLogModel.id < after_id),
+        )
+      )
+    else:
+      stmt = stmt.where(
+        or_(
+          AuditLogModel.performed_at > after_at,
+          and_(AuditLogModel.performed_at == after_at, AuditLogModel.id > after_id),
+        )
+      )
+  if descending:
+    stmt = stmt.order_by(AuditLogModel.performed_at.desc(), AuditLogModel.id.desc())
+  else:
+    stmt = stmt.order_by(AuditLogModel.performed_at.asc(), AuditLogModel.id.asc())
+  rows = db.execute(stmt.limit(page_size + 1)).scalars().all()
+  if len(rows) > page_size:
+    rows = rows[:page_size]
+    response.headers["X-Next-Cursor"] = encode_cursor([as_utc(rows[-1].performed_at).isoformat(), rows[-1].id])
+    # Until the last page, only gaps between this page's rows concern the caller.
+    if descending:
+      window_start = rows[-1].performed_at
+    else:
+      window_end = rows[-1].performed_at
+  archived = archived_ranges_header(db, window_start, window_end)
+  if archived:
+    response.headers["X-Audit-Archived-Ranges"] = archived
+  return [to_audit_event_out(row) for row in rows]
+
+
+AUDIT_EXPORT_BATCH_SIZE = 2000
+AUDIT_EXPORT_COLUMNS = ["id", "entity_type", "entity_id", "action", "performed_by", "performed_at", "details"]
+
+
+def stream_audit_export(filters: list, descending: bool, export_format: str):
+  # The request's session is closed once the route returns, so the stream owns its own.
+  db = SessionLocal()
+  try:
+    order = (AuditLogModel.performed_at.desc(), AuditLogModel.id.desc()) if descending else (AuditLogModel.performed_at.asc(), AuditLogModel.id.asc())
+    rows = db.execute(
+      select(AuditLogModel).where(*filters).order_by(*order).execution_options(yield_per=AUDIT_EXPORT_BATCH_SIZE)
+    ).scalars()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+      writer.writerow(AUDIT_EXPORT_COLUMNS)
+      yield buffer.getvalue()
+    for partition in rows.partitions():
+      buffer.seek(0)
+      buffer.truncate()
+      for row in partition:
+        event = to_audit_event_out(row)
+        if export_format == "csv":
+          writer.writerow([getattr(event, column) for column in AUDIT_EXPORT_COLUMNS])
+        else:
+          buffer.write(event.model_dump_json())
+          buffer.write("\n")
+      yield buffer.getvalue()
+  finally:
+    db.close()
+
+
+@app.get("/admin/events/export")
+def export_admin_events(
+  request: Request,
+  db: Session = Depends(get_db),
+  entity_type: str | None = None,
+  action: str | None = None,
+  actor: str | None = None,
+  entity_id: str | None = None,
+  q: str | None = None,
+  since: datetime | None = None,
+  until: datetime | None = None,
+  sort: str = "asc",
+  format: str = "csv",
+):
+  if not is_admin_from_headers(request):
+    raise HTTPException(status_code=403, detail="Admin only")
+  if format not in {"csv", "ndjson"}:
+    raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+  filters = build_audit_filters(
+    entity_type=entity_type,
+    action=action,
+    actor=actor,
+    entity_id=entity_id,
+    q=q,
+    since=since,
+    until=until,
+    dialect_name=db.get_bind().dialect.name,
+  )
+  headers = {"Content-Disposition": f'attachment; filename="audit-events.{format}"'}
+  archived = archived_ranges_header(db, since, until)
+  if archived:
+    headers["X-Audit-Archived-Ranges"] = archived
+  return StreamingResponse(
+    stream_audit_export(filters, sort == "desc", format),
+    media_type="text/csv" if format == "csv" else "application/x-ndjson",
+    headers=headers,
+  )
+
+
+@app.get("/admin/metrics")
+def admin_metrics(request: Request):
+  if not is_admin_from_headers(request):
+    raise HTTPException(status_code=403, detail="Admin only")
+  return {"password_hasher": password_hasher.metrics(), "db_pool": pool_status()}
+
+
+def to_user_out(row: UserModel, method_permissions: list[str] | None = None) -> UserOut:
+  roles = parse_roles(row.roles) or [row.role]
+  return UserOut(
+    id=row.id,
+    username=row.username,
+    full_name=row.full_name,
+    email=row.email,
+    role=roles[0],
+    roles=roles,
+    method_permissions=user_method_permissions(row) if method_permissions is None else method_permissions,
+  )
 
 
 @app.get("/admin/users", response_model=list[UserOut])
-async def list_users(request: Request, db: Session = Depends(get_db)):
+def list_users(
+  request: Request,
+  response: Response,
+  q: str | None = None,
+  role: str | None = None,
+  limit: int | None = None,
+  cursor: str | None = None,
+  db: Session = Depends(get_db),
+):
   if not is_admin_from_headers(request):
     raise HTTPException(status_code=403, detail="Admin only")
-  rows = db.execute(select(UserModel)).scalars().all()
-  return [
-    UserOut(
-      id=r.id,
-      username=r.username,
-      full_name=r.full_name,
-      email=r.email,
-      role=parse_roles(r.roles)[0] if parse_roles(r.roles) else r.role,
-      roles=parse_roles(r.roles) or [r.role],
-      method_permissions=get_user_method_permissions(db, r.id),
+  stmt = select(UserModel).options(selectinload(UserModel.method_permissions))
+  if q and q.strip():
+    key = q.strip().lower()
+    stmt = stmt.where(
+      or_(
+        UserModel.username_key.contains(key, autoescape=True),
+        UserModel.full_name_key.contains(key, autoescape=True),
+        func.lower(UserModel.email).contains(key, autoescape=True),
+        func.lower(UserModel.roles).contains(key, autoescape=True),
+      )
     )
-    for r in rows
-  ]
+  if role and role.strip():
+    # roles is a comma-separated list; pad it so a role matches whole entries only.
+    padded_roles = func.lower("," + UserModel.roles + ",")
+    stmt = stmt.where(padded_roles.contains(f",{role.strip().lower()},", autoescape=True))
+  if cursor:
+    (after_id,) = decode_cursor(cursor, 1)
+    if not isinstance(after_id, int):
+      raise HTTPException(status_code=400, detail="Invalid cursor")
+    stmt = stmt.where(UserModel.id > after_id)
+  stmt = stmt.order_by(UserModel.id)
+  page_size = max(1, min(limit, 1000)) if limit is not None else None
+  if page_size is not None:
+    stmt = stmt.limit(page_size + 1)
+  rows = db.execute(stmt).scalars().all()
+  if page_size is not None and len(rows) > page_size:
+    rows = rows[:page_size]
+    response.headers["X-Next-Cursor"] = encode_cursor([rows[-1].id])
+  return [to_user_out(row) for row in rows]
 
 @app.post("/admin/users", response_model=UserCreateOut, status_code=201)
-async def create_user(payload: UserCreate, request: Request, db: Session = Depends(get_db)):
+def create_user(payload: UserCreate, request: Request, db: Session = Depends(get_db)):
   if not is_admin_from_headers(request):
     raise HTTPException(status_code=403, detail="Admin only")
   username = payload.username.strip()
@@ -978,20 +1824,18 @@ async def create_user(payload: UserCreate, request: Request, db: Session = Depen
     username=username,
     full_name=full_name,
     email=email,
-    password_hash=hash_password(DEFAULT_PASSWORD),
+    password_hash=password_hasher.hash(DEFAULT_PASSWORD),
     must_change_password=True,
     is_active=True,
     role=primary,
     roles=serialize_roles(roles),
   )
   db.add(row)
-  db.commit()
-  db.refresh(row)
+  db.flush()
   method_permissions = normalize_methods(payload.method_permissions) if payload.method_permissions is not None else []
   if has_role(row, "lab_operator"):
     method_permissions = method_permissions or DEFAULT_METHOD_PERMISSIONS
-  set_user_method_permissions(db, row.id, method_permissions)
-  db.commit()
+  method_permissions = set_user_method_permissions(db, row.id, method_permissions)
   actor = request.headers.get("x-user")
   log_audit(
     db,
@@ -999,22 +1843,16 @@ async def create_user(payload: UserCreate, request: Request, db: Session = Depen
     entity_id=str(row.id),
     action="created",
     performed_by=actor,
-    details=f"username={row.username};roles={row.roles};methods={','.join(get_user_method_permissions(db, row.id))}",
-  )
-  return UserCreateOut(
-    id=row.id,
-    username=row.username,
-    full_name=row.full_name,
-    email=row.email,
-    role=row.role,
-    roles=parse_roles(row.roles) or [row.role],
-    method_permissions=get_user_method_permissions(db, row.id),
-    default_password=DEFAULT_PASSWORD,
+    details=f"username={row.username};roles={row.roles};methods={','.join(method_permissions)}",
   )
+  # Built before commit so the response needs no reload of the row or its permissions.
+  out = to_user_out(row, method_permissions)
+  db.commit()
+  return UserCreateOut(**out.model_dump(), default_password=DEFAULT_PASSWORD)
 
 
 @app.patch("/admin/users/{user_id}", response_model=UserOut)
-async def update_user(user_id: int, payload: UserUpdate, request: Request, db: Session = Depends(get_db)):
+def update_user(user_id: int, payload: UserUpdate, request: Request, db: Session = Depends(get_db)):
   if not is_admin_from_headers(request):
     raise HTTPException(status_code=403, detail="Admin only")
   row = db.get(UserModel, user_id)
@@ -1024,7 +1862,7 @@ async def update_user(user_id: int, payload: UserUpdate, request: Request, db: S
   old_full_name = row.full_name
   old_email = row.email or ""
   old_roles = parse_roles(row.roles) or [row.role]
-  old_methods = get_user_method_permissions(db, row.id)
+  old_methods = user_method_permissions(row)
   if payload.username is not None:
     next_username = payload.username.strip()
     if not next_username:
@@ -1047,18 +1885,21 @@ async def update_user(user_id: int, payload: UserUpdate, request: Request, db: S
   primary = roles[0] if roles else row.role
   row.role = primary
   row.roles = serialize_roles(roles)
+  new_methods = old_methods
   if payload.method_permissions is not None:
     if not has_role(row, "lab_operator"):
       raise HTTPException(status_code=400, detail="Method permissions are only for lab operators")
-    set_user_method_permissions(db, row.id, payload.method_permissions)
+    new_methods = set_user_method_permissions(db, row.id, payload.method_permissions)
   elif not has_role(row, "lab_operator"):
-    set_user_method_permissions(db, row.id, [])
+    new_methods = set_user_method_permissions(db, row.id, [])
+  if (parse_roles(row.roles) or [row.role]) != old_roles:
+    # Tokens carry roles, so sessions issued with the old ones must not be trusted.
+    session_revocations.revoke(db, row.id)
   db.add(row)
-  db.commit()
-  db.refresh(row)
+  user_directory.invalidate(db)
+  db.flush()
   actor = request.headers.get("x-user")
   new_roles = parse_roles(row.roles) or [row.role]
-  new_methods = get_user_method_permissions(db, row.id)
   detail_parts: list[str] = []
   if old_username != row.username:
     detail_parts.append(f"username:{old_username}->{row.username}")
@@ -1080,19 +1921,13 @@ async def update_user(user_id: int, payload: UserUpdate, request: Request, db: S
     performed_by=actor,
     details=";".join(detail_parts),
   )
-  return UserOut(
-    id=row.id,
-    username=row.username,
-    full_name=row.full_name,
-    email=row.email,
-    role=row.role,
-    roles=new_roles,
-    method_permissions=new_methods,
-  )
+  out = to_user_out(row, new_methods)
+  db.commit()
+  return out
 
 
 @app.delete("/admin/users/{user_id}")
-async def delete_user(user_id: int, request: Request, db: Session = Depends(get_db)):
+def delete_user(user_id: int, request: Request, db: Session = Depends(get_db)):
   if not is_admin_from_headers(request):
     raise HTTPException(status_code=403, detail="Admin only")
   row = db.get(UserModel, user_id)
@@ -1101,6 +1936,8 @@ async def delete_user(user_id: int, request: Request, db: Session = Depends(get_
   actor = request.headers.get("x-user")
   details = f"username={row.username};roles={row.roles}"
   db.delete(row)
-  db.commit()
+  session_revocations.revoke(db, user_id)
+  user_directory.invalidate(db)
   log_audit(db, entity_type="user", entity_id=str(user_id), action="deleted", performed_by=actor, details=details)
+  db.commit()
   return {"deleted": True}
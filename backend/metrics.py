@@ -0,0 +1,107 @@
+"""Prometheus metrics for requests, SQL, audit writes and password hashing.
+
+GET /metrics renders everything below. Single-process servers use the default
+registry. With several uvicorn/gunicorn workers, point PROMETHEUS_MULTIPROC_DIR
+at an empty directory, the same for all workers and wiped on every deploy, so
+the workers write their samples to shared files that /metrics aggregates.
+Under gunicorn also add a child_exit hook so gauges of dead workers are dropped:
+
+    def child_exit(server, worker):
+        from backend.metrics import mark_process_dead
+        mark_process_dead(worker.pid)
+"""
+
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from starlette.routing import Match
+from starlette.types import Scope
+
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+UNMATCHED_ROUTE = "<unmatched>"
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+REQUEST_LATENCY = Histogram(
+    "labsync_http_request_duration_seconds",
+    "Time from request start to the end of the response body.",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUESTS = Counter("labsync_http_requests_total", "Completed requests.", ["method", "route", "status"])
+REQUEST_ERRORS = Counter(
+    "labsync_http_request_errors_total",
+    "Requests answered with a 5xx status or aborted by an unhandled exception.",
+    ["method", "route"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "labsync_http_requests_in_progress",
+    "Requests currently being served.",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+REQUEST_STATEMENTS = Histogram(
+    "labsync_http_request_sql_statements",
+    "SQL statements issued per request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+SQL_DURATION = Histogram(
+    "labsync_sql_statement_duration_seconds",
+    "Execution time of single SQL statements.",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+DB_POOL_WAIT = Histogram(
+    "labsync_db_pool_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 30),
+)
+DB_POOL_TIMEOUTS = Counter("labsync_db_pool_timeouts_total", "Checkouts that gave up waiting for a connection.")
+AUDIT_EVENTS_WRITTEN = Counter("labsync_audit_events_written_total", "Audit events written to audit_log.")
+PASSWORD_HASH_DURATION = Histogram(
+    "labsync_password_hash_duration_seconds",
+    "scrypt run time per hash or verify call, excluding queueing.",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PASSWORD_HASH_WAIT = Histogram(
+    "labsync_password_hash_wait_seconds",
+    "Time a hash or verify call waited for a hashing slot.",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "labsync_password_hash_rejected_total", "Hash or verify calls rejected because the queue stayed full."
+)
+
+
+def statement_operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in SQL_OPERATIONS else "OTHER"
+
+
+def route_template(scope: Scope) -> str:
+    """The path template of the route serving scope, so ids never become label values."""
+    app = scope.get("app")
+    partial = None
+    for route in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or UNMATCHED_ROUTE
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
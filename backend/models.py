@@ -1,5 +1,6 @@
-from sqlalchemy import Boolean, Enum, ForeignKey, Integer, String, UniqueConstraint
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Enum, ForeignKey, Index, Integer, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
+from datetime import date, datetime
 import enum
 
 try:
@@ -17,15 +18,30 @@ class SampleStatus(enum.Enum):
 
 class SampleModel(Base):
     __tablename__ = "samples"
+    __table_args__ = (
+        Index("ix_samples_status", "status"),
+        Index("ix_samples_well_id", "well_id"),
+        Index("ix_samples_horizon", "horizon"),
+        # The sample_id suffix also serves keyset pagination ordered by date.
+        Index("ix_samples_arrival_date", "arrival_date", "sample_id"),
+        Index("ix_samples_sampling_date", "sampling_date", "sample_id"),
+    )
 
     sample_id: Mapped[str] = mapped_column(String, primary_key=True)
     well_id: Mapped[str] = mapped_column(String, nullable=False)
     horizon: Mapped[str] = mapped_column(String, nullable=False)
-    sampling_date: Mapped[str] = mapped_column(String, nullable=False)
-    arrival_date: Mapped[str] = mapped_column(String, nullable=False)
+    sampling_date: Mapped[date] = mapped_column(Date, nullable=False)
+    arrival_date: Mapped[date] = mapped_column(Date, nullable=False)
     status: Mapped[SampleStatus] = mapped_column(Enum(SampleStatus), default=SampleStatus.new, nullable=False)
     storage_location: Mapped[str | None] = mapped_column(String, nullable=True)
     assigned_to: Mapped[str | None] = mapped_column(String, nullable=True)
+    updated_at: Mapped[str | None] = mapped_column(String, nullable=True)
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
+
+    # Read-only: writes still go through explicit rows; used for eager board hydration.
+    analyses: Mapped[list["PlannedAnalysisModel"]] = relationship(
+        viewonly=True, order_by="PlannedAnalysisModel.id"
+    )
 
 
 class AnalysisStatus(enum.Enum):
@@ -38,12 +54,19 @@ class AnalysisStatus(enum.Enum):
 
 class PlannedAnalysisModel(Base):
     __tablename__ = "planned_analyses"
+    __table_args__ = (UniqueConstraint("sample_id", "analysis_type", name="uq_planned_analysis_sample_method"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     sample_id: Mapped[str] = mapped_column(String, ForeignKey("samples.sample_id", ondelete="CASCADE"), nullable=False)
     analysis_type: Mapped[str] = mapped_column(String, nullable=False)
     status: Mapped[AnalysisStatus] = mapped_column(Enum(AnalysisStatus), default=AnalysisStatus.planned, nullable=False)
     assigned_to: Mapped[str | None] = mapped_column(String, nullable=True)
+    updated_at: Mapped[str | None] = mapped_column(String, nullable=True)
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
+
+    assignee_rows: Mapped[list["PlannedAnalysisAssigneeModel"]] = relationship(
+        viewonly=True, order_by="PlannedAnalysisAssigneeModel.id"
+    )
 
 
 class PlannedAnalysisAssigneeModel(Base):
@@ -53,6 +76,18 @@ class PlannedAnalysisAssigneeModel(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     analysis_id: Mapped[int] = mapped_column(Integer, ForeignKey("planned_analyses.id", ondelete="CASCADE"), nullable=False)
     assignee: Mapped[str] = mapped_column(String, nullable=False)
+    updated_at: Mapped[str | None] = mapped_column(String, nullable=True)
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
+
+
+class SyncTombstoneModel(Base):
+    __tablename__ = "sync_tombstones"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    entity_type: Mapped[str] = mapped_column(String, nullable=False)
+    entity_id: Mapped[str] = mapped_column(String, nullable=False)
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    deleted_at: Mapped[str] = mapped_column(String, nullable=False)
 
 
 class ActionBatchStatus(enum.Enum):
@@ -87,12 +122,18 @@ class ConflictModel(Base):
     updated_at: Mapped[str | None] = mapped_column(String, nullable=True)
 
 
+def identity_key(value: str | None) -> str:
+    return (value or "").strip().lower()
+
+
 class UserModel(Base):
     __tablename__ = "users"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     username: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     full_name: Mapped[str] = mapped_column(String, nullable=False)
+    username_key: Mapped[str] = mapped_column(String, nullable=False, default="", index=True)
+    full_name_key: Mapped[str] = mapped_column(String, nullable=False, default="", index=True)
     email: Mapped[str | None] = mapped_column(String, nullable=True)
     password_hash: Mapped[str] = mapped_column(String, nullable=False, default="")
     must_change_password: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
@@ -101,6 +142,16 @@ class UserModel(Base):
     role: Mapped[str] = mapped_column(String, nullable=False, default="lab_operator")
     roles: Mapped[str] = mapped_column(String, nullable=False, default="lab_operator")
 
+    # Read-only: permissions are replaced through explicit rows; used for eager user listings.
+    method_permissions: Mapped[list["UserMethodPermissionModel"]] = relationship(
+        viewonly=True, order_by="UserMethodPermissionModel.id"
+    )
+
+    @validates("username", "full_name")
+    def _sync_identity_keys(self, key: str, value: str) -> str:
+        setattr(self, f"{key}_key", identity_key(value))
+        return value
+
 
 class UserMethodPermissionModel(Base):
     __tablename__ = "user_method_permissions"
@@ -120,16 +171,56 @@ class FilterMethodModel(Base):
 
 class AuditLogModel(Base):
     __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_performed_at", "performed_at"),
+        Index("ix_audit_log_entity_performed_at", "entity_type", "entity_id", "performed_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     entity_type: Mapped[str] = mapped_column(String, nullable=False)
     entity_id: Mapped[str] = mapped_column(String, nullable=False)
     action: Mapped[str] = mapped_column(String, nullable=False)
     performed_by: Mapped[str | None] = mapped_column(String, nullable=True)
-    performed_at: Mapped[str] = mapped_column(String, nullable=False)
+    performed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     details: Mapped[str | None] = mapped_column(String, nullable=True)
 
 
+# actor / entity_id filters are case-insensitive prefix matches on lower(column);
+# text_pattern_ops lets Postgres serve LIKE 'key%' from the index under any collation.
+Index(
+    "ix_audit_log_performed_by_lower",
+    func.lower(AuditLogModel.performed_by).label("performed_by_lower"),
+    AuditLogModel.performed_at,
+    postgresql_ops={"performed_by_lower": "text_pattern_ops"},
+)
+Index(
+    "ix_audit_log_entity_id_lower",
+    func.lower(AuditLogModel.entity_id).label("entity_id_lower"),
+    postgresql_ops={"entity_id_lower": "text_pattern_ops"},
+)
+
+
+class AuditArchiveModel(Base):
+    """A range of audit_log rows moved out of the database into an archive file."""
+
+    __tablename__ = "audit_archives"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    range_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    range_end: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    location: Mapped[str] = mapped_column(String, nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    sha256: Mapped[str | None] = mapped_column(String, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class VersionCounterModel(Base):
+    __tablename__ = "version_counters"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
 class PasswordResetTokenModel(Base):
     __tablename__ = "password_reset_tokens"
 
@@ -139,3 +230,12 @@ class PasswordResetTokenModel(Base):
     requested_at: Mapped[str] = mapped_column(String, nullable=False)
     expires_at: Mapped[str] = mapped_column(String, nullable=False)
     used_at: Mapped[str | None] = mapped_column(String, nullable=True)
+
+
+class SessionRevocationModel(Base):
+    """Session tokens issued to user_id before revoked_at (epoch ms) are rejected."""
+
+    __tablename__ = "session_revocations"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    revoked_at: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+
+from sqlalchemy import create_engine, event, pool, text
+from sqlalchemy.orm import Session
+
+try:
+    from .database import DATABASE_URL, DB_PGBOUNCER, SessionLocal
+except ImportError:  # pragma: no cover
+    from database import DATABASE_URL, DB_PGBOUNCER, SessionLocal  # type: ignore
+
+
+logger = logging.getLogger(__name__)
+
+CHANGE_CHANNEL = "labsync_changes"
+REALTIME_BRIDGE = (os.getenv("REALTIME_BRIDGE") or "auto").strip().lower()
+REALTIME_DATABASE_URL = os.getenv("REALTIME_DATABASE_URL", DATABASE_URL)
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("REALTIME_SUBSCRIBER_QUEUE_SIZE", "256"))
+
+
+class ChangeBroadcaster:
+    """Fans change events out to SSE subscribers.
+
+    publish() is thread-safe: routes run in the threadpool and the Postgres
+    listener runs in its own thread, while subscribers live on the event loop.
+    """
+
+    def __init__(self, *, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, change: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, change)
+            except RuntimeError:  # loop already closed
+                self.unsubscribe(queue)
+
+
+def _offer(queue: asyncio.Queue, change: dict) -> None:
+    # Slow consumers lose the oldest events; clients re-sync through /sync anyway.
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(change)
+
+
+class LocalChangeBus:
+    """In-process bus: events queued on a session are published after it commits."""
+
+    def __init__(self, broadcaster: ChangeBroadcaster):
+        self.broadcaster = broadcaster
+
+    def notify(self, db: Session, change: dict) -> None:
+        db.info.setdefault("pending_changes", []).append(change)
+
+    def flush(self, db: Session) -> None:
+        for change in db.info.pop("pending_changes", []):
+            self.broadcaster.publish(change)
+
+    def discard(self, db: Session) -> None:
+        db.info.pop("pending_changes", None)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class PostgresChangeBus(LocalChangeBus):
+    """Cross-worker bus built on LISTEN/NOTIFY.
+
+    pg_notify runs inside the writer's transaction, so Postgres only delivers it
+    on commit. Every worker (including the writer) receives it on a dedicated
+    listening connection and republishes it to its local broadcaster.
+    """
+
+    def __init__(self, broadcaster: ChangeBroadcaster, database_url: str, *, channel: str = CHANGE_CHANNEL):
+        super().__init__(broadcaster)
+        self.database_url = database_url
+        self.channel = channel
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def notify(self, db: Session, change: dict) -> None:
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": json.dumps(change)})
+
+    def flush(self, db: Session) -> None:
+        pass
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._listen_forever, name="labsync-change-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen_forever(self) -> None:
+        listen_engine = create_engine(self.database_url, poolclass=pool.NullPool)
+        while not self._stopped.is_set():
+            try:
+                self._listen(listen_engine)
+            except Exception:
+                logger.exception("Change listener disconnected; reconnecting")
+                self._stopped.wait(2)
+        listen_engine.dispose()
+
+    def _listen(self, listen_engine) -> None:
+        raw = listen_engine.raw_connection()
+        try:
+            connection = raw.driver_connection
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+            while not self._stopped.is_set():
+                if select.select([connection], [], [], 1.0) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notification = connection.notifies.pop(0)
+                    try:
+                        self.broadcaster.publish(json.loads(notification.payload))
+                    except ValueError:
+                        logger.warning("Ignoring malformed change payload: %s", notification.payload)
+        finally:
+            raw.close()
+
+
+def create_change_bus(broadcaster: ChangeBroadcaster) -> LocalChangeBus:
+    use_postgres = REALTIME_BRIDGE == "postgres" or (
+        REALTIME_BRIDGE == "auto" and REALTIME_DATABASE_URL.startswith("postgresql")
+    )
+    if use_postgres:
+        if DB_PGBOUNCER and REALTIME_DATABASE_URL == DATABASE_URL:
+            # LISTEN needs a session-pinned connection, which transaction pooling never gives.
+            logger.warning("DB_PGBOUNCER is set; point REALTIME_DATABASE_URL at Postgres directly for change events")
+        return PostgresChangeBus(broadcaster, REALTIME_DATABASE_URL)
+    return LocalChangeBus(broadcaster)
+
+
+broadcaster = ChangeBroadcaster()
+change_bus = create_change_bus(broadcaster)
+
+
+def notify_change(db: Session, entity_type: str, action: str, entity_id: str) -> None:
+    """Queue a change event; subscribers see it only if the session's transaction commits."""
+    change_bus.notify(db, {"entity_type": entity_type, "action": action, "entity_id": str(entity_id)})
+
+
+def format_sse(change: dict) -> str:
+    return f"event: change\ndata: {json.dumps(change)}\n\n"
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_committed_changes(db: Session) -> None:
+    change_bus.flush(db)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_changes(db: Session) -> None:
+    change_bus.discard(db)
@@ -0,0 +1,205 @@
+"""Per-request SQL accounting, Server-Timing headers and opt-in profiling.
+
+RequestMetricsMiddleware opens a RequestStats for every HTTP request and keeps it
+in a context variable. The context follows the request into the threadpool, so the
+engine's cursor events add each statement and its duration to the right request.
+The totals go out as a Server-Timing header. Requests over SLOW_REQUEST_MS or
+SLOW_REQUEST_QUERIES are logged together with their statements. The same numbers
+feed the Prometheus request and SQL metrics in metrics.py.
+
+With ?profile=1 and a caller that passes can_profile, the sync endpoint runs under
+cProfile and the response is replaced by a plain-text report.
+"""
+
+import cProfile
+import functools
+import inspect
+import io
+import logging
+import os
+import pstats
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from .metrics import REQUEST_ERRORS, REQUEST_LATENCY, REQUEST_STATEMENTS, REQUESTS, REQUESTS_IN_PROGRESS, SQL_DURATION, route_template, statement_operation
+except ImportError:  # pragma: no cover
+    from metrics import REQUEST_ERRORS, REQUEST_LATENCY, REQUEST_STATEMENTS, REQUESTS, REQUESTS_IN_PROGRESS, SQL_DURATION, route_template, statement_operation  # type: ignore
+
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", "50"))
+MAX_RECORDED_STATEMENTS = 200
+PROFILE_REPORT_LINES = 40
+
+
+@dataclass
+class RequestStats:
+    statement_count: int = 0
+    db_seconds: float = 0.0
+    statements: list[tuple[float, str]] = field(default_factory=list)
+    profiler: cProfile.Profile | None = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statement_count += 1
+        self.db_seconds += seconds
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements.append((seconds, " ".join(statement.split())))
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.statement_count} queries", '
+            f"app;dur={total_seconds * 1000:.1f}"
+        )
+
+    def statement_report(self) -> str:
+        lines = [f"  {seconds * 1000:8.2f} ms  {statement}" for seconds, statement in self.statements]
+        if self.statement_count > len(self.statements):
+            lines.append(f"  ... {self.statement_count - len(self.statements)} more")
+        return "\n".join(lines)
+
+
+current_request_stats: ContextVar[RequestStats | None] = ContextVar("current_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    SQL_DURATION.labels(statement_operation(statement)).observe(elapsed)
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def instrument_engine(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def profiled(endpoint: Callable) -> Callable:
+    """Run a sync endpoint under the request's profiler when one is active.
+
+    Sync endpoints execute in a worker thread and cProfile only sees the thread it
+    is enabled in, so the profiler is switched on around the endpoint call itself.
+    Async endpoints are returned unchanged.
+    """
+    if inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        stats = current_request_stats.get()
+        if stats is None or stats.profiler is None:
+            return endpoint(*args, **kwargs)
+        stats.profiler.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            stats.profiler.disable()
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
+
+
+class RequestMetricsMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        can_profile: Callable[[Request], bool] | None = None,
+        slow_ms: float = SLOW_REQUEST_MS,
+        slow_queries: int = SLOW_REQUEST_QUERIES,
+    ):
+        self.app = app
+        self.can_profile = can_profile
+        self.slow_ms = slow_ms
+        self.slow_queries = slow_queries
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        request = Request(scope)
+        if request.query_params.get("profile") == "1" and self.can_profile is not None and self.can_profile(request):
+            stats.profiler = cProfile.Profile()
+        token = current_request_stats.set(stats)
+        method, route = scope["method"], route_template(scope)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        status_code = 500
+        event_stream = False
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code, event_stream
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+                event_stream = headers.get("content-type", "").startswith("text/event-stream")
+            if stats.profiler is None:
+                await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            REQUEST_STATEMENTS.labels(route).observe(stats.statement_count)
+            if status_code >= 500:
+                REQUEST_ERRORS.labels(method, route).inc()
+            summary = (
+                f"{scope['method']} {scope['path']} -> {status_code} in {elapsed * 1000:.1f} ms, "
+                f"{stats.statement_count} queries / {stats.db_seconds * 1000:.1f} ms in DB"
+            )
+            # Event streams stay open by design; their duration says nothing about speed.
+            slow = not event_stream and elapsed * 1000 >= self.slow_ms
+            if slow or stats.statement_count >= self.slow_queries:
+                logger.warning("Slow request: %s\n%s", summary, stats.statement_report())
+        if stats.profiler is not None:
+            await self.send_profile(send, stats, summary)
+
+    @staticmethod
+    async def send_profile(send: Send, stats: RequestStats, summary: str) -> None:
+        report = io.StringIO()
+        report.write(f"{summary}\n\nStatements:\n{stats.statement_report()}\n\n")
+        try:
+            pstats.Stats(stats.profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_REPORT_LINES)
+        except TypeError:  # nothing was profiled, e.g. an async endpoint
+            report.write("No profile data: only sync endpoints are profiled.\n")
+        body = report.getvalue().encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
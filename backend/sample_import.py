@@ -0,0 +1,181 @@
+"""Bulk sample registration: batch validation and insert for JSON and CSV intake.
+
+Rows are validated and inserted a batch at a time: one IN query finds sample_ids
+that already exist, one executemany INSERT writes the valid rows and one audit
+entry summarizes the batch. Invalid rows are reported back with their row number
+and never block the rest of the batch. The INSERT runs in a savepoint, so a sample_id
+registered concurrently between the lookup and the insert is reported as "Sample
+exists" instead of failing the request.
+"""
+
+import codecs
+import csv
+from collections.abc import AsyncIterator, Iterable
+from datetime import date, datetime, timezone
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+try:
+    from .audit import log_audit
+    from .models import SampleModel, SampleStatus
+    from .realtime import notify_change
+    from .sync import transaction_revision
+except ImportError:  # pragma: no cover
+    from audit import log_audit  # type: ignore
+    from models import SampleModel, SampleStatus  # type: ignore
+    from realtime import notify_change  # type: ignore
+    from sync import transaction_revision  # type: ignore
+
+
+SAMPLE_IMPORT_BATCH_SIZE = 1000
+SAMPLE_IMPORT_MAX_ERRORS = 1000
+REQUIRED_FIELDS = ("sample_id", "well_id", "horizon", "sampling_date", "arrival_date")
+OPTIONAL_FIELDS = ("status", "storage_location", "assigned_to")
+SAMPLE_STATUSES = {status.value for status in SampleStatus}
+
+
+def clean(value) -> str | None:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def validate_sample_row(row: dict) -> tuple[dict | None, str | None]:
+    """Return (insert values, None) for a valid row or (None, error message)."""
+    if not isinstance(row, dict):
+        return None, "Row must be an object"
+    values = {name: clean(row.get(name)) for name in (*REQUIRED_FIELDS, *OPTIONAL_FIELDS)}
+    missing = [name for name in REQUIRED_FIELDS if values[name] is None]
+    if missing:
+        return None, f"Missing {', '.join(missing)}"
+    for name in ("sampling_date", "arrival_date"):
+        try:
+            values[name] = date.fromisoformat(values[name])
+        except ValueError:
+            return None, f"{name} must be in YYYY-MM-DD format"
+    if values["arrival_date"] < values["sampling_date"]:
+        return None, "arrival_date cannot be before sampling_date"
+    status = values["status"] or SampleStatus.new.value
+    if status not in SAMPLE_STATUSES:
+        return None, f"Unknown status {status}"
+    values["status"] = SampleStatus(status)
+    return values, None
+
+
+def import_sample_batch(db: Session, rows: list[tuple[int, dict]], performed_by: str | None) -> tuple[int, list[dict]]:
+    """Validate and insert one batch of (row number, row) pairs; the caller commits.
+
+    Returns the number of inserted samples and the per-row errors.
+    """
+    errors: list[dict] = []
+    valid: list[tuple[int, dict]] = []
+    seen: set[str] = set()
+    for row_number, row in rows:
+        values, error = validate_sample_row(row)
+        sample_id = values["sample_id"] if values else clean(row.get("sample_id")) if isinstance(row, dict) else None
+        if values and sample_id in seen:
+            error = "Duplicate sample_id in upload"
+        if error:
+            errors.append({"row": row_number, "sample_id": sample_id, "error": error})
+            continue
+        seen.add(sample_id)
+        valid.append((row_number, values))
+    valid = drop_existing(db, valid, errors)
+    if not valid:
+        return 0, errors
+    # Core INSERT skips the ORM flush hooks, so the sync stamp is set here.
+    revision = transaction_revision(db)
+    updated_at = datetime.now(timezone.utc).isoformat()
+    while True:
+        records = [{**values, "revision": revision, "updated_at": updated_at} for _, values in valid]
+        try:
+            with db.begin_nested():
+                db.execute(insert(SampleModel), records)
+            break
+        except IntegrityError:
+            # Another writer registered some of these ids after the lookup.
+            remaining = drop_existing(db, valid, errors)
+            if len(remaining) == len(valid):
+                raise
+            valid = remaining
+            if not valid:
+                return 0, errors
+    sample_ids = [record["sample_id"] for record in records]
+    batch_label = sample_ids[0] if len(sample_ids) == 1 else f"{sample_ids[0]}..{sample_ids[-1]}"
+    notify_change(db, "sample", "bulk_created", batch_label)
+    log_audit(
+        db,
+        entity_type="sample",
+        entity_id=batch_label,
+        action="bulk_create",
+        performed_by=performed_by,
+        details=f"count:{len(sample_ids)};sample_ids:{','.join(sample_ids)}",
+    )
+    return len(records), errors
+
+
+def drop_existing(db: Session, valid: list[tuple[int, dict]], errors: list[dict]) -> list[tuple[int, dict]]:
+    """Report rows whose sample_id is already registered and return the rest."""
+    if not valid:
+        return valid
+    sample_ids = [values["sample_id"] for _, values in valid]
+    existing = set(
+        db.execute(select(SampleModel.sample_id).where(SampleModel.sample_id.in_(sample_ids))).scalars().all()
+    )
+    errors.extend(
+        {"row": row_number, "sample_id": values["sample_id"], "error": "Sample exists"}
+        for row_number, values in valid
+        if values["sample_id"] in existing
+    )
+    return [(row_number, values) for row_number, values in valid if values["sample_id"] not in existing]
+
+
+def batched(rows: Iterable, size: int = SAMPLE_IMPORT_BATCH_SIZE) -> Iterable[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict]]:
+    """Parse a streamed CSV upload into (row number, row) pairs without buffering the body.
+
+    Header names are matched case-insensitively; row numbers count the header as row 1.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    header: list[str] | None = None
+    row_number = 0
+    pending = ""
+
+    def parse(lines: list[str]):
+        nonlocal header, row_number
+        for record in csv.reader(lines):
+            row_number += 1
+            if header is None:
+                header = [name.strip().lower() for name in record]
+                continue
+            if not any(cell.strip() for cell in record):
+                continue
+            yield row_number, dict(zip(header, record))
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        # Only complete lines with balanced quotes go to the csv module, so a quoted
+        # newline never splits a record across chunks.
+        cut = pending.rfind("\n")
+        if cut < 0 or pending[: cut + 1].count('"') % 2:
+            continue
+        lines, pending = pending[: cut + 1].splitlines(keepends=True), pending[cut + 1:]
+        for item in parse(lines):
+            yield item
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        for item in parse(pending.splitlines(keepends=True)):
+            yield item
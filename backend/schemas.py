@@ -22,6 +22,17 @@ class PlannedAnalysisUpdate(BaseModel):
     assigned_to: list[str] | str | None = Field(default=None)
 
 
+class PlannedAnalysisBulkUpdate(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=1000)
+    status: str | None = Field(default=None, pattern="^(planned|in_progress|review|completed|failed)$")
+    assigned_to: list[str] | str | None = Field(default=None)
+
+
+class PlannedAnalysisEnsureDefaults(BaseModel):
+    sample_ids: list[str] = Field(min_length=1, max_length=5000)
+    methods: list[str] | None = None
+
+
 class PlannedAnalysisOut(BaseModel):
     id: int
     sample_id: str
@@ -1,22 +1,52 @@
 import base64
 import hashlib
 import hmac
+import multiprocessing
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+try:
+    from .metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_REJECTED, PASSWORD_HASH_WAIT
+except ImportError:  # pragma: no cover
+    from metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_REJECTED, PASSWORD_HASH_WAIT  # type: ignore
 
-def hash_password(password: str) -> str:
-    salt = os.urandom(16)
-    digest = hashlib.scrypt(
+
+SCRYPT_N = int(os.getenv("SCRYPT_N", str(2**14)))
+SCRYPT_R = int(os.getenv("SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("SCRYPT_P", "1"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(max(1, PASSWORD_HASH_WORKERS) * 4)))
+PASSWORD_HASH_WAIT_SECONDS = float(os.getenv("PASSWORD_HASH_WAIT_SECONDS", "10"))
+
+if SCRYPT_N < 2 or SCRYPT_N & (SCRYPT_N - 1):
+    raise RuntimeError("SCRYPT_N must be a power of two greater than 1.")
+
+
+def scrypt_maxmem(n: int, r: int, p: int) -> int:
+    # OpenSSL refuses anything above 32 MB unless maxmem is raised explicitly.
+    return 128 * r * (n + p + 2) + 2**20
+
+
+def scrypt_digest(password: str, salt: bytes, n: int, r: int, p: int, dklen: int) -> bytes:
+    return hashlib.scrypt(
         password.encode("utf-8"),
         salt=salt,
-        n=2**14,
-        r=8,
-        p=1,
-        dklen=32,
+        n=n,
+        r=r,
+        p=p,
+        dklen=dklen,
+        maxmem=scrypt_maxmem(n, r, p),
     )
+
+
+def hash_password(password: str) -> str:
+    salt = os.urandom(16)
+    digest = scrypt_digest(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P, 32)
     salt_b64 = base64.b64encode(salt).decode("ascii")
     digest_b64 = base64.b64encode(digest).decode("ascii")
-    return f"scrypt$16384$8$1${salt_b64}${digest_b64}"
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt_b64}${digest_b64}"
 
 
 def verify_password(password: str, password_hash: str | None) -> bool:
@@ -28,18 +58,135 @@ def verify_password(password: str, password_hash: str | None) -> bool:
             return False
         salt = base64.b64decode(salt_b64.encode("ascii"))
         expected = base64.b64decode(digest_b64.encode("ascii"))
-        actual = hashlib.scrypt(
-            password.encode("utf-8"),
-            salt=salt,
-            n=int(n_val),
-            r=int(r_val),
-            p=int(p_val),
-            dklen=len(expected),
-        )
+        actual = scrypt_digest(password, salt, int(n_val), int(r_val), int(p_val), len(expected))
         return hmac.compare_digest(actual, expected)
     except Exception:
         return False
 
 
+def needs_rehash(password_hash: str | None) -> bool:
+    """True when a stored hash was made with other scrypt parameters than the configured ones."""
+    try:
+        algo, n_val, r_val, p_val, _ = (password_hash or "").split("$", 4)
+        return algo != "scrypt" or (int(n_val), int(r_val), int(p_val)) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    except ValueError:
+        return True
+
+
 def hash_token(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue stays full for longer than the wait limit."""
+
+
+class PasswordHasher:
+    """Runs scrypt in a small process pool with a bounded number of pending jobs.
+
+    Each scrypt call pins a core and ~16 MB for tens of milliseconds, so a login
+    burst is queued here instead of starving the request threadpool. Callers
+    block until their job finishes; once max_pending jobs are in the pool new
+    callers wait up to wait_seconds and then get PasswordHasherBusy.
+    With workers=0 hashing runs inline in the calling thread (still bounded).
+    """
+
+    def __init__(self, *, workers: int, max_pending: int, wait_seconds: float):
+        self.workers = max(0, workers)
+        self.max_pending = max(1, max_pending)
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._waiting = 0
+        self._in_flight = 0
+        self._max_queue_depth = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds_total = 0.0
+        self._run_seconds_total = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor | None:
+        if self.workers == 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # spawn: the app process already runs threads, which fork does not handle safely.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _queue_depth(self) -> int:
+        return self._waiting + max(0, self._in_flight - max(1, self.workers))
+
+    def _run(self, fn, *args):
+        operation = fn.__name__.removesuffix("_password")
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue_depth())
+        acquired = self._slots.acquire(timeout=self.wait_seconds)
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._rejected += 1
+                PASSWORD_HASH_REJECTED.inc()
+                raise PasswordHasherBusy()
+            self._in_flight += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue_depth())
+            started_at = time.perf_counter()
+            self._wait_seconds_total += started_at - enqueued_at
+        PASSWORD_HASH_WAIT.observe(started_at - enqueued_at)
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return fn(*args)
+            return executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+            ran = time.perf_counter() - started_at
+            PASSWORD_HASH_DURATION.labels(operation).observe(ran)
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                self._run_seconds_total += ran
+
+    def hash(self, password: str) -> str:
+        return self._run(hash_password, password)
+
+    def verify(self, password: str, password_hash: str | None) -> bool:
+        if not password_hash:
+            return False
+        return self._run(verify_password, password, password_hash)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "queue_depth": self._queue_depth(),
+                "max_queue_depth": self._max_queue_depth,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_seconds_total / completed * 1000, 2) if completed else 0.0,
+                "avg_run_ms": round(self._run_seconds_total / completed * 1000, 2) if completed else 0.0,
+                "scrypt": {"n": SCRYPT_N, "r": SCRYPT_R, "p": SCRYPT_P},
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+    wait_seconds=PASSWORD_HASH_WAIT_SECONDS,
+)
@@ -1,13 +1,69 @@
-from sqlalchemy import select
+"""Default accounts and the synthetic dataset generator.
+
+seed_users runs on every start and only makes sure the admin account exists.
+seed_synthetic fills an empty database with a realistic, deterministic dataset
+for performance work: operators with method permissions, wells and horizons,
+samples with consistent sampling/arrival dates, planned analyses with several
+assignees, conflicts, weekly action batches and years of audit history. The
+same seed and end date always produce the same rows. Rows are written in
+chunks, with COPY on Postgres and executemany INSERTs elsewhere.
+
+    python -m backend.seed --samples 1000000 --seed 42 --end 2026-01-01
+"""
+
+import argparse
+import io
+import json
+import random
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from enum import Enum
+
+from faker import Faker
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
 
 try:
+    from .audit_retention import ensure_audit_partitions
     from .database import SessionLocal
-    from .models import UserModel, UserMethodPermissionModel
+    from .models import (
+        ActionBatchModel,
+        ActionBatchStatus,
+        AnalysisStatus,
+        AuditLogModel,
+        ConflictModel,
+        ConflictStatus,
+        PlannedAnalysisAssigneeModel,
+        PlannedAnalysisModel,
+        SampleModel,
+        SampleStatus,
+        UserMethodPermissionModel,
+        UserModel,
+        identity_key,
+    )
     from .security import hash_password
+    from .sync import transaction_revision
 except ImportError:  # pragma: no cover
+    from audit_retention import ensure_audit_partitions  # type: ignore
     from database import SessionLocal  # type: ignore
-    from models import UserModel, UserMethodPermissionModel  # type: ignore
+    from models import (  # type: ignore
+        ActionBatchModel,
+        ActionBatchStatus,
+        AnalysisStatus,
+        AuditLogModel,
+        ConflictModel,
+        ConflictStatus,
+        PlannedAnalysisAssigneeModel,
+        PlannedAnalysisModel,
+        SampleModel,
+        SampleStatus,
+        UserMethodPermissionModel,
+        UserModel,
+        identity_key,
+    )
     from security import hash_password  # type: ignore
+    from sync import transaction_revision  # type: ignore
 
 
 DEFAULT_USERS = [
@@ -16,6 +72,30 @@ DEFAULT_USERS = [
 DEFAULT_METHODS = ["SARA", "IR", "Mass Spectrometry", "Viscosity", "Electrophoresis"]
 DEFAULT_USER_PASSWORD = "Tatneft123"
 
+SYNTHETIC_SAMPLE_PREFIX = "SYN-"
+SYNTHETIC_PASSWORD = "Synthetic-Password-1"
+SYNTHETIC_CHUNK_SIZE = 5000
+HORIZONS = [
+    "Pashiysky D1",
+    "Kynovsky D0",
+    "Famennian D3fm",
+    "Tournaisian C1t",
+    "Bobrikovsky C1bb",
+    "Tulsky C1tl",
+    "Serpukhovian C1s",
+    "Bashkirian C2b",
+    "Vereisky C2vr",
+    "Kashirsky C2ks",
+]
+SAMPLE_STATUS_FLOW = [SampleStatus.new, SampleStatus.progress, SampleStatus.review, SampleStatus.done]
+ANALYSIS_STATUSES_FOR_SAMPLE = {
+    SampleStatus.new: [AnalysisStatus.planned],
+    SampleStatus.progress: [AnalysisStatus.planned, AnalysisStatus.in_progress, AnalysisStatus.in_progress],
+    SampleStatus.review: [AnalysisStatus.in_progress, AnalysisStatus.review, AnalysisStatus.completed],
+    SampleStatus.done: [AnalysisStatus.completed] * 9 + [AnalysisStatus.failed],
+}
+CONFLICT_NOTES = ["Kept server version", "Applied client change", "Merged by hand after checking the shelf"]
+
 
 def seed_users(*, bootstrap_admin_password: str = "admin"):
     db = SessionLocal()
@@ -68,5 +148,330 @@ def seed_users(*, bootstrap_admin_password: str = "admin"):
         db.close()
 
 
-if __name__ == "__main__":
+@dataclass(frozen=True)
+class SyntheticDataset:
+    samples: int = 10_000
+    analyses_per_sample: float = 2.0
+    operators: int = 200
+    years: int = 6
+    conflict_rate: float = 0.005
+    seed: int = 42
+    end: date = field(default_factory=date.today)
+
+    def as_dict(self) -> dict:
+        values = asdict(self)
+        values["end"] = self.end.isoformat()
+        return values
+
+
+def synthetic_sample_id(index: int) -> str:
+    return f"{SYNTHETIC_SAMPLE_PREFIX}{index:07d}"
+
+
+def count_synthetic_samples(db: Session) -> int:
+    return db.execute(
+        select(func.count()).select_from(SampleModel).where(SampleModel.sample_id.like(f"{SYNTHETIC_SAMPLE_PREFIX}%"))
+    ).scalar_one()
+
+
+def chunked(rows, size: int = SYNTHETIC_CHUNK_SIZE):
+    chunk: list = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, Enum):
+        value = value.name
+    elif isinstance(value, bool):
+        value = "t" if value else "f"
+    elif isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def copy_rows(connection: Connection, table_name: str, rows: list[dict]) -> None:
+    """COPY rows into a Postgres table over the connection's own transaction."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(copy_value(row[column]) for column in columns))
+        buffer.write("\n")
+    statement = f"COPY {table_name} ({', '.join(columns)}) FROM STDIN"
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+        else:  # psycopg 3
+            with cursor.copy(statement) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+def write_rows(connection: Connection, model, rows: list[dict]) -> int:
+    if not rows:
+        return 0
+    if connection.dialect.name == "postgresql":
+        copy_rows(connection, model.__tablename__, rows)
+    else:
+        connection.execute(insert(model), rows)
+    return len(rows)
+
+
+def insert_returning_ids(connection: Connection, model, rows: list[dict]) -> list[int]:
+    """executemany INSERT that hands back the generated ids in row order."""
+    if not rows:
+        return []
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return connection.execute(statement, rows).scalars().all()
+
+
+def seed_synthetic(db: Session, size: SyntheticDataset) -> dict[str, int]:
+    """Insert the synthetic dataset into db's transaction and return row counts per table.
+
+    The caller commits. Refuses to run twice against the same database.
+    """
+    if count_synthetic_samples(db):
+        raise ValueError("Synthetic samples already exist; seed an empty database")
+    connection = db.connection()
+    revision = transaction_revision(db)
+    rng = random.Random(size.seed)
+    fake = Faker("ru_RU")
+    fake.seed_instance(size.seed)
+    start = size.end - timedelta(days=365 * size.years)
+    span_days = max(1, (size.end - start).days)
+    history_start = datetime.combine(start, time(), tzinfo=timezone.utc)
+    last_moment = datetime.combine(size.end, time(23, 59), tzinfo=timezone.utc)
+    ensure_audit_partitions(connection, start=history_start)
+    counts = {
+        "users": 0,
+        "user_method_permissions": 0,
+        "samples": 0,
+        "planned_analyses": 0,
+        "planned_analysis_assignees": 0,
+        "conflicts": 0,
+        "action_batches": 0,
+        "audit_log": 0,
+    }
+
+    def moment(day: date) -> datetime:
+        seconds = rng.randrange(8 * 3600, 19 * 3600)
+        return datetime.combine(day, time(), tzinfo=timezone.utc) + timedelta(seconds=seconds)
+
+    def audit(entity_type: str, entity_id: str, action: str, actor: str | None, at: datetime, details: str) -> dict:
+        return {
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "action": action,
+            "performed_by": actor,
+            "performed_at": at,
+            "details": details,
+        }
+
+    operator_names: list[str] = []
+    seen_names: set[str] = set()
+    while len(operator_names) < size.operators:
+        name = fake.name()
+        if name not in seen_names:
+            seen_names.add(name)
+            operator_names.append(name)
+    password_hash = hash_password(SYNTHETIC_PASSWORD)
+    operator_ids: list[int] = []
+    for chunk in chunked(
+        {
+            "username": f"operator{index:05d}",
+            "full_name": name,
+            "username_key": identity_key(f"operator{index:05d}"),
+            "full_name_key": identity_key(name),
+            "email": f"operator{index:05d}@labsync.local",
+            "password_hash": password_hash,
+            "must_change_password": False,
+            "is_active": True,
+            "role": "lab_operator",
+            "roles": "lab_operator",
+        }
+        for index, name in enumerate(operator_names)
+    ):
+        operator_ids.extend(insert_returning_ids(connection, UserModel, chunk))
+    counts["users"] = len(operator_ids)
+
+    permitted: dict[str, list[str]] = {method: [] for method in DEFAULT_METHODS}
+    permissions = []
+    for user_id, name in zip(operator_ids, operator_names):
+        methods = rng.sample(DEFAULT_METHODS, rng.randint(1, len(DEFAULT_METHODS)))
+        for method in methods:
+            permitted[method].append(name)
+            permissions.append({"user_id": user_id, "method_name": method})
+    for chunk in chunked(permissions):
+        counts["user_method_permissions"] += write_rows(connection, UserMethodPermissionModel, chunk)
+
+    # Fields of a few hundred wells, each producing from one to three horizons.
+    wells = []
+    for field_index in range(max(1, size.samples // 4000)):
+        field_code = fake.unique.bothify("??").upper() if field_index < 600 else f"F{field_index}"
+        for _ in range(rng.randint(20, 80)):
+            wells.append((f"{field_code}-{rng.randint(100, 9999)}", rng.sample(HORIZONS, rng.randint(1, 3))))
+    shelves = [f"Shelf {chr(65 + index % 26)}{index // 26 + 1}" for index in range(120)]
+
+    for first in range(0, size.samples, SYNTHETIC_CHUNK_SIZE):
+        samples, analyses, assignees, audit_rows = [], [], [], []
+        for index in range(first, min(first + SYNTHETIC_CHUNK_SIZE, size.samples)):
+            sample_id = synthetic_sample_id(index)
+            well_id, horizons = rng.choice(wells)
+            sampled = start + timedelta(days=rng.randrange(span_days))
+            arrived = min(size.end, sampled + timedelta(days=rng.randint(1, 21)))
+            age = (size.end - arrived).days
+            steps = min(len(SAMPLE_STATUS_FLOW) - 1, age // 30 + rng.randint(0, 1)) if age else 0
+            status = SAMPLE_STATUS_FLOW[steps]
+            owner = rng.choice(operator_names) if operator_names and rng.random() < 0.7 else None
+            location = rng.choice(shelves)
+            last_change = moment(arrived)
+            for step, offset in enumerate(sorted(rng.randint(0, age) for _ in range(steps)), start=1):
+                last_change = moment(arrived + timedelta(days=offset))
+                details = f"status:{SAMPLE_STATUS_FLOW[step - 1].value}->{SAMPLE_STATUS_FLOW[step].value}"
+                audit_rows.append(audit("sample", sample_id, "status_change", owner, last_change, details))
+            if rng.random() < 0.2:
+                moved_to = rng.choice(shelves)
+                if moved_to != location:
+                    moved_at = moment(arrived + timedelta(days=rng.randint(0, age)))
+                    details = f"storage_location:{location}->{moved_to}"
+                    audit_rows.append(audit("sample", sample_id, "updated", owner, moved_at, details))
+                    location = moved_to
+            samples.append(
+                {
+                    "sample_id": sample_id,
+                    "well_id": well_id,
+                    "horizon": rng.choice(horizons),
+                    "sampling_date": sampled,
+                    "arrival_date": arrived,
+                    "status": status,
+                    "storage_location": location,
+                    "assigned_to": owner,
+                    "updated_at": last_change.isoformat(),
+                    "revision": revision,
+                }
+            )
+            wanted = int(size.analyses_per_sample) + (rng.random() < size.analyses_per_sample % 1)
+            for method in rng.sample(DEFAULT_METHODS, min(wanted, len(DEFAULT_METHODS))):
+                candidates = permitted[method]
+                team = rng.sample(candidates, min(len(candidates), rng.choice((0, 1, 1, 1, 2, 3))))
+                created_at = moment(arrived + timedelta(days=min(age, rng.randint(0, 2))))
+                analyses.append(
+                    {
+                        "sample_id": sample_id,
+                        "analysis_type": method,
+                        "status": rng.choice(ANALYSIS_STATUSES_FOR_SAMPLE[status]),
+                        "assigned_to": team[0] if team else None,
+                        "updated_at": created_at.isoformat(),
+                        "revision": revision,
+                    }
+                )
+                assignees.append((team, created_at))
+        counts["samples"] += write_rows(connection, SampleModel, samples)
+        analysis_ids = insert_returning_ids(connection, PlannedAnalysisModel, analyses)
+        counts["planned_analyses"] += len(analysis_ids)
+        assignee_rows = []
+        for analysis_id, row, (team, created_at) in zip(analysis_ids, analyses, assignees):
+            details = f"sample={row['sample_id']};method={row['analysis_type']};assignees={','.join(team)}"
+            audit_rows.append(audit("planned_analysis", str(analysis_id), "created", row["assigned_to"], created_at, details))
+            assignee_rows.extend(
+                {"analysis_id": analysis_id, "assignee": assignee, "updated_at": row["updated_at"], "revision": revision}
+                for assignee in team
+            )
+        counts["planned_analysis_assignees"] += write_rows(connection, PlannedAnalysisAssigneeModel, assignee_rows)
+        counts["audit_log"] += write_rows(connection, AuditLogModel, audit_rows)
+
+    # Offline edits that collided with a newer server version of a sample.
+    conflicts, conflict_events = [], []
+    for _ in range(int(size.samples * size.conflict_rate)):
+        sample_id = synthetic_sample_id(rng.randrange(size.samples))
+        raised_at = moment(start + timedelta(days=rng.randrange(span_days)))
+        server, client = rng.sample(shelves, 2)
+        resolved = (size.end - raised_at.date()).days > 14 or rng.random() < 0.5
+        resolver = rng.randrange(len(operator_ids)) if operator_ids else None
+        resolved_at = min(raised_at + timedelta(hours=rng.randint(1, 72)), last_moment)
+        conflicts.append(
+            {
+                "old_payload": json.dumps({"sample_id": sample_id, "storage_location": server}),
+                "new_payload": json.dumps({"sample_id": sample_id, "storage_location": client}),
+                "status": ConflictStatus.resolved if resolved else ConflictStatus.open,
+                "resolution_note": rng.choice(CONFLICT_NOTES) if resolved else None,
+                "updated_by": str(operator_ids[resolver]) if resolved and resolver is not None else None,
+                "updated_at": (resolved_at if resolved else raised_at).isoformat(),
+            }
+        )
+        actor = operator_names[resolver] if resolved and resolver is not None else None
+        conflict_events.append((resolved, actor, resolved_at))
+    for chunk_start in range(0, len(conflicts), SYNTHETIC_CHUNK_SIZE):
+        chunk = conflicts[chunk_start:chunk_start + SYNTHETIC_CHUNK_SIZE]
+        conflict_ids = insert_returning_ids(connection, ConflictModel, chunk)
+        counts["conflicts"] += len(conflict_ids)
+        audit_rows = [
+            audit("conflict", str(conflict_id), "status_change", actor, resolved_at, "status:open->resolved")
+            for conflict_id, (resolved, actor, resolved_at) in zip(conflict_ids, conflict_events[chunk_start:])
+            if resolved
+        ]
+        counts["audit_log"] += write_rows(connection, AuditLogModel, audit_rows)
+
+    # One action batch per method and week; the last two weeks are still open.
+    batches = []
+    week = start - timedelta(days=start.weekday())
+    while week <= size.end:
+        for method in DEFAULT_METHODS:
+            recent = (size.end - week).days < 14
+            batches.append(
+                {
+                    "title": f"{method} batch {week.isocalendar().year}-W{week.isocalendar().week:02d}",
+                    "date": week.isoformat(),
+                    "status": rng.choice([ActionBatchStatus.new, ActionBatchStatus.review]) if recent else ActionBatchStatus.done,
+                }
+            )
+        week += timedelta(days=7)
+    for chunk in chunked(batches):
+        counts["action_batches"] += write_rows(connection, ActionBatchModel, chunk)
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Create the default accounts and, optionally, a synthetic dataset.")
+    parser.add_argument("--samples", type=int, default=0, help="synthetic samples to generate (0: accounts only)")
+    parser.add_argument("--analyses-per-sample", type=float, default=SyntheticDataset.analyses_per_sample)
+    parser.add_argument("--operators", type=int, default=SyntheticDataset.operators)
+    parser.add_argument("--years", type=int, default=SyntheticDataset.years, help="span of sampling dates and audit history")
+    parser.add_argument("--conflict-rate", type=float, default=SyntheticDataset.conflict_rate)
+    parser.add_argument("--seed", type=int, default=SyntheticDataset.seed)
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="last day of the data (default: today)")
+    args = parser.parse_args(argv)
     seed_users()
+    if not args.samples:
+        return
+    size = SyntheticDataset(
+        samples=args.samples,
+        analyses_per_sample=args.analyses_per_sample,
+        operators=args.operators,
+        years=args.years,
+        conflict_rate=args.conflict_rate,
+        seed=args.seed,
+        end=args.end,
+    )
+    db = SessionLocal()
+    try:
+        counts = seed_synthetic(db, size)
+        db.commit()
+    finally:
+        db.close()
+    for table, count in counts.items():
+        print(f"{table}: {count}")
+
+
+if __name__ == "__main__":
+    main()
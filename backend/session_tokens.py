@@ -0,0 +1,178 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+try:
+    from .database import SessionLocal
+    from .models import SessionRevocationModel
+except ImportError:  # pragma: no cover
+    from database import SessionLocal  # type: ignore
+    from models import SessionRevocationModel  # type: ignore
+
+
+DEV_SESSION_TOKEN_SECRET = "labsync-dev-session-secret"
+SESSION_TOKEN_SECRET = os.getenv("SESSION_TOKEN_SECRET", DEV_SESSION_TOKEN_SECRET)
+SESSION_TOKEN_TTL_MINUTES = int(os.getenv("SESSION_TOKEN_TTL_MINUTES", "720"))
+SESSION_REVOCATION_REFRESH_SECONDS = float(os.getenv("SESSION_REVOCATION_REFRESH_SECONDS", "5"))
+
+
+@dataclass(frozen=True)
+class SessionClaims:
+    user_id: int
+    roles: tuple[str, ...]
+    password_changed_at: int
+    issued_at_ms: int
+    expires_at: int
+
+    def has_role(self, role_name: str) -> bool:
+        return role_name.strip().lower() in self.roles
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(SESSION_TOKEN_SECRET.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def password_epoch(password_changed_at: str | None) -> int:
+    if not password_changed_at:
+        return 0
+    try:
+        return int(datetime.fromisoformat(password_changed_at).timestamp())
+    except ValueError:
+        return 0
+
+
+def issue_session_token(user_id: int, roles: list[str], password_changed_at: str | None) -> str:
+    now_ms = int(time.time() * 1000)
+    claims = {
+        "uid": user_id,
+        "roles": [role.strip().lower() for role in roles if role.strip()],
+        "pwd": password_epoch(password_changed_at),
+        "iat": now_ms,
+        "exp": now_ms // 1000 + SESSION_TOKEN_TTL_MINUTES * 60,
+    }
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_session_token(token: str | None) -> SessionClaims | None:
+    """Return the claims of a correctly signed, unexpired token (revocation is checked separately)."""
+    payload, _, signature = (token or "").partition(".")
+    if not payload or not signature or not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        data = json.loads(_b64decode(payload))
+        claims = SessionClaims(
+            user_id=int(data["uid"]),
+            roles=tuple(data["roles"]),
+            password_changed_at=int(data["pwd"]),
+            issued_at_ms=int(data["iat"]),
+            expires_at=int(data["exp"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+    if claims.expires_at <= time.time():
+        return None
+    return claims
+
+
+class SessionRevocationList:
+    """Process-local copy of the session_revocations table.
+
+    The copy is reloaded at most every refresh_seconds, so token checks stay off
+    the database; revocations made in another worker apply after that delay.
+    Rows older than the token TTL are pruned since every token they cover has expired.
+    """
+
+    def __init__(self, *, refresh_seconds: float, ttl_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._revoked: dict[int, int] = {}
+        self._loaded_at: float | None = None
+
+    def _refresh_if_stale(self) -> None:
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+                return
+        db = SessionLocal()
+        try:
+            rows = db.execute(select(SessionRevocationModel.user_id, SessionRevocationModel.revoked_at)).all()
+        finally:
+            db.close()
+        with self._lock:
+            self._revoked = {user_id: revoked_at for user_id, revoked_at in rows}
+            self._loaded_at = time.monotonic()
+
+    def is_revoked(self, claims: SessionClaims) -> bool:
+        self._refresh_if_stale()
+        with self._lock:
+            return claims.issued_at_ms < self._revoked.get(claims.user_id, 0)
+
+    def revoke(self, db: Session, user_id: int) -> None:
+        """Reject every token issued to user_id so far; takes effect in this worker on commit, in others on refresh."""
+        now_ms = int(time.time() * 1000)
+        dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        db.execute(
+            dialect_insert(SessionRevocationModel)
+            .values(user_id=user_id, revoked_at=now_ms)
+            .on_conflict_do_update(index_elements=[SessionRevocationModel.user_id], set_={"revoked_at": now_ms})
+        )
+        db.execute(
+            delete(SessionRevocationModel).where(SessionRevocationModel.revoked_at < now_ms - self.ttl_seconds * 1000)
+        )
+        db.info.setdefault("pending_revocations", {})[user_id] = now_ms
+
+    def apply_committed(self, db: Session) -> None:
+        pending = db.info.pop("pending_revocations", {})
+        if pending:
+            with self._lock:
+                self._revoked.update(pending)
+
+    def discard(self, db: Session) -> None:
+        db.info.pop("pending_revocations", None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked = {}
+            self._loaded_at = None
+
+
+session_revocations = SessionRevocationList(
+    refresh_seconds=SESSION_REVOCATION_REFRESH_SECONDS,
+    ttl_seconds=SESSION_TOKEN_TTL_MINUTES * 60,
+)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_committed_revocations(db: Session) -> None:
+    session_revocations.apply_committed(db)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_revocations(db: Session) -> None:
+    session_revocations.discard(db)
+
+
+def verify_session_token(token: str | None) -> SessionClaims | None:
+    claims = decode_session_token(token)
+    if claims is None or session_revocations.is_revoked(claims):
+        return None
+    return claims
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session
+
+try:
+    from .counters import bump_counter, read_counter
+    from .database import SessionLocal
+    from .models import PlannedAnalysisAssigneeModel, PlannedAnalysisModel, SampleModel, SyncTombstoneModel
+except ImportError:  # pragma: no cover
+    from counters import bump_counter, read_counter  # type: ignore
+    from database import SessionLocal  # type: ignore
+    from models import PlannedAnalysisAssigneeModel, PlannedAnalysisModel, SampleModel, SyncTombstoneModel  # type: ignore
+
+
+SYNC_REVISION_COUNTER = "sync_revision"
+TRACKED_MODELS = (SampleModel, PlannedAnalysisModel, PlannedAnalysisAssigneeModel)
+
+
+def current_revision(db: Session) -> int:
+    return read_counter(db, SYNC_REVISION_COUNTER)
+
+
+def transaction_revision(db: Session) -> int:
+    """Allocate one sync revision per transaction; all rows it writes share that revision."""
+    transaction = db.get_transaction()
+    if db.info.get("sync_revision_transaction") is not transaction:
+        db.info["sync_revision"] = bump_counter(db, SYNC_REVISION_COUNTER)
+        db.info["sync_revision_transaction"] = transaction
+    return db.info["sync_revision"]
+
+
+def record_tombstones(db: Session, entity_type: str, entity_ids: list[str]) -> None:
+    """Record deletes that bypass the ORM unit of work (bulk and cascaded deletes)."""
+    if not entity_ids:
+        return
+    revision = transaction_revision(db)
+    deleted_at = datetime.now(timezone.utc).isoformat()
+    db.execute(
+        insert(SyncTombstoneModel),
+        [
+            {"entity_type": entity_type, "entity_id": str(entity_id), "revision": revision, "deleted_at": deleted_at}
+            for entity_id in entity_ids
+        ],
+    )
+
+
+def record_sample_tombstones(db: Session, sample_ids: list[str]) -> None:
+    """Tombstone samples and the planned analyses the database cascades away with them."""
+    if not sample_ids:
+        return
+    analysis_ids = db.execute(
+        select(PlannedAnalysisModel.id).where(PlannedAnalysisModel.sample_id.in_(sample_ids))
+    ).scalars().all()
+    record_tombstones(db, "planned_analysis", [str(analysis_id) for analysis_id in analysis_ids])
+    record_tombstones(db, "sample", sample_ids)
+
+
+def stamp_sync_revisions(db: Session, flush_context, instances) -> None:
+    touched = [obj for obj in db.new if isinstance(obj, TRACKED_MODELS)]
+    touched += [obj for obj in db.dirty if isinstance(obj, TRACKED_MODELS) and db.is_modified(obj)]
+    deleted = [obj for obj in db.deleted if isinstance(obj, (SampleModel, PlannedAnalysisModel))]
+    if not touched and not deleted:
+        return
+    revision = transaction_revision(db)
+    now_iso = datetime.now(timezone.utc).isoformat()
+    for obj in touched:
+        obj.revision = revision
+        obj.updated_at = now_iso
+    deleted_samples = [obj.sample_id for obj in deleted if isinstance(obj, SampleModel)]
+    deleted_analyses = [str(obj.id) for obj in deleted if isinstance(obj, PlannedAnalysisModel)]
+    record_tombstones(db, "planned_analysis", deleted_analyses)
+    record_sample_tombstones(db, deleted_samples)
+
+
+event.listen(SessionLocal, "before_flush", stamp_sync_revisions)
@@ -15,6 +15,7 @@ if TEST_DB_PATH.exists():
     TEST_DB_PATH.unlink()
 
 os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{TEST_DB_PATH}"
+os.environ["ALLOW_ROLE_HEADERS"] = "1"
 
 ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
@@ -102,6 +103,19 @@ def user_factory(
     return _create
 
 
+@pytest.fixture()
+def admin_token_headers(client: TestClient, user_factory: Callable[..., dict]) -> dict[str, str]:
+    admin = user_factory(
+        role="admin",
+        username="session.admin",
+        full_name="Session Admin",
+        email="session.admin@example.com",
+    )
+    login = client.post("/auth/login", json={"username": admin["username"], "password": "Tatneft123"})
+    assert login.status_code == 200, login.text
+    return {"authorization": f"Bearer {login.json()['token']}"}
+
+
 @pytest.fixture()
 def canonical_users(user_factory: Callable[..., dict]) -> dict[str, dict]:
     return {
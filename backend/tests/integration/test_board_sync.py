@@ -0,0 +1,56 @@
+from collections.abc import Callable
+
+from fastapi.testclient import TestClient
+
+
+def _sync(client: TestClient, since: int) -> dict:
+    res = client.get("/sync", params={"since": since})
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+def test_sync_returns_only_changes_and_tombstones(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    make_sample_payload: Callable[..., dict[str, str]],
+):
+    kept = make_sample_payload(sample_id="S-SYNC-001")
+    removed = make_sample_payload(sample_id="S-SYNC-002")
+    assert client.post("/samples", json=kept).status_code == 201
+    assert client.post("/samples", json=removed).status_code == 201
+    analysis = client.post("/planned-analyses", json={"sample_id": "S-SYNC-002", "analysis_type": "SARA"}).json()
+
+    snapshot = _sync(client, 0)
+    assert snapshot["full"] is True
+    assert {"S-SYNC-001", "S-SYNC-002"} <= {item["sample_id"] for item in snapshot["samples"]}
+    revision = snapshot["revision"]
+
+    idle = _sync(client, revision)
+    assert idle["full"] is False
+    assert idle["samples"] == []
+    assert idle["planned_analyses"] == []
+    assert idle["deleted_samples"] == []
+    assert idle["revision"] == revision
+
+    assert client.patch("/samples/S-SYNC-001", json={"status": "progress"}, headers=admin_headers).status_code == 200
+    changed = _sync(client, revision)
+    assert [item["sample_id"] for item in changed["samples"]] == ["S-SYNC-001"]
+    assert changed["samples"][0]["status"] == "progress"
+    assert changed["revision"] > revision
+    revision = changed["revision"]
+
+    assert client.patch(f"/planned-analyses/{analysis['id']}", json={"status": "in_progress"}).status_code == 200
+    changed = _sync(client, revision)
+    assert changed["samples"] == []
+    assert [item["id"] for item in changed["planned_analyses"]] == [analysis["id"]]
+    revision = changed["revision"]
+
+    assert client.delete("/samples/S-SYNC-002").status_code == 200
+    deleted = _sync(client, revision)
+    assert deleted["deleted_samples"] == ["S-SYNC-002"]
+    assert str(analysis["id"]) in deleted["deleted_planned_analyses"]
+
+    purge = client.request("DELETE", "/admin/samples", json={"sample_ids": ["S-SYNC-001"]}, headers=admin_headers)
+    assert purge.status_code == 200
+    purged = _sync(client, deleted["revision"])
+    assert purged["deleted_samples"] == ["S-SYNC-001"]
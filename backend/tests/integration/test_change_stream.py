@@ -0,0 +1,73 @@
+import asyncio
+from collections.abc import Callable
+
+from fastapi.testclient import TestClient
+
+from backend.realtime import ChangeBroadcaster, LocalChangeBus, broadcaster, change_bus, format_sse
+
+
+async def _collect(queue: asyncio.Queue, count: int) -> list[dict]:
+    return [await asyncio.wait_for(queue.get(), timeout=2) for _ in range(count)]
+
+
+def test_committed_writes_are_pushed_to_subscribers(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    make_sample_payload: Callable[..., dict[str, str]],
+):
+    assert isinstance(change_bus, LocalChangeBus)
+    sample = make_sample_payload(sample_id="S-STREAM-001")
+
+    async def scenario() -> list[dict]:
+        queue = broadcaster.subscribe()
+        try:
+            created = await asyncio.to_thread(client.post, "/samples", json=sample)
+            assert created.status_code == 201
+            updated = await asyncio.to_thread(
+                client.patch, "/samples/S-STREAM-001", json={"status": "progress"}, headers=admin_headers
+            )
+            assert updated.status_code == 200
+            conflict = await asyncio.to_thread(
+                client.post, "/conflicts", json={"old_payload": "a", "new_payload": "b", "status": "open"}
+            )
+            assert conflict.status_code == 201
+            return await _collect(queue, 3)
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    changes = asyncio.run(scenario())
+    assert changes[0] == {"entity_type": "sample", "action": "created", "entity_id": "S-STREAM-001"}
+    assert changes[1] == {"entity_type": "sample", "action": "updated", "entity_id": "S-STREAM-001"}
+    assert changes[2]["entity_type"] == "conflict"
+    assert changes[2]["action"] == "created"
+
+
+def test_rejected_writes_are_not_pushed(client: TestClient, make_sample_payload: Callable[..., dict[str, str]]):
+    invalid = make_sample_payload(sample_id="S-STREAM-BAD", sampling_date="2026-02-02", arrival_date="2026-02-01")
+
+    async def scenario() -> bool:
+        queue = broadcaster.subscribe()
+        try:
+            res = await asyncio.to_thread(client.post, "/samples", json=invalid)
+            assert res.status_code == 400
+            await asyncio.sleep(0.05)
+            return queue.empty()
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_broadcaster_drops_oldest_event_for_slow_subscribers():
+    local = ChangeBroadcaster(queue_size=2)
+
+    async def scenario() -> list[dict]:
+        queue = local.subscribe()
+        for idx in range(3):
+            local.publish({"entity_type": "sample", "action": "updated", "entity_id": str(idx)})
+        await asyncio.sleep(0)
+        return await _collect(queue, 2)
+
+    changes = asyncio.run(scenario())
+    assert [change["entity_id"] for change in changes] == ["1", "2"]
+    assert format_sse(changes[0]).startswith("event: change\ndata: {")
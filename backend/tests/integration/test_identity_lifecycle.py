@@ -1,5 +1,7 @@
 from fastapi.testclient import TestClient
 
+from backend import main
+
 
 def _events_for_user(client: TestClient, admin_headers: dict[str, str], user_id: int) -> list[dict]:
     res = client.get("/admin/events", headers=admin_headers)
@@ -126,3 +128,258 @@ def test_password_recovery_rejects_same_password(
     )
     assert same_password_reset.status_code == 400
     assert "different" in (same_password_reset.json().get("detail") or "").lower()
+
+
+def test_assignee_lookup_is_case_and_whitespace_insensitive(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    user_factory,
+    make_sample_payload,
+):
+    operator = user_factory(
+        role="lab_operator",
+        username="identity.key.user",
+        full_name="Identity Key User",
+        email="identity.key.user@example.com",
+    )
+    sample = make_sample_payload(sample_id="S-ID-KEY-001")
+    assert client.post("/samples", json=sample).status_code == 201
+
+    created = client.post(
+        "/planned-analyses",
+        json={"sample_id": sample["sample_id"], "analysis_type": "SARA", "assigned_to": ["  IDENTITY.KEY.USER "]},
+        headers=admin_headers,
+    )
+    assert created.status_code == 201, created.text
+
+    renamed = client.patch(
+        f"/admin/users/{operator['id']}",
+        json={"full_name": "Identity Key Renamed"},
+        headers=admin_headers,
+    )
+    assert renamed.status_code == 200, renamed.text
+
+    reassigned = client.patch(
+        f"/planned-analyses/{created.json()['id']}",
+        json={"assigned_to": ["identity key renamed"]},
+        headers=admin_headers,
+    )
+    assert reassigned.status_code == 200, reassigned.text
+
+    stale = client.patch(
+        f"/planned-analyses/{created.json()['id']}",
+        json={"assigned_to": ["Identity Key User"]},
+        headers=admin_headers,
+    )
+    assert stale.status_code == 400
+
+
+def test_login_upgrades_hashes_made_with_outdated_scrypt_parameters(client: TestClient, user_factory, monkeypatch):
+    from backend import security
+    from backend.database import SessionLocal
+    from backend.models import UserModel
+
+    created = user_factory(
+        role="lab_operator",
+        username="identity.rehash",
+        full_name="Identity Rehash",
+        email="identity.rehash@example.com",
+    )
+    db = SessionLocal()
+    try:
+        user = db.get(UserModel, created["id"])
+        with monkeypatch.context() as patched:
+            patched.setattr(security, "SCRYPT_N", 2**10)
+            user.password_hash = security.hash_password("Tatneft123")
+        assert security.needs_rehash(user.password_hash)
+        db.commit()
+    finally:
+        db.close()
+
+    login = client.post("/auth/login", json={"username": created["username"], "password": "Tatneft123"})
+    assert login.status_code == 200, login.text
+
+    db = SessionLocal()
+    try:
+        assert security.needs_rehash(db.get(UserModel, created["id"]).password_hash) is False
+    finally:
+        db.close()
+
+    again = client.post("/auth/login", json={"username": created["username"], "password": "Tatneft123"})
+    assert again.status_code == 200
+
+
+def test_signed_session_tokens_carry_roles_and_are_revoked_on_password_change(client: TestClient, user_factory):
+    created = user_factory(
+        role="lab_operator",
+        username="identity.session.token",
+        full_name="Identity Session Token",
+        email="identity.session.token@example.com",
+    )
+    login = client.post("/auth/login", json={"username": created["username"], "password": "Tatneft123"})
+    assert login.status_code == 200, login.text
+    token = login.json()["token"]
+    auth = {"authorization": f"Bearer {token}"}
+
+    assert client.get("/auth/me", headers=auth).status_code == 200
+    tampered = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+    assert client.get("/auth/me", headers={"authorization": f"Bearer {tampered}"}).status_code == 401
+    assert client.get("/auth/me", headers={"authorization": f"Bearer fake-{created['id']}"}).status_code == 401
+
+    # Roles come from the signed token, not from client-supplied headers.
+    spoofed = client.get("/admin/users", headers={**auth, "x-role": "admin", "x-roles": "admin"})
+    assert spoofed.status_code == 403
+    admin = user_factory(
+        role="admin",
+        username="identity.session.admin",
+        full_name="Identity Session Admin",
+        email="identity.session.admin@example.com",
+    )
+    admin_login = client.post("/auth/login", json={"username": admin["username"], "password": "Tatneft123"})
+    admin_auth = {"authorization": f"Bearer {admin_login.json()['token']}"}
+    assert client.get("/admin/users", headers=admin_auth).status_code == 200
+
+    change = client.post(
+        "/auth/change-password",
+        json={"current_password": "Tatneft123", "new_password": "SessionStrong123"},
+        headers=auth,
+    )
+    assert change.status_code == 200, change.text
+    new_token = change.json()["token"]
+    assert new_token != token
+    assert client.get("/auth/me", headers=auth).status_code == 401
+    assert client.get("/auth/me", headers={"authorization": f"Bearer {new_token}"}).status_code == 200
+
+
+def test_session_revocations_apply_locally_only_after_commit(client: TestClient, user_factory):
+    import time
+
+    from backend.database import SessionLocal
+    from backend.session_tokens import SessionClaims, session_revocations
+
+    created = user_factory(
+        role="lab_operator",
+        username="identity.revocation.commit",
+        full_name="Identity Revocation Commit",
+        email="identity.revocation.commit@example.com",
+    )
+    claims = SessionClaims(
+        user_id=created["id"],
+        roles=("lab_operator",),
+        password_changed_at=0,
+        issued_at_ms=int(time.time() * 1000) - 1,
+        expires_at=int(time.time()) + 60,
+    )
+    assert session_revocations.is_revoked(claims) is False
+
+    db = SessionLocal()
+    try:
+        session_revocations.revoke(db, created["id"])
+        assert session_revocations.is_revoked(claims) is False
+        db.rollback()
+        assert session_revocations.is_revoked(claims) is False
+
+        session_revocations.revoke(db, created["id"])
+        db.commit()
+        assert session_revocations.is_revoked(claims) is True
+    finally:
+        db.close()
+
+
+def test_role_headers_are_ignored_when_a_bearer_token_fails_or_the_dev_flag_is_off(
+    client: TestClient,
+    admin_token_headers: dict[str, str],
+    monkeypatch,
+):
+    spoofed = {"x-role": "admin", "x-roles": "admin"}
+    assert client.get("/admin/users", headers={**spoofed, "authorization": "Bearer garbage"}).status_code == 403
+    assert client.get("/admin/users", headers={**spoofed, "authorization": "Basic YWRtaW46YWRtaW4="}).status_code == 403
+
+    monkeypatch.setattr(main, "ALLOW_ROLE_HEADERS", False)
+    assert client.get("/admin/users", headers=spoofed).status_code == 403
+    assert client.get("/admin/users", headers=admin_token_headers).status_code == 200
+
+
+def test_assignment_rights_come_from_the_token_not_x_user(client: TestClient, user_factory, make_sample_payload):
+    operator = user_factory(
+        role="lab_operator",
+        username="identity.assign.operator",
+        full_name="Identity Assign Operator",
+        email="identity.assign.operator@example.com",
+        method_permissions=["SARA"],
+    )
+    colleague = user_factory(
+        role="lab_operator",
+        username="identity.assign.colleague",
+        full_name="Identity Assign Colleague",
+        email="identity.assign.colleague@example.com",
+        method_permissions=["SARA"],
+    )
+    sample = make_sample_payload(sample_id="S-ASSIGN-TOKEN")
+    assert client.post("/samples", json=sample).status_code == 201
+    analysis = client.post("/planned-analyses", json={"sample_id": sample["sample_id"], "analysis_type": "SARA"})
+    assert analysis.status_code == 201, analysis.text
+    login = client.post("/auth/login", json={"username": operator["username"], "password": "Tatneft123"})
+    auth = {"authorization": f"Bearer {login.json()['token']}"}
+
+    spoofed = client.patch(
+        f"/planned-analyses/{analysis.json()['id']}",
+        json={"assigned_to": [colleague["full_name"]]},
+        headers={**auth, "x-user": "Admin User"},
+    )
+    assert spoofed.status_code == 403
+    own = client.patch(
+        f"/planned-analyses/{analysis.json()['id']}",
+        json={"assigned_to": [operator["full_name"]]},
+        headers={**auth, "x-user": "Admin User"},
+    )
+    assert own.status_code == 200, own.text
+
+
+def test_destructive_admin_endpoints_check_token_claims(
+    client: TestClient,
+    user_factory,
+    admin_token_headers: dict[str, str],
+):
+    created = user_factory(
+        role="lab_operator",
+        username="identity.purge.operator",
+        full_name="Identity Purge Operator",
+        email="identity.purge.operator@example.com",
+    )
+    login = client.post("/auth/login", json={"username": created["username"], "password": "Tatneft123"})
+    spoofed = {"authorization": f"Bearer {login.json()['token']}", "x-role": "admin", "x-roles": "admin"}
+
+    purge = client.request("DELETE", "/admin/samples", json={"sample_ids": ["S-ANY"]}, headers=spoofed)
+    assert purge.status_code == 403
+    assert client.delete("/admin/purge-nondefault-analyses", headers=spoofed).status_code == 403
+
+    purge = client.request("DELETE", "/admin/samples", json={"sample_ids": ["S-ANY"]}, headers=admin_token_headers)
+    assert purge.status_code == 200
+
+
+def test_admin_user_listing_searches_and_pages(client: TestClient, admin_headers: dict[str, str], user_factory):
+    created = [
+        user_factory(role="lab_operator", username=f"roster.operator.{index}", method_permissions=["SARA"])
+        for index in range(3)
+    ]
+    user_factory(role="warehouse_worker", username="roster.storekeeper", full_name="Roster Storekeeper")
+
+    res = client.get("/admin/users", params={"q": "ROSTER.OPER"}, headers=admin_headers)
+    assert res.status_code == 200
+    assert [user["username"] for user in res.json()] == [user["username"] for user in created]
+    assert all(user["method_permissions"] == ["SARA"] for user in res.json())
+
+    res = client.get("/admin/users", params={"q": "roster", "role": "warehouse_worker"}, headers=admin_headers)
+    assert [user["username"] for user in res.json()] == ["roster.storekeeper"]
+
+    first = client.get("/admin/users", params={"q": "roster", "limit": 2}, headers=admin_headers)
+    assert len(first.json()) == 2
+    cursor = first.headers["x-next-cursor"]
+    second = client.get("/admin/users", params={"q": "roster", "limit": 2, "cursor": cursor}, headers=admin_headers)
+    assert "x-next-cursor" not in second.headers
+    assert [user["username"] for user in first.json() + second.json()] == [
+        *(user["username"] for user in created),
+        "roster.storekeeper",
+    ]
+    assert client.get("/admin/users", params={"cursor": "bad"}, headers=admin_headers).status_code == 400
@@ -0,0 +1,382 @@
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from itertools import count
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.database import engine
+
+_sample_seq = count(1)
+
+
+@contextmanager
+def count_statements() -> Iterator[list[str]]:
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+
+def _create_assigned_analyses(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    make_sample_payload: Callable[..., dict[str, str]],
+    assignee: str,
+    total: int,
+) -> None:
+    for _ in range(total):
+        sample = make_sample_payload(sample_id=f"S-QB-{next(_sample_seq):03d}")
+        assert client.post("/samples", json=sample).status_code == 201
+        res = client.post(
+            "/planned-analyses",
+            json={"sample_id": sample["sample_id"], "analysis_type": "SARA", "assigned_to": [assignee]},
+            headers=admin_headers,
+        )
+        assert res.status_code == 201, res.text
+
+
+def test_planned_analyses_listing_uses_constant_queries(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    canonical_users: dict[str, dict],
+    make_sample_payload: Callable[..., dict[str, str]],
+):
+    assignee = canonical_users["lab"]["full_name"]
+    _create_assigned_analyses(client, admin_headers, make_sample_payload, assignee, 2)
+
+    with count_statements() as small:
+        res = client.get("/planned-analyses")
+    assert res.status_code == 200
+    small_total = len(res.json())
+
+    _create_assigned_analyses(client, admin_headers, make_sample_payload, assignee, 5)
+
+    with count_statements() as large:
+        res = client.get("/planned-analyses")
+    assert res.status_code == 200
+    assert len(res.json()) == small_total + 5
+    assert len(large) == len(small)
+    assert sum(1 for item in res.json() if item["assigned_to"] == [assignee]) >= 7
+
+
+def test_board_snapshot_nests_analyses_in_three_statements(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    canonical_users: dict[str, dict],
+    make_sample_payload: Callable[..., dict[str, str]],
+):
+    assignee = canonical_users["lab"]["full_name"]
+    _create_assigned_analyses(client, admin_headers, make_sample_payload, assignee, 3)
+
+    with count_statements() as statements:
+        res = client.get("/board")
+    assert res.status_code == 200, res.text
+    assert len(statements) == 3
+    board = res.json()
+    nested = [item for item in board if item["sample_id"].startswith("S-QB-")]
+    assert nested
+    assert all(item["planned_analyses"][0]["assigned_to"] == [assignee] for item in nested)
+
+    filtered = client.get("/board", params={"role": "action_supervision", "analysis_type": "SARA", "assignee": assignee})
+    assert filtered.status_code == 200
+    assert filtered.json()
+    for item in filtered.json():
+        assert item["status"] in {"new", "progress", "done"}
+        assert all(analysis["analysis_type"] == "SARA" for analysis in item["planned_analyses"])
+
+    assert client.get("/board", params={"status": "bogus"}).status_code == 400
+
+
+def test_ensure_default_analyses_is_one_batched_transaction(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    make_sample_payload: Callable[..., dict[str, str]],
+):
+    sample_ids = [f"S-DEF-{idx:03d}" for idx in range(4)]
+    for sample_id in sample_ids:
+        assert client.post("/samples", json=make_sample_payload(sample_id=sample_id)).status_code == 201
+    existing = client.post("/planned-analyses", json={"sample_id": sample_ids[0], "analysis_type": "IR"})
+    assert existing.status_code == 201
+
+    with count_statements() as statements:
+        res = client.post(
+            "/planned-analyses/ensure-defaults",
+            json={"sample_ids": [*sample_ids, "S-DEF-MISSING"]},
+            headers=admin_headers,
+        )
+    assert res.status_code == 200, res.text
+    created = res.json()
+    assert len(created) == 4 * 5 - 1
+    assert ("S-DEF-000", "IR") not in {(item["sample_id"], item["analysis_type"]) for item in created}
+    inserts = [
+        statement
+        for statement in statements
+        if statement.lstrip().upper().startswith("INSERT") and "version_counters" not in statement
+    ]
+    assert len(inserts) == 2  # planned analyses + audit rows
+    assert len(statements) <= 8
+
+    again = client.post("/planned-analyses/ensure-defaults", json={"sample_ids": sample_ids}, headers=admin_headers)
+    assert again.status_code == 200
+    assert again.json() == []
+
+    events = client.get(
+        "/admin/events",
+        params={"entity_type": "planned_analysis", "entity_id": str(created[0]["id"])},
+        headers=admin_headers,
+    )
+    assert [item["action"] for item in events.json()] == ["created"]
+
+    custom = client.post("/planned-analyses/ensure-defaults", json={"sample_ids": sample_ids, "methods": ["Custom"]})
+    assert custom.status_code == 200
+    assert custom.json() == []
+
+    duplicate = client.post("/planned-analyses", json={"sample_id": sample_ids[0], "analysis_type": "IR"})
+    assert duplicate.status_code == 409
+
+
+def test_ensure_default_analyses_skips_pairs_inserted_concurrently(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    make_sample_payload: Callable[..., dict[str, str]],
+    monkeypatch,
+):
+    from backend import main
+    from backend.database import SessionLocal
+    from backend.models import PlannedAnalysisModel
+
+    sample_id = "S-DEF-RACE"
+    assert client.post("/samples", json=make_sample_payload(sample_id=sample_id)).status_code == 201
+    transaction_revision = main.transaction_revision
+
+    def racing_transaction_revision(db):
+        # Another request commits the same pair between the existence check and the insert.
+        other = SessionLocal()
+        try:
+            other.add(PlannedAnalysisModel(sample_id=sample_id, analysis_type="SARA"))
+            other.commit()
+        finally:
+            other.close()
+        return transaction_revision(db)
+
+    monkeypatch.setattr(main, "transaction_revision", racing_transaction_revision)
+    res = client.post("/planned-analyses/ensure-defaults", json={"sample_ids": [sample_id]}, headers=admin_headers)
+    assert res.status_code == 200, res.text
+    assert sorted(item["analysis_type"] for item in res.json()) == ["Electrophoresis", "IR", "Mass Spectrometry", "Viscosity"]
+
+
+def test_request_audit_events_are_written_in_one_insert_and_commit(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    make_sample_payload: Callable[..., dict[str, str]],
+):
+    sample_ids = [f"S-QB-{next(_sample_seq):03d}" for _ in range(4)]
+    for sample_id in sample_ids:
+        assert client.post("/samples", json=make_sample_payload(sample_id=sample_id)).status_code == 201
+
+    commits: list[object] = []
+
+    def _record_commit(conn):
+        commits.append(conn)
+
+    event.listen(engine, "commit", _record_commit)
+    try:
+        with count_statements() as statements:
+            res = client.request("DELETE", "/admin/samples", json={"sample_ids": sample_ids}, headers=admin_headers)
+    finally:
+        event.remove(engine, "commit", _record_commit)
+    assert res.status_code == 200, res.text
+    assert res.json()["deleted"] == 4
+    assert len(commits) == 1
+    audit_inserts = [sql for sql in statements if sql.lstrip().upper().startswith("INSERT INTO AUDIT_LOG")]
+    assert len(audit_inserts) == 1
+
+    events = client.get("/admin/events", params={"action": "delete", "entity_type": "sample"}, headers=admin_headers)
+    logged = {item["entity_id"] for item in events.json()}
+    assert set(sample_ids) <= logged
+
+
+def test_bulk_sample_registration_batches_lookups_and_audit(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    make_sample_payload: Callable[..., dict[str, str]],
+):
+    existing = make_sample_payload(sample_id=f"S-QB-{next(_sample_seq):03d}")
+    assert client.post("/samples", json=existing).status_code == 201
+    rows = [make_sample_payload(sample_id=f"S-QB-{next(_sample_seq):03d}") for _ in range(20)]
+    rows += [existing, {**rows[0]}, {**rows[1], "sample_id": "S-QB-BAD", "arrival_date": "2020-01-01"}]
+
+    with count_statements() as statements:
+        res = client.post("/samples/bulk", json={"samples": rows}, headers={"x-user": "Intake"})
+    assert res.status_code == 200, res.text
+    report = res.json()
+    assert report["created"] == 20
+    assert report["failed"] == 3
+    assert [(error["row"], error["error"]) for error in report["errors"]] == [
+        (22, "Duplicate sample_id in upload"),
+        (23, "arrival_date cannot be before sampling_date"),
+        (21, "Sample exists"),
+    ]
+    sample_inserts = [sql for sql in statements if sql.lstrip().upper().startswith("INSERT INTO SAMPLES")]
+    audit_inserts = [sql for sql in statements if sql.lstrip().upper().startswith("INSERT INTO AUDIT_LOG")]
+    lookups = [sql for sql in statements if "FROM samples" in sql]
+    assert len(sample_inserts) <= 1
+    assert len(audit_inserts) == 1
+    assert len(lookups) == 1
+
+    events = client.get("/admin/events", params={"action": "bulk_create"}, headers=admin_headers)
+    assert events.json()[0]["performed_by"] == "Intake"
+    assert events.json()[0]["details"].startswith("count:20;")
+
+
+def test_bulk_sample_registration_reports_concurrently_registered_ids(
+    client: TestClient,
+    monkeypatch,
+    make_sample_payload: Callable[..., dict[str, str]],
+):
+    from datetime import date
+
+    from backend import sample_import
+    from backend.database import SessionLocal
+    from backend.models import SampleModel
+
+    rows = [make_sample_payload(sample_id=f"S-QB-{next(_sample_seq):03d}") for _ in range(3)]
+    transaction_revision = sample_import.transaction_revision
+
+    def racing_transaction_revision(db):
+        # Another request registers one of the ids between the lookup and the insert.
+        other = SessionLocal()
+        try:
+            row = rows[1]
+            other.add(
+                SampleModel(
+                    sample_id=row["sample_id"],
+                    well_id=row["well_id"],
+                    horizon=row["horizon"],
+                    sampling_date=date.fromisoformat(row["sampling_date"]),
+                    arrival_date=date.fromisoformat(row["arrival_date"]),
+                )
+            )
+            other.commit()
+        finally:
+            other.close()
+        return transaction_revision(db)
+
+    monkeypatch.setattr(sample_import, "transaction_revision", racing_transaction_revision)
+    res = client.post("/samples/bulk", json={"samples": rows}, headers={"x-user": "Intake"})
+    assert res.status_code == 200, res.text
+    assert res.json() == {
+        "created": 2,
+        "failed": 1,
+        "errors": [{"row": 2, "sample_id": rows[1]["sample_id"], "error": "Sample exists"}],
+    }
+    assert client.get(f"/samples/{rows[2]['sample_id']}").status_code == 200
+
+
+def test_bulk_sample_registration_caps_the_json_body(client: TestClient):
+    from backend.main import SAMPLE_BULK_MAX_ROWS
+
+    res = client.post("/samples/bulk", json={"samples": [{}] * (SAMPLE_BULK_MAX_ROWS + 1)})
+    assert res.status_code == 422
+
+
+def test_bulk_analysis_update_statements_do_not_grow_with_batch_size(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    canonical_users: dict[str, dict],
+    make_sample_payload: Callable[..., dict[str, str]],
+):
+    assignee = canonical_users["lab"]["full_name"]
+
+    def _create_analyses(total: int) -> list[int]:
+        ids = []
+        for _ in range(total):
+            sample = make_sample_payload(sample_id=f"S-QB-{next(_sample_seq):03d}")
+            assert client.post("/samples", json=sample).status_code == 201
+            res = client.post(
+                "/planned-analyses", json={"sample_id": sample["sample_id"], "analysis_type": "SARA"}, headers=admin_headers
+            )
+            ids.append(res.json()["id"])
+        return ids
+
+    warm_ids, small_ids, large_ids = _create_analyses(1), _create_analyses(2), _create_analyses(8)
+    body = {"status": "in_progress", "assigned_to": [assignee]}
+    # Warm the user directory cache so both measured calls resolve assignees the same way.
+    assert client.patch("/planned-analyses/bulk", json={**body, "ids": warm_ids}, headers=admin_headers).status_code == 200
+    with count_statements() as small:
+        res = client.patch("/planned-analyses/bulk", json={**body, "ids": small_ids}, headers=admin_headers)
+    assert res.status_code == 200, res.text
+    with count_statements() as large:
+        res = client.patch("/planned-analyses/bulk", json={**body, "ids": large_ids}, headers=admin_headers)
+    assert res.status_code == 200, res.text
+    assert len(large) == len(small)
+    assert {item["status"] for item in res.json()} == {"in_progress"}
+    assert all(item["assigned_to"] == [assignee] for item in res.json())
+
+    listed = {item["id"]: item for item in client.get("/planned-analyses").json()}
+    assert listed[large_ids[-1]]["assigned_to"] == [assignee]
+    events = client.get(
+        "/admin/events", params={"entity_type": "planned_analysis", "entity_id": str(large_ids[0])}, headers=admin_headers
+    ).json()
+    assert {item["action"] for item in events} >= {"status_change", "operator_assigned"}
+
+    missing = client.patch("/planned-analyses/bulk", json={"ids": [large_ids[0], 999999], "status": "review"}, headers=admin_headers)
+    assert missing.status_code == 404
+    assert {item["id"]: item for item in client.get("/planned-analyses").json()}[large_ids[0]]["status"] == "in_progress"
+    unknown = client.patch("/planned-analyses/bulk", json={"ids": large_ids, "assigned_to": ["Nobody Here"]}, headers=admin_headers)
+    assert unknown.status_code == 400
+
+
+def test_admin_user_listing_loads_permissions_in_one_statement(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    user_factory,
+):
+    user_factory(role="lab_operator", method_permissions=["SARA"])
+    with count_statements() as small:
+        res = client.get("/admin/users", headers=admin_headers)
+    assert res.status_code == 200
+    small_total = len(res.json())
+
+    for _ in range(4):
+        user_factory(role="lab_operator", method_permissions=["IR", "Viscosity"])
+    with count_statements() as large:
+        res = client.get("/admin/users", headers=admin_headers)
+    assert res.status_code == 200
+    assert len(res.json()) == small_total + 4
+    assert len(large) == len(small) == 2
+
+
+def test_concurrent_planned_analysis_create_returns_conflict(
+    client: TestClient,
+    make_sample_payload: Callable[..., dict[str, str]],
+):
+    from backend.database import SessionLocal
+    from backend.models import PlannedAnalysisModel
+
+    sample_id = "S-CREATE-RACE"
+    assert client.post("/samples", json=make_sample_payload(sample_id=sample_id)).status_code == 201
+
+    def insert_same_pair(session, flush_context, instances):
+        # Another request commits the same pair between the existence check and the flush.
+        other = SessionLocal()
+        try:
+            other.add(PlannedAnalysisModel(sample_id=sample_id, analysis_type="IR"))
+            other.commit()
+        finally:
+            other.close()
+
+    event.listen(SessionLocal, "before_flush", insert_same_pair, once=True, insert=True)
+    try:
+        res = client.post("/planned-analyses", json={"sample_id": sample_id, "analysis_type": "IR"})
+    finally:
+        if event.contains(SessionLocal, "before_flush", insert_same_pair):
+            event.remove(SessionLocal, "before_flush", insert_same_pair)
+    assert res.status_code == 409, res.text
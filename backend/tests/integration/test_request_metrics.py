@@ -0,0 +1,69 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.request_metrics import RequestMetricsMiddleware
+
+
+def test_responses_carry_server_timing_with_query_count(client: TestClient, admin_headers: dict[str, str]):
+    res = client.get("/admin/users", headers=admin_headers)
+    assert res.status_code == 200
+    timing = res.headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    queries = int(timing.split('desc="')[1].split(" ")[0])
+    assert queries >= 1
+    assert "app;dur=" in timing
+
+
+def test_requests_over_the_query_threshold_are_logged_with_statements(client: TestClient, monkeypatch, caplog):
+    stack = main.app.middleware_stack
+    while stack is not None and not isinstance(stack, RequestMetricsMiddleware):
+        stack = getattr(stack, "app", None)
+    assert stack is not None
+    monkeypatch.setattr(stack, "slow_queries", 1)
+
+    with caplog.at_level(logging.WARNING, logger="backend.request_metrics"):
+        assert client.get("/planned-analyses").status_code == 200
+    messages = [record.getMessage() for record in caplog.records if record.name == "backend.request_metrics"]
+    assert any("GET /planned-analyses -> 200" in message and "FROM planned_analyses" in message for message in messages)
+
+
+def test_profile_mode_is_admin_only(
+    client: TestClient,
+    admin_headers: dict[str, str],
+    admin_token_headers: dict[str, str],
+):
+    profiled = client.get("/planned-analyses", params={"profile": "1"}, headers=admin_token_headers)
+    assert profiled.status_code == 200
+    assert profiled.headers["content-type"].startswith("text/plain")
+    assert "GET /planned-analyses -> 200" in profiled.text
+    assert "function calls" in profiled.text
+    assert "list_planned_analyses" in profiled.text
+
+    plain = client.get("/planned-analyses", params={"profile": "1"}, headers={"x-role": "lab_operator"})
+    assert plain.status_code == 200
+    assert isinstance(plain.json(), list)
+
+    # Role headers are not enough: profiling needs a verified admin session.
+    spoofed = client.get("/planned-analyses", params={"profile": "1"}, headers=admin_headers)
+    assert spoofed.status_code == 200
+    assert isinstance(spoofed.json(), list)
+
+
+def test_prometheus_metrics_use_route_templates(client: TestClient, admin_headers: dict[str, str]):
+    assert client.get("/samples/S-METRICS-MISSING").status_code == 404
+    assert client.post("/auth/login", json={"username": "admin", "password": "wrong"}).status_code == 401
+    client.patch("/admin/users/999999", json={"full_name": "Nobody"}, headers=admin_headers)
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    text = res.text
+    assert 'labsync_http_requests_total{method="GET",route="/samples/{sample_id}",status="404"}' in text
+    assert "S-METRICS-MISSING" not in text
+    assert 'labsync_http_request_duration_seconds_bucket{le="0.005",method="GET",route="/samples/{sample_id}"}' in text
+    assert 'labsync_http_requests_in_progress{method="GET",route="/metrics"} 1.0' in text
+    assert 'labsync_sql_statement_duration_seconds_count{operation="SELECT"}' in text
+    assert 'labsync_password_hash_duration_seconds_count{operation="verify"}' in text
+    assert "labsync_audit_events_written_total" in text
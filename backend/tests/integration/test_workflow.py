@@ -461,3 +461,399 @@ def test_admin_event_log_listing(client):
     data = res.json()
     assert isinstance(data, list)
     assert any(item["entity_type"] == "sample" and item["entity_id"] == "S-205" for item in data)
+
+
+def test_admin_event_log_filters_and_keyset_pagination(client):
+    sample_payload = {
+        "sample_id": "S-206",
+        "well_id": "W-25",
+        "horizon": "H7",
+        "sampling_date": "2024-01-01",
+        "arrival_date": "2024-01-02",
+        "status": "new",
+        "storage_location": "Shelf G",
+    }
+    assert client.post("/samples", json=sample_payload).status_code == 201
+    for location in ("Shelf G1", "Shelf G2", "Shelf G3"):
+        res = client.patch("/samples/S-206", json={"storage_location": location}, headers={"x-user": "Pager"})
+        assert res.status_code == 200
+
+    params = {"entity_type": "sample", "entity_id": "S-206", "actor": "Pager", "sort": "asc", "limit": 2}
+    first = client.get("/admin/events", params=params, headers={"x-role": "admin"})
+    assert first.status_code == 200
+    first_page = first.json()
+    assert [item["details"] for item in first_page] == [
+        "storage_location:Shelf G->Shelf G1",
+        "storage_location:Shelf G1->Shelf G2",
+    ]
+    cursor = first.headers.get("x-next-cursor")
+    assert cursor
+
+    second = client.get("/admin/events", params={**params, "cursor": cursor}, headers={"x-role": "admin"})
+    assert second.status_code == 200
+    assert [item["details"] for item in second.json()] == ["storage_location:Shelf G2->Shelf G3"]
+    assert "x-next-cursor" not in second.headers
+
+    invalid = client.get("/admin/events", params={"cursor": "not-a-cursor"}, headers={"x-role": "admin"})
+    assert invalid.status_code == 400
+
+    from backend.main import encode_cursor
+
+    text_id = encode_cursor(["2024-01-01T00:00:00", "x"])
+    assert client.get("/admin/events", params={"cursor": text_id}, headers={"x-role": "admin"}).status_code == 400
+
+
+def test_admin_event_log_actor_and_entity_filters_ignore_case(client):
+    sample_payload = {
+        "sample_id": "S-206-Case",
+        "well_id": "W-25",
+        "horizon": "H7",
+        "sampling_date": "2024-01-01",
+        "arrival_date": "2024-01-02",
+    }
+    assert client.post("/samples", json=sample_payload).status_code == 201
+    res = client.patch("/samples/S-206-Case", json={"storage_location": "Shelf K"}, headers={"x-user": "Alice Case"})
+    assert res.status_code == 200
+
+    for params in ({"actor": "alice case"}, {"actor": "ALICE"}, {"entity_id": "s-206-case"}, {"entity_id": "S-206-C"}):
+        res = client.get("/admin/events", params={"entity_type": "sample", **params}, headers={"x-role": "admin"})
+        assert res.status_code == 200
+        assert [(item["entity_id"], item["performed_by"]) for item in res.json()] == [("S-206-Case", "Alice Case")]
+    assert client.get("/admin/events", params={"actor": "lice"}, headers={"x-role": "admin"}).json() == []
+
+
+def test_admin_event_log_free_text_search(client):
+    sample_payload = {
+        "sample_id": "S-207-SEARCH",
+        "well_id": "W-26",
+        "horizon": "H8",
+        "sampling_date": "2024-01-01",
+        "arrival_date": "2024-01-02",
+        "status": "new",
+        "storage_location": "Vault Quartz",
+    }
+    assert client.post("/samples", json=sample_payload).status_code == 201
+    res = client.patch("/samples/S-207-SEARCH", json={"storage_location": "Vault Zircon"}, headers={"x-user": "Searcher"})
+    assert res.status_code == 200
+
+    by_details = client.get("/admin/events", params={"q": "ZIRCON"}, headers={"x-role": "admin"})
+    assert by_details.status_code == 200
+    assert [item["entity_id"] for item in by_details.json()] == ["S-207-SEARCH"]
+
+    by_entity = client.get("/admin/events", params={"q": "207-sea"}, headers={"x-role": "admin"})
+    assert by_entity.status_code == 200
+    assert any(item["details"] == "storage_location:Vault Quartz->Vault Zircon" for item in by_entity.json())
+
+    short_key = client.get("/admin/events", params={"q": "zi", "entity_id": "S-207-SEARCH"}, headers={"x-role": "admin"})
+    assert short_key.status_code == 200
+    assert len(short_key.json()) == 1
+
+    missing = client.get("/admin/events", params={"q": "no such text"}, headers={"x-role": "admin"})
+    assert missing.status_code == 200
+    assert missing.json() == []
+
+
+def test_audit_retention_archives_old_months_and_flags_archived_ranges(client, tmp_path, monkeypatch):
+    import gzip
+    import json
+    from datetime import datetime, timezone
+
+    from sqlalchemy import insert, select
+
+    from backend import main
+    from backend.audit_retention import run_retention
+    from backend.database import SessionLocal
+    from backend.models import AuditLogModel
+
+    old_events = [
+        {"entity_type": "sample", "entity_id": "S-ARCHIVE-1", "action": "created", "performed_by": "Archivist",
+         "performed_at": datetime(2019, 3, 5, 10, 0, tzinfo=timezone.utc), "details": None},
+        {"entity_type": "sample", "entity_id": "S-ARCHIVE-2", "action": "created", "performed_by": "Archivist",
+         "performed_at": datetime(2019, 3, 20, 10, 0, tzinfo=timezone.utc), "details": "second"},
+        {"entity_type": "sample", "entity_id": "S-ARCHIVE-3", "action": "created", "performed_by": "Archivist",
+         "performed_at": datetime(2019, 5, 1, 0, 0, tzinfo=timezone.utc), "details": None},
+    ]
+    db = SessionLocal()
+    try:
+        db.execute(insert(AuditLogModel), old_events)
+        db.commit()
+        archives = run_retention(db, older_than_months=12, archive_dir=tmp_path)
+        assert [(a.range_start.month, a.row_count) for a in archives] == [(3, 2), (5, 1)]
+        remaining = db.execute(select(AuditLogModel).where(AuditLogModel.performed_by == "Archivist")).scalars().all()
+        assert remaining == []
+    finally:
+        db.close()
+
+    with gzip.open(tmp_path / "audit_log_201903.jsonl.gz", "rt", encoding="utf-8") as archive:
+        rows = [json.loads(line) for line in archive]
+    assert [row["entity_id"] for row in rows] == ["S-ARCHIVE-1", "S-ARCHIVE-2"]
+    assert rows[1]["performed_at"] == "2019-03-20T10:00:00+00:00"
+
+    first_page = client.get("/admin/events", params={"limit": 1}, headers={"x-role": "admin"})
+    assert first_page.status_code == 200
+    assert "x-next-cursor" in first_page.headers
+    assert "x-audit-archived-ranges" not in first_page.headers
+
+    older = client.get("/admin/events", params={"until": "2019-06-01T00:00:00Z"}, headers={"x-role": "admin"})
+    assert older.status_code == 200
+    assert older.json() == []
+    assert "2019-03-01T00:00:00+00:00/2019-04-01T00:00:00+00:00" in older.headers["x-audit-archived-ranges"]
+
+    monkeypatch.setattr(main, "AUDIT_ARCHIVED_RANGES_LIMIT", 1)
+    capped = client.get("/admin/events", params={"until": "2019-06-01T00:00:00Z"}, headers={"x-role": "admin"})
+    assert capped.headers["x-audit-archived-ranges"] == "2019-05-01T00:00:00+00:00/2019-06-01T00:00:00+00:00"
+
+    recent = client.get("/admin/events", params={"since": "2024-01-01T00:00:00Z"}, headers={"x-role": "admin"})
+    assert recent.status_code == 200
+    assert "x-audit-archived-ranges" not in recent.headers
+
+
+def test_audit_retention_never_overwrites_an_earlier_archive(client, tmp_path):
+    from datetime import datetime, timezone
+
+    from sqlalchemy import insert
+
+    from backend.audit_retention import run_retention
+    from backend.database import SessionLocal
+    from backend.models import AuditLogModel
+
+    def event(entity_id: str) -> dict:
+        return {"entity_type": "sample", "entity_id": entity_id, "action": "created", "performed_by": "Rearchivist",
+                "performed_at": datetime(2018, 7, 9, 8, 0, tzinfo=timezone.utc), "details": None}
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(AuditLogModel), [event("S-REARCHIVE-1")])
+        db.commit()
+        first = run_retention(db, older_than_months=12, archive_dir=tmp_path)
+        db.execute(insert(AuditLogModel), [event("S-REARCHIVE-2"), event("S-REARCHIVE-3")])
+        db.commit()
+        second = run_retention(db, older_than_months=12, archive_dir=tmp_path)
+        assert [(a.location, a.row_count) for a in first] == [(str(tmp_path / "audit_log_201807.jsonl.gz"), 1)]
+        assert [(a.location, a.row_count) for a in second] == [(str(tmp_path / "audit_log_201807.v2.jsonl.gz"), 2)]
+    finally:
+        db.close()
+
+    assert (tmp_path / "audit_log_201807.jsonl.gz").exists()
+
+
+def test_audit_partition_errors_are_logged_not_raised(client, monkeypatch, caplog):
+    import logging
+    from datetime import datetime, timezone
+
+    from sqlalchemy.exc import OperationalError
+
+    from backend import audit_retention
+    from backend.database import engine
+
+    attempted = []
+
+    def create_month_partition(connection, start):
+        attempted.append(start.month)
+        if start.month == 2:
+            raise OperationalError("CREATE TABLE audit_log_p202602", {}, Exception("default partition holds rows"))
+
+    monkeypatch.setattr(audit_retention, "is_partitioned", lambda connection: True)
+    monkeypatch.setattr(audit_retention, "create_month_partition", create_month_partition)
+    with caplog.at_level(logging.ERROR, logger="backend.audit_retention"), engine.begin() as connection:
+        audit_retention.ensure_audit_partitions(connection, start=datetime(2026, 1, 1, tzinfo=timezone.utc), months_ahead=0)
+    assert attempted[:3] == [1, 2, 3]
+    assert any("2026-02" in record.getMessage() for record in caplog.records)
+
+
+def test_admin_event_export_streams_csv_and_ndjson(client):
+    import csv
+    import io
+    import json
+
+    sample_payload = {
+        "sample_id": "S-208-EXPORT",
+        "well_id": "W-27",
+        "horizon": "H9",
+        "sampling_date": "2024-01-01",
+        "arrival_date": "2024-01-02",
+        "status": "new",
+        "storage_location": "Shelf X",
+    }
+    assert client.post("/samples", json=sample_payload).status_code == 201
+    for location in ("Shelf X1", "Shelf X2"):
+        res = client.patch("/samples/S-208-EXPORT", json={"storage_location": location}, headers={"x-user": "Exporter"})
+        assert res.status_code == 200
+
+    assert client.get("/admin/events/export").status_code == 403
+    assert client.get("/admin/events/export", params={"format": "xml"}, headers={"x-role": "admin"}).status_code == 400
+
+    params = {"entity_id": "S-208-EXPORT", "actor": "Exporter"}
+    as_csv = client.get("/admin/events/export", params=params, headers={"x-role": "admin"})
+    assert as_csv.status_code == 200
+    assert as_csv.headers["content-type"].startswith("text/csv")
+    assert "attachment" in as_csv.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(as_csv.text)))
+    assert [row["details"] for row in rows] == [
+        "storage_location:Shelf X->Shelf X1",
+        "storage_location:Shelf X1->Shelf X2",
+    ]
+
+    as_ndjson = client.get(
+        "/admin/events/export", params={**params, "format": "ndjson", "sort": "desc"}, headers={"x-role": "admin"}
+    )
+    assert as_ndjson.status_code == 200
+    events = [json.loads(line) for line in as_ndjson.text.splitlines()]
+    assert [event["details"] for event in events] == [
+        "storage_location:Shelf X1->Shelf X2",
+        "storage_location:Shelf X->Shelf X1",
+    ]
+    assert events[0]["performed_by"] == "Exporter"
+
+
+def test_sample_listing_filters_paginates_and_projects(client):
+    for index, arrival in enumerate(["2024-03-03", "2024-03-01", "2024-03-02", "2024-04-01"], start=1):
+        payload = {
+            "sample_id": f"S-PAGE-{index}",
+            "well_id": "W-PAGE",
+            "horizon": "H-PAGE",
+            "sampling_date": "2024-02-01",
+            "arrival_date": arrival,
+            "status": "new",
+            "storage_location": "Shelf P",
+        }
+        assert client.post("/samples", json=payload).status_code == 201
+
+    params = {"well_id": "W-PAGE", "arrival_to": "2024-03-31", "order_by": "arrival_date", "limit": 2, "fields": "arrival_date"}
+    first = client.get("/samples", params=params)
+    assert first.status_code == 200
+    assert first.json() == [
+        {"sample_id": "S-PAGE-2", "arrival_date": "2024-03-01"},
+        {"sample_id": "S-PAGE-3", "arrival_date": "2024-03-02"},
+    ]
+    cursor = first.headers.get("x-next-cursor")
+    assert cursor
+
+    second = client.get("/samples", params={**params, "cursor": cursor})
+    assert second.status_code == 200
+    assert second.json() == [{"sample_id": "S-PAGE-1", "arrival_date": "2024-03-03"}]
+    assert "x-next-cursor" not in second.headers
+
+    by_id = client.get("/samples", params={"horizon": "H-PAGE", "sort": "desc", "fields": "status"})
+    assert [row["sample_id"] for row in by_id.json()] == ["S-PAGE-4", "S-PAGE-3", "S-PAGE-2", "S-PAGE-1"]
+    assert by_id.json()[0] == {"sample_id": "S-PAGE-4", "status": "new"}
+
+    full = client.get("/samples", params={"well_id": "W-PAGE", "arrival_from": "2024-04-01"})
+    assert full.json()[0]["storage_location"] == "Shelf P"
+    assert len(full.json()) == 1
+
+    assert client.get("/samples", params={"fields": "nope"}).status_code == 400
+    assert client.get("/samples", params={"arrival_from": "03/01/2024"}).status_code == 400
+    assert client.get("/samples", params={"order_by": "horizon"}).status_code == 400
+
+    from backend.main import encode_cursor
+
+    for bad in ([20240301, "S-PAGE-2"], ["2024-03-01", 7], ["not-a-date", "S-PAGE-2"]):
+        assert client.get("/samples", params={**params, "cursor": encode_cursor(bad)}).status_code == 400
+    assert client.get("/samples", params={"limit": 2, "cursor": encode_cursor([42])}).status_code == 400
+
+
+def test_sample_sampling_date_range_and_order(client):
+    for index, sampled in enumerate(["2023-12-31", "2024-01-15", "2024-01-02"], start=1):
+        payload = {
+            "sample_id": f"S-DATE-{index}",
+            "well_id": "W-DATE",
+            "horizon": "H-DATE",
+            "sampling_date": sampled,
+            "arrival_date": "2024-02-01",
+            "status": "new",
+            "storage_location": "Shelf D",
+        }
+        assert client.post("/samples", json=payload).status_code == 201
+
+    res = client.get(
+        "/samples",
+        params={
+            "well_id": "W-DATE",
+            "sampling_from": "2024-01-01",
+            "sampling_to": "2024-01-31",
+            "order_by": "sampling_date",
+            "sort": "desc",
+            "fields": "sampling_date",
+        },
+    )
+    assert res.status_code == 200
+    assert res.json() == [
+        {"sample_id": "S-DATE-2", "sampling_date": "2024-01-15"},
+        {"sample_id": "S-DATE-3", "sampling_date": "2024-01-02"},
+    ]
+    assert client.get("/samples", params={"order_by": "sampling_date", "cursor": "bad"}).status_code == 400
+
+
+def test_sample_csv_import_streams_rows_and_reports_errors(client):
+    body = (
+        "Sample_ID,well_id,horizon,sampling_date,arrival_date,storage_location\n"
+        "S-CSV-1,W-CSV,H1,2024-05-01,2024-05-02,\"Shelf, A\"\n"
+        "S-CSV-2,W-CSV,H1,2024-05-01,05/02/2024,Shelf B\n"
+        "\n"
+        "S-CSV-3,W-CSV,H1,2024-05-01,2024-05-03,Shelf C\n"
+    )
+    res = client.post("/samples/import", content=body.encode("utf-8"), headers={"content-type": "text/csv"})
+    assert res.status_code == 200, res.text
+    assert res.json() == {
+        "created": 2,
+        "failed": 1,
+        "errors": [{"row": 3, "sample_id": "S-CSV-2", "error": "arrival_date must be in YYYY-MM-DD format"}],
+    }
+    imported = client.get("/samples", params={"well_id": "W-CSV", "fields": "storage_location"}).json()
+    assert imported == [
+        {"sample_id": "S-CSV-1", "storage_location": "Shelf, A"},
+        {"sample_id": "S-CSV-3", "storage_location": "Shelf C"},
+    ]
+
+
+def test_bulk_sample_registration_reports_non_object_rows(client, make_sample_payload):
+    row = make_sample_payload(sample_id="S-BULK-OBJ-1")
+    res = client.post("/samples/bulk", json={"samples": [row, "S-BULK-OBJ-2", None]})
+    assert res.status_code == 200, res.text
+    assert res.json() == {
+        "created": 1,
+        "failed": 2,
+        "errors": [
+            {"row": 2, "sample_id": None, "error": "Row must be an object"},
+            {"row": 3, "sample_id": None, "error": "Row must be an object"},
+        ],
+    }
+
+
+def test_bulk_sample_update_applies_one_change_to_many_samples(client):
+    sample_ids = [f"S-BULK-{index}" for index in range(3)]
+    for sample_id in sample_ids:
+        payload = {
+            "sample_id": sample_id,
+            "well_id": "W-BULK",
+            "horizon": "H-BULK",
+            "sampling_date": "2024-06-01",
+            "arrival_date": "2024-06-02",
+            "storage_location": "Shelf B",
+            "assigned_to": "Someone",
+        }
+        assert client.post("/samples", json=payload).status_code == 201
+
+    res = client.patch(
+        "/samples/bulk",
+        json={"sample_ids": sample_ids, "status": "review", "assigned_to": None},
+        headers={"x-user": "Tray Mover"},
+    )
+    assert res.status_code == 200, res.text
+    assert res.json() == {"updated": 3}
+    rows = client.get("/samples", params={"well_id": "W-BULK", "fields": "status,assigned_to,storage_location"}).json()
+    assert {(row["status"], row["assigned_to"], row["storage_location"]) for row in rows} == {("review", None, "Shelf B")}
+
+    events = client.get(
+        "/admin/events", params={"entity_type": "sample", "entity_id": sample_ids[0]}, headers={"x-role": "admin"}
+    ).json()
+    assert {(item["action"], item["details"]) for item in events} >= {
+        ("status_change", "status:new->review"),
+        ("updated", "assigned_to:Someone->"),
+    }
+
+    assert client.patch("/samples/bulk", json={"sample_ids": [sample_ids[0], "S-BULK-MISSING"], "status": "new"}).status_code == 404
+    assert client.get(f"/samples/{sample_ids[0]}").json()["status"] == "review"
+    assert client.patch("/samples/bulk", json={"sample_ids": sample_ids, "status": "bogus"}).status_code == 400
+    assert client.patch("/samples/bulk", json={"sample_ids": sample_ids}).status_code == 400
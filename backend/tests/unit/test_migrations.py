@@ -0,0 +1,168 @@
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+
+from backend.audit_search import SQLITE_FTS_TABLE, SQLITE_SEARCH_DDL
+
+ROOT = Path(__file__).resolve().parents[3]
+
+
+@pytest.fixture()
+def migrate(tmp_path, monkeypatch):
+    url = f"sqlite+pysqlite:///{tmp_path / 'migrate.db'}"
+    # alembic/env.py prefers DATABASE_URL over the config, so point it at the scratch database.
+    monkeypatch.setenv("DATABASE_URL", url)
+    config = Config()
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    engine = create_engine(url)
+    yield engine, config
+    engine.dispose()
+
+
+def test_0021_keeps_sqlite_audit_timestamps_and_search_triggers(migrate):
+    engine, config = migrate
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE audit_log (id INTEGER PRIMARY KEY, entity_type VARCHAR NOT NULL, entity_id VARCHAR NOT NULL, "
+                "action VARCHAR NOT NULL, performed_by VARCHAR, performed_at VARCHAR NOT NULL, details VARCHAR)"
+            )
+        )
+        for statement in SQLITE_SEARCH_DDL:
+            connection.execute(text(statement))
+        connection.execute(
+            text(
+                "INSERT INTO audit_log (id, entity_type, entity_id, action, performed_by, performed_at, details) VALUES "
+                "(1, 'sample', 'S-MIG-1', 'created', 'Alice', '2024-01-01T10:00:00+00:00', 'zircon'), "
+                "(2, 'sample', 'S-MIG-2', 'created', 'Bob', '2024-01-01T12:30:00.250000+02:00', NULL)"
+            )
+        )
+    command.stamp(config, "0020")
+
+    command.upgrade(config, "0021")
+    with engine.begin() as connection:
+        stored = connection.execute(text("SELECT performed_at FROM audit_log ORDER BY id")).scalars().all()
+        assert stored == ["2024-01-01 10:00:00.000000", "2024-01-01 10:30:00.250000"]
+        triggers = connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+        assert sorted(triggers) == ["audit_log_fts_ad", "audit_log_fts_ai", "audit_log_fts_au"]
+        connection.execute(
+            text(
+                "INSERT INTO audit_log (id, entity_type, entity_id, action, performed_by, performed_at, details) "
+                "VALUES (3, 'sample', 'S-MIG-3', 'created', 'Carol', '2024-02-01 00:00:00.000000', 'basalt')"
+            )
+        )
+        matches = connection.execute(
+            text(f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH '\"zircon\" OR \"basalt\"' ORDER BY rowid")
+        ).scalars().all()
+        assert matches == [1, 3]
+
+    command.downgrade(config, "0020")
+    with engine.begin() as connection:
+        stored = connection.execute(text("SELECT performed_at FROM audit_log ORDER BY id")).scalars().all()
+        assert stored == [
+            "2024-01-01T10:00:00.000000+00:00",
+            "2024-01-01T10:30:00.250000+00:00",
+            "2024-02-01T00:00:00.000000+00:00",
+        ]
+
+
+def test_0024_merges_duplicate_analyses_before_adding_the_unique_constraint(migrate):
+    engine, config = migrate
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE planned_analyses (id INTEGER PRIMARY KEY, sample_id VARCHAR NOT NULL, "
+                "analysis_type VARCHAR NOT NULL, status VARCHAR NOT NULL, assigned_to VARCHAR, updated_at VARCHAR, "
+                "revision INTEGER NOT NULL DEFAULT 0)"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE TABLE planned_analysis_assignees (id INTEGER PRIMARY KEY, analysis_id INTEGER NOT NULL, "
+                "assignee VARCHAR NOT NULL, updated_at VARCHAR, revision INTEGER NOT NULL DEFAULT 0, "
+                "CONSTRAINT uq_planned_analysis_assignee UNIQUE (analysis_id, assignee))"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO planned_analyses (id, sample_id, analysis_type, status, assigned_to) VALUES "
+                "(1, 'S-1', 'SARA', 'planned', 'Ann'), (2, 'S-1', 'SARA', 'in_progress', NULL), "
+                "(3, 'S-1', 'SARA', 'planned', NULL), (4, 'S-1', 'IR', 'planned', NULL), "
+                "(5, 'S-2', 'IR', 'review', 'Ben'), (6, 'S-2', 'IR', 'review', 'Cid')"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO planned_analysis_assignees (analysis_id, assignee) VALUES "
+                "(1, 'Ann'), (2, 'Dee'), (5, 'Ben'), (6, 'Cid'), (6, 'Ben')"
+            )
+        )
+    command.stamp(config, "0023")
+
+    command.upgrade(config, "0024")
+    with engine.begin() as connection:
+        rows = connection.execute(
+            text("SELECT id, status, assigned_to FROM planned_analyses ORDER BY id")
+        ).fetchall()
+        assert [tuple(row) for row in rows] == [(2, "in_progress", "Ann"), (4, "planned", None), (5, "review", "Ben")]
+        assignees = connection.execute(
+            text("SELECT analysis_id, assignee FROM planned_analysis_assignees ORDER BY analysis_id, assignee")
+        ).fetchall()
+        assert [tuple(row) for row in assignees] == [(2, "Ann"), (2, "Dee"), (5, "Ben"), (5, "Cid")]
+        with pytest.raises(Exception):
+            connection.execute(
+                text("INSERT INTO planned_analyses (sample_id, analysis_type, status) VALUES ('S-1', 'IR', 'planned')")
+            )
+
+
+def test_0017_backfills_identity_keys_on_sqlite(migrate):
+    engine, config = migrate
+    with engine.begin() as connection:
+        connection.execute(
+            text("CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR NOT NULL UNIQUE, full_name VARCHAR NOT NULL)")
+        )
+        connection.execute(text("INSERT INTO users (id, username, full_name) VALUES (1, ' Alice.W ', 'Alice Walker')"))
+    command.stamp(config, "0016")
+
+    command.upgrade(config, "0017")
+    with engine.begin() as connection:
+        row = connection.execute(text("SELECT username_key, full_name_key FROM users")).one()
+        assert tuple(row) == ("alice.w", "alice walker")
+        with pytest.raises(Exception):
+            connection.execute(text("INSERT INTO users (id, username, full_name) VALUES (2, 'bob', 'Bob')"))
+
+
+def test_0025_replaces_the_actor_index_with_lower_indexes(migrate):
+    engine, config = migrate
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE audit_log (id INTEGER PRIMARY KEY, entity_type VARCHAR NOT NULL, entity_id VARCHAR NOT NULL, "
+                "action VARCHAR NOT NULL, performed_by VARCHAR, performed_at DATETIME NOT NULL, details VARCHAR)"
+            )
+        )
+        connection.execute(text("CREATE INDEX ix_audit_log_performed_by_performed_at ON audit_log (performed_by, performed_at)"))
+    command.stamp(config, "0024")
+
+    def audit_indexes():
+        with engine.connect() as connection:
+            return sorted(
+                connection.execute(
+                    text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'audit_log'")
+                ).scalars()
+            )
+
+    command.upgrade(config, "0025")
+    assert audit_indexes() == ["ix_audit_log_entity_id_lower", "ix_audit_log_performed_by_lower"]
+    with engine.connect() as connection:
+        plan = connection.execute(
+            text("EXPLAIN QUERY PLAN SELECT id FROM audit_log WHERE lower(entity_id) = 's-1'")
+        ).all()
+    assert "ix_audit_log_entity_id_lower" in " ".join(str(row[-1]) for row in plan)
+
+    command.downgrade(config, "0024")
+    assert audit_indexes() == ["ix_audit_log_performed_by_performed_at"]
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from backend import security
+from backend.security import PasswordHasher, PasswordHasherBusy, hash_password, needs_rehash, verify_password
+
+
+def test_hashes_made_with_other_parameters_still_verify_but_need_rehash(monkeypatch):
+    current = hash_password("Tatneft123")
+    with monkeypatch.context() as patched:
+        patched.setattr(security, "SCRYPT_N", 2**10)
+        legacy = hash_password("Tatneft123")
+
+    assert verify_password("Tatneft123", current)
+    assert verify_password("Tatneft123", legacy)
+    assert not verify_password("wrong", legacy)
+    assert needs_rehash(current) is False
+    assert needs_rehash(legacy) is True
+    assert needs_rehash("not-a-hash") is True
+
+
+def test_hasher_bounds_pending_jobs_and_reports_metrics():
+    hasher = PasswordHasher(workers=0, max_pending=1, wait_seconds=0.05)
+    stored = hasher.hash("Tatneft123")
+    assert hasher.verify("Tatneft123", stored)
+
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow(_: str) -> str:
+        started.set()
+        release.wait(5)
+        return "done"
+
+    worker = threading.Thread(target=hasher._run, args=(slow, "x"))
+    worker.start()
+    try:
+        assert started.wait(5)
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash("Tatneft123")
+        assert hasher.metrics()["in_flight"] == 1
+    finally:
+        release.set()
+        worker.join()
+
+    metrics = hasher.metrics()
+    assert metrics["completed"] == 3
+    assert metrics["rejected"] == 1
+    assert metrics["in_flight"] == 0
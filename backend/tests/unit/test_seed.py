@@ -0,0 +1,44 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from backend.database import Base
+from backend.models import AuditLogModel, PlannedAnalysisAssigneeModel, PlannedAnalysisModel, SampleModel
+from backend.seed import SyntheticDataset, seed_synthetic
+
+SIZE = SyntheticDataset(samples=300, operators=12, conflict_rate=0.05, end=date(2026, 1, 1))
+
+
+def seeded_session() -> Session:
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    counts = seed_synthetic(db, SIZE)
+    db.commit()
+    assert counts["samples"] == 300
+    return db
+
+
+def snapshot(db: Session) -> list[tuple]:
+    return db.execute(
+        select(SampleModel.sample_id, SampleModel.well_id, SampleModel.horizon, SampleModel.sampling_date, SampleModel.status)
+        .order_by(SampleModel.sample_id)
+    ).all()
+
+
+def test_seed_synthetic_is_deterministic_and_consistent():
+    first, second = seeded_session(), seeded_session()
+    assert snapshot(first) == snapshot(second)
+
+    samples = first.execute(select(SampleModel)).scalars().all()
+    assert all(row.sampling_date < row.arrival_date <= SIZE.end for row in samples)
+    assert first.execute(select(func.count()).select_from(PlannedAnalysisModel)).scalar_one() == 600
+    assignees = first.execute(select(PlannedAnalysisAssigneeModel.assignee)).scalars().all()
+    assert assignees
+    latest_event = first.execute(select(func.max(AuditLogModel.performed_at))).scalar_one()
+    assert latest_event.date() <= SIZE.end
+
+    with pytest.raises(ValueError):
+        seed_synthetic(first, SIZE)
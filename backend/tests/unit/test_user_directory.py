@@ -0,0 +1,83 @@
+from sqlalchemy import event
+
+from backend.counters import bump_counter, read_counter
+from backend.database import SessionLocal, engine
+from backend.main import app  # noqa: F401 - creates tables and seeds the admin user
+from backend.user_directory import USER_DIRECTORY_VERSION_COUNTER, UserDirectoryCache
+
+
+def _count_statements(fn):
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return result, statements
+
+
+def test_cached_lookup_only_checks_version():
+    cache = UserDirectoryCache(ttl_seconds=60, max_entries=8)
+    db = SessionLocal()
+    try:
+        admin = cache.get(db, "  ADMIN ")
+        assert admin is not None
+        assert admin.has_role("admin")
+
+        again, statements = _count_statements(lambda: cache.get(db, "Admin User"))
+        assert again is not None
+        assert again.id == admin.id
+        assert len(statements) == 2  # version check + full-name key (new identity key)
+
+        cached, statements = _count_statements(lambda: cache.get(db, "admin"))
+        assert cached == admin
+        assert len(statements) == 1
+    finally:
+        db.close()
+
+
+def test_version_bump_from_another_session_invalidates_entries():
+    cache = UserDirectoryCache(ttl_seconds=60, max_entries=8)
+    reader = SessionLocal()
+    writer = SessionLocal()
+    try:
+        assert cache.get(reader, "admin") is not None
+        reader.commit()
+
+        bump_counter(writer, USER_DIRECTORY_VERSION_COUNTER)
+        writer.commit()
+
+        reloaded, statements = _count_statements(lambda: cache.get(reader, "admin"))
+        assert reloaded is not None
+        assert len(statements) > 1
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_bump_counter_creates_missing_rows_and_increments():
+    db = SessionLocal()
+    try:
+        assert read_counter(db, "test_counter_upsert") == 0
+        assert bump_counter(db, "test_counter_upsert") == 1
+        assert bump_counter(db, "test_counter_upsert") == 2
+        db.commit()
+        assert read_counter(db, "test_counter_upsert") == 2
+    finally:
+        db.close()
+
+
+def test_entries_expire_and_are_lru_bounded():
+    cache = UserDirectoryCache(ttl_seconds=0, max_entries=1)
+    db = SessionLocal()
+    try:
+        assert cache.get(db, "admin") is not None
+        _, statements = _count_statements(lambda: cache.get(db, "admin"))
+        assert len(statements) > 1
+        assert len(cache._users) == 1
+    finally:
+        db.close()
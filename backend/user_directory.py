@@ -0,0 +1,224 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+try:
+    from .counters import bump_counter, read_counter
+    from .models import UserMethodPermissionModel, UserModel, identity_key
+except ImportError:  # pragma: no cover
+    from counters import bump_counter, read_counter  # type: ignore
+    from models import UserMethodPermissionModel, UserModel, identity_key  # type: ignore
+
+
+USER_DIRECTORY_CACHE_TTL_SECONDS = float(os.getenv("USER_DIRECTORY_CACHE_TTL_SECONDS", "60"))
+USER_DIRECTORY_CACHE_MAX_ENTRIES = int(os.getenv("USER_DIRECTORY_CACHE_MAX_ENTRIES", "1024"))
+USER_DIRECTORY_VERSION_COUNTER = "user_directory"
+
+
+def parse_role_set(user: UserModel) -> frozenset[str]:
+    roles = [part.strip().lower() for part in (user.roles or "").split(",") if part.strip()]
+    if not roles and user.role:
+        roles = [user.role.strip().lower()]
+    return frozenset(roles)
+
+
+def dedupe_methods(methods: list[str]) -> tuple[str, ...]:
+    cleaned: list[str] = []
+    for item in methods:
+        name = (item or "").strip()
+        if name and name not in cleaned:
+            cleaned.append(name)
+    return tuple(cleaned)
+
+
+@dataclass(frozen=True)
+class DirectoryUser:
+    id: int
+    username: str
+    full_name: str
+    role_set: frozenset[str]
+    method_permissions: tuple[str, ...]
+
+    @property
+    def identity_keys(self) -> frozenset[str]:
+        return frozenset({identity_key(self.username), identity_key(self.full_name)})
+
+    @property
+    def method_keys(self) -> frozenset[str]:
+        return frozenset(method.lower() for method in self.method_permissions)
+
+    def has_role(self, role_name: str) -> bool:
+        return role_name.strip().lower() in self.role_set
+
+
+def find_user_by_identity(db: Session, identity: str | None) -> UserModel | None:
+    value = identity_key(identity)
+    if not value:
+        return None
+    return db.execute(
+        select(UserModel)
+        .where(or_(UserModel.username_key == value, UserModel.full_name_key == value))
+        .order_by(UserModel.id)
+        .limit(1)
+    ).scalars().first()
+
+
+def find_users_by_identities(db: Session, identities: list[str]) -> dict[str, UserModel]:
+    keys = {identity_key(identity) for identity in identities} - {""}
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(UserModel)
+        .where(or_(UserModel.username_key.in_(keys), UserModel.full_name_key.in_(keys)))
+        .order_by(UserModel.id)
+    ).scalars().all()
+    resolved: dict[str, UserModel] = {}
+    for user in rows:
+        for key in (user.username_key, user.full_name_key):
+            if key in keys:
+                resolved.setdefault(key, user)
+    return resolved
+
+
+def load_directory_users(db: Session, users: list[UserModel]) -> dict[int, DirectoryUser]:
+    methods_by_user: dict[int, list[str]] = {user.id: [] for user in users}
+    if methods_by_user:
+        rows = db.execute(
+            select(UserMethodPermissionModel.user_id, UserMethodPermissionModel.method_name)
+            .where(UserMethodPermissionModel.user_id.in_(list(methods_by_user)))
+            .order_by(UserMethodPermissionModel.id)
+        ).all()
+        for user_id, method_name in rows:
+            methods_by_user[user_id].append(method_name)
+    return {
+        user.id: DirectoryUser(
+            id=user.id,
+            username=user.username,
+            full_name=user.full_name,
+            role_set=parse_role_set(user),
+            method_permissions=dedupe_methods(methods_by_user[user.id]),
+        )
+        for user in users
+    }
+
+
+class UserDirectoryCache:
+    """Process-local LRU cache of users, their parsed roles and method permissions.
+
+    Entries are keyed by user id and by normalized identity (username or full name).
+    Writers bump a shared DB counter in their transaction; every lookup compares the
+    counter with the version the cache was filled at, so other workers drop stale
+    entries after a single primary-key read.
+    """
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._users: OrderedDict[int, tuple[float, DirectoryUser]] = OrderedDict()
+        self._identities: OrderedDict[str, int] = OrderedDict()
+        self._version: int | None = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+            self._identities.clear()
+            self._version = None
+
+    def _sync_version(self, db: Session) -> int:
+        version = read_counter(db, USER_DIRECTORY_VERSION_COUNTER)
+        with self._lock:
+            if self._version != version:
+                self._users.clear()
+                self._identities.clear()
+                self._version = version
+        return version
+
+    def _lookup(self, key: str) -> DirectoryUser | None:
+        user_id = self._identities.get(key)
+        if user_id is None:
+            return None
+        entry = self._users.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        self._identities.move_to_end(key)
+        self._users.move_to_end(user_id)
+        return entry[1]
+
+    def _store(self, version: int, key: str | None, user: DirectoryUser) -> None:
+        with self._lock:
+            if self._version != version:
+                return
+            self._users[user.id] = (time.monotonic() + self.ttl_seconds, user)
+            self._users.move_to_end(user.id)
+            if key:
+                self._identities[key] = user.id
+                self._identities.move_to_end(key)
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+            while len(self._identities) > self.max_entries:
+                self._identities.popitem(last=False)
+
+    def get_many(self, db: Session, identities: list[str]) -> dict[str, DirectoryUser]:
+        """Resolve identities to directory users, keyed by normalized identity."""
+        keys = [key for key in dict.fromkeys(identity_key(identity) for identity in identities) if key]
+        if not keys:
+            return {}
+        version = self._sync_version(db)
+        resolved: dict[str, DirectoryUser] = {}
+        with self._lock:
+            for key in keys:
+                cached = self._lookup(key)
+                if cached is not None:
+                    resolved[key] = cached
+        missing = [key for key in keys if key not in resolved]
+        if missing:
+            users_by_key = find_users_by_identities(db, missing)
+            rows_by_id = {user.id: user for user in users_by_key.values()}
+            loaded: dict[int, DirectoryUser] = {}
+            with self._lock:
+                for user_id in rows_by_id:
+                    entry = self._users.get(user_id)
+                    if entry is not None and entry[0] >= time.monotonic():
+                        loaded[user_id] = entry[1]
+            loaded.update(load_directory_users(db, [row for user_id, row in rows_by_id.items() if user_id not in loaded]))
+            for key, user in users_by_key.items():
+                resolved[key] = loaded[user.id]
+                self._store(version, key, loaded[user.id])
+        return resolved
+
+    def get(self, db: Session, identity: str | None) -> DirectoryUser | None:
+        return self.get_many(db, [identity or ""]).get(identity_key(identity))
+
+    def get_by_id(self, db: Session, user_id: int) -> DirectoryUser | None:
+        version = self._sync_version(db)
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._users.move_to_end(user_id)
+                return entry[1]
+        row = db.get(UserModel, user_id)
+        if row is None:
+            return None
+        user = load_directory_users(db, [row])[row.id]
+        self._store(version, None, user)
+        return user
+
+    def invalidate(self, db: Session) -> None:
+        """Mark directory data as changed; takes effect for all workers when db commits."""
+        transaction = db.get_transaction()
+        if transaction is None or db.info.get("user_directory_invalidated") is not transaction:
+            bump_counter(db, USER_DIRECTORY_VERSION_COUNTER)
+            db.info["user_directory_invalidated"] = db.get_transaction()
+        self.clear()
+
+
+user_directory = UserDirectoryCache(
+    ttl_seconds=USER_DIRECTORY_CACHE_TTL_SECONDS,
+    max_entries=USER_DIRECTORY_CACHE_MAX_ENTRIES,
+)
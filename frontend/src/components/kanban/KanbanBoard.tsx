@@ -6,7 +6,7 @@ import { getColumnData, getMockCards, columnConfigByRole } from '@/data/mockData
 import { KanbanCard, CommentThread, DeletedInfo, NewCardPayload, PlannedAnalysisCard, Role } from '@/types/kanban';
 import { Button } from '@/components/ui/button';
 import { NewCardDialog } from './NewCardDialog';
-import { createActionBatch, createConflict, createPlannedAnalysis, createSample, deleteSample, fetchActionBatches, fetchConflicts, fetchFilterMethods, fetchPlannedAnalyses, fetchSamples, fetchUsers, mapApiAnalysis, resolveConflict, updateFilterMethods, updatePlannedAnalysis, updateSampleFields, updateSampleStatus } from '@/lib/api';
+import { createActionBatch, createConflict, createPlannedAnalysis, createSample, deleteSample, ensureDefaultAnalyses, fetchActionBatches, fetchBoard, fetchBoardChanges, fetchConflicts, fetchFilterMethods, fetchUsers, mapApiAnalysis, resolveConflict, subscribeToBoardChanges, updateFilterMethods, updatePlannedAnalysis, updateSampleFields, updateSampleStatus } from '@/lib/api';
 import { useToast } from '@/components/ui/use-toast';
 import { Popover, PopoverContent, PopoverTrigger } from '@/components/ui/popover';
 import { Command, CommandGroup, CommandItem } from '@/components/ui/command';
@@ -22,6 +22,8 @@ import { getMethodLabelShort } from '@/lib/method-labels';
 const STORAGE_KEY = 'labsync-kanban-cards';
 const DEFAULT_ANALYSIS_TYPES = ['SARA', 'IR', 'Mass Spectrometry', 'Viscosity', 'Electrophoresis'];
 const METHOD_BLACKLIST = ['fsf', 'dadq'];
+// Matches the backend's max_length for /planned-analyses/ensure-defaults.
+const ENSURE_DEFAULTS_CHUNK_SIZE = 5000;
 const LAB_OVERRIDES_KEY = 'labsync-lab-overrides';
 const LAB_RETURN_KEY = 'labsync-lab-returned';
 const WAREHOUSE_RETURN_KEY = 'labsync-warehouse-returned';
@@ -145,6 +147,12 @@ export function KanbanBoard({
   const [selectedCard, setSelectedCard] = useState<KanbanCard | null>(null);
   const [isPanelOpen, setIsPanelOpen] = useState(false);
   const { toast } = useToast();
+  const reportEnsureFailure = (err: unknown) =>
+    toast({
+      title: "Failed to create default analyses",
+      description: err instanceof Error ? err.message : "Backend unreachable",
+      variant: "destructive",
+    });
   const [initialLoad, setInitialLoad] = useState(true);
   const [newDialogOpen, setNewDialogOpen] = useState(false);
   const [methodFilter, setMethodFilter] = useState<string[]>([]);
@@ -490,9 +498,8 @@ export function KanbanBoard({
     const load = async () => {
       setLoading(true);
       try {
-        const [remoteSamples, remoteAnalyses, batches, conflictList, users, filterMethods] = await Promise.all([
-          fetchSamples(),
-          fetchPlannedAnalyses(),
+        const [{ samples: remoteSamples, plannedAnalyses: remoteAnalyses }, batches, conflictList, users, filterMethods] = await Promise.all([
+          fetchBoard(),
           fetchActionBatches(),
           fetchConflicts(),
           fetchUsers().catch(() => []),
@@ -504,9 +511,13 @@ export function KanbanBoard({
           .map(mapApiAnalysis);
         setPlannedAnalyses(initialAnalyses);
         // ensure all default methods exist per sample (adds missing ones such as IR)
-        for (const sample of remoteSamples) {
-          await ensureAnalyses(sample.sampleId, initialAnalyses, setPlannedAnalyses, DEFAULT_ANALYSIS_TYPES);
-        }
+        await ensureAnalyses(
+          remoteSamples.map((sample) => sample.sampleId),
+          initialAnalyses,
+          setPlannedAnalyses,
+          DEFAULT_ANALYSIS_TYPES,
+          reportEnsureFailure,
+        );
         setActionBatches(batches);
         setConflicts(conflictList);
         setLabOperators(
@@ -1979,7 +1990,7 @@ export function KanbanBoard({
     updateSampleStatus(apiSampleId, columnId)
       .then((updated) => {
         if (role === 'warehouse_worker' && columnId === 'review') {
-          ensureAnalyses(updated.sampleId, plannedAnalyses, setPlannedAnalyses, analysisTypes);
+          ensureAnalyses([updated.sampleId], plannedAnalyses, setPlannedAnalyses, analysisTypes, reportEnsureFailure);
         }
       })
       .catch((err) =>
@@ -2291,15 +2302,48 @@ export function KanbanBoard({
     });
   };
 
+  const syncRevisionRef = useRef(0);
+
   const refreshBoard = async (showLoading: boolean) => {
     if (showLoading) setLoading(true);
     try {
-      const [remoteSamples, remoteAnalyses] = await Promise.all([fetchSamples(), fetchPlannedAnalyses()]);
-      const normalizedAnalyses = remoteAnalyses.map(mapApiAnalysis);
-      setCards(remoteSamples);
-      setPlannedAnalyses(normalizedAnalyses);
-      for (const sample of remoteSamples) {
-        await ensureAnalyses(sample.sampleId, normalizedAnalyses, setPlannedAnalyses, DEFAULT_ANALYSIS_TYPES);
+      // Background polls only fetch rows changed since the last revision we applied.
+      const changes = await fetchBoardChanges(showLoading ? 0 : syncRevisionRef.current);
+      syncRevisionRef.current = changes.revision;
+      if (changes.full) {
+        setCards(changes.samples);
+        setPlannedAnalyses(changes.plannedAnalyses);
+        await ensureAnalyses(
+          changes.samples.map((sample) => sample.sampleId),
+          changes.plannedAnalyses,
+          setPlannedAnalyses,
+          DEFAULT_ANALYSIS_TYPES,
+          reportEnsureFailure,
+        );
+        return;
+      }
+      if (changes.samples.length > 0 || changes.deletedSamples.length > 0) {
+        const deletedSamples = new Set(changes.deletedSamples);
+        const changedSamples = new Map(changes.samples.map((card) => [card.sampleId, card]));
+        setCards((prev) => {
+          const next = prev
+            .filter((card) => !deletedSamples.has(card.sampleId))
+            .map((card) => changedSamples.get(card.sampleId) ?? card);
+          const known = new Set(next.map((card) => card.sampleId));
+          return [...next, ...changes.samples.filter((card) => !known.has(card.sampleId))];
+        });
+      }
+      if (changes.plannedAnalyses.length > 0 || changes.deletedPlannedAnalyses.length > 0 || changes.deletedSamples.length > 0) {
+        const deletedSamples = new Set(changes.deletedSamples);
+        const deletedAnalyses = new Set(changes.deletedPlannedAnalyses);
+        const changedAnalyses = new Map(changes.plannedAnalyses.map((pa) => [pa.id, pa]));
+        setPlannedAnalyses((prev) => {
+          const next = prev
+            .filter((pa) => !deletedAnalyses.has(pa.id) && !deletedSamples.has(pa.sampleId))
+            .map((pa) => changedAnalyses.get(pa.id) ?? pa);
+          const known = new Set(next.map((pa) => pa.id));
+          return [...next, ...changes.plannedAnalyses.filter((pa) => !known.has(pa.id))];
+        });
       }
     } catch (err) {
       if (showLoading) {
@@ -2319,19 +2363,30 @@ export function KanbanBoard({
   };
 
   useEffect(() => {
-    if (role !== 'admin') return;
-    const interval = setInterval(() => {
-      refreshBoard(false);
-    }, 8000);
-    return () => clearInterval(interval);
-  }, [role]);
-
-  useEffect(() => {
-    if (role !== 'lab_operator') return;
+    if (role !== 'admin' && role !== 'lab_operator') return;
+    // Changes are pushed over SSE; polling only runs while the stream is down.
+    let streamLive = false;
+    let pendingRefresh: ReturnType<typeof setTimeout> | undefined;
+    const unsubscribe = subscribeToBoardChanges(
+      () => {
+        if (pendingRefresh) return;
+        pendingRefresh = setTimeout(() => {
+          pendingRefresh = undefined;
+          refreshBoard(false);
+        }, 250);
+      },
+      (live) => {
+        streamLive = live;
+      },
+    );
     const interval = setInterval(() => {
-      refreshBoard(false);
+      if (!streamLive) refreshBoard(false);
     }, 8000);
-    return () => clearInterval(interval);
+    return () => {
+      unsubscribe();
+      clearInterval(interval);
+      if (pendingRefresh) clearTimeout(pendingRefresh);
+    };
   }, [role]);
 
   const applySampleUndo = async (sampleId: string, snapshot?: Partial<KanbanCard>) => {
@@ -3356,7 +3411,7 @@ export function KanbanBoard({
     try {
       await updateSampleFields(sampleId, targetStatus ? { ...nextUpdates, status: targetStatus } : nextUpdates);
       if (targetStatus === 'review' || nextUpdates.status === 'review') {
-        ensureAnalyses(sampleId, plannedAnalyses, setPlannedAnalyses, analysisTypes);
+        ensureAnalyses([sampleId], plannedAnalyses, setPlannedAnalyses, analysisTypes, reportEnsureFailure);
       }
     } catch (err) {
       toast({
@@ -4328,20 +4383,31 @@ function toAnalysisStatus(status: KanbanCard['status']): PlannedAnalysisCard['st
 }
 
 async function ensureAnalyses(
-  sampleId: string,
+  sampleIds: string[],
   existing: PlannedAnalysisCard[],
   setPlannedAnalyses: React.Dispatch<React.SetStateAction<PlannedAnalysisCard[]>>,
   analysisTypes: string[],
+  onError: (err: unknown) => void,
 ) {
-  const existingTypes = new Set(existing.filter((pa) => pa.sampleId === sampleId).map((pa) => pa.analysisType));
-  const missing = analysisTypes.filter((t) => !existingTypes.has(t));
-  if (missing.length === 0) return;
-  for (const type of missing) {
+  const typesBySample = new Map<string, Set<string>>();
+  existing.forEach((pa) => {
+    if (!typesBySample.has(pa.sampleId)) typesBySample.set(pa.sampleId, new Set());
+    typesBySample.get(pa.sampleId)?.add(pa.analysisType);
+  });
+  const incomplete = sampleIds.filter((sampleId) => {
+    const existingTypes = typesBySample.get(sampleId) ?? new Set<string>();
+    return analysisTypes.some((t) => !existingTypes.has(t));
+  });
+  if (incomplete.length === 0) return;
+  for (let start = 0; start < incomplete.length; start += ENSURE_DEFAULTS_CHUNK_SIZE) {
     try {
-      const created = await createPlannedAnalysis({ sampleId, analysisType: type });
-      setPlannedAnalyses((prev) => [...prev, mapApiAnalysis(created)]);
-    } catch {
-      // ignore failures silently for now
+      const created = await ensureDefaultAnalyses(incomplete.slice(start, start + ENSURE_DEFAULTS_CHUNK_SIZE), analysisTypes);
+      if (created.length > 0) {
+        setPlannedAnalyses((prev) => [...prev, ...created.map(mapApiAnalysis)]);
+      }
+    } catch (err) {
+      onError(err);
+      return;
     }
   }
 }
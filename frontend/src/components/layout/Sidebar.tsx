@@ -2,7 +2,7 @@ import { useEffect, useState } from 'react';
 import { LayoutGrid, FlaskConical, BarChart3, Settings, ClipboardList } from 'lucide-react';
 import { cn } from '@/lib/utils';
 import { NavLink } from '@/components/NavLink';
-import { fetchPlannedAnalyses, fetchSamples } from '@/lib/api';
+import { fetchBoard } from '@/lib/api';
 import { mockActions } from '@/data/actions';
 import { useAuth } from '@/hooks/use-auth';
 import { useI18n } from '@/i18n';
@@ -45,14 +45,14 @@ export function Sidebar() {
     let active = true;
     const load = async () => {
       try {
-        const [samples, analyses] = await Promise.all([fetchSamples(), fetchPlannedAnalyses()]);
+        const { samples, plannedAnalyses: analyses } = await fetchBoard();
         const ids = new Set<string>();
         samples.forEach((sample) => {
           const id = sample.sampleId?.trim();
           if (id) ids.add(id);
         });
         analyses.forEach((analysis) => {
-          const id = analysis.sampleId?.trim();
+          const id = analysis.sample_id?.trim();
           if (id) ids.add(id);
         });
         if (active) setSampleCount(ids.size);
@@ -4,6 +4,7 @@ function authHeaders() {
   let userName: string | undefined;
   let roles: string[] | undefined;
   let role: string | undefined;
+  let token: string | undefined;
   if (typeof window !== "undefined") {
     try {
       const stored = localStorage.getItem("labsync-auth");
@@ -12,6 +13,7 @@ function authHeaders() {
         userName = parsed?.fullName || parsed?.username;
         roles = parsed?.roles;
         role = parsed?.role;
+        token = parsed?.token;
       }
     } catch {
       // ignore
@@ -19,6 +21,7 @@ function authHeaders() {
   }
   return {
     "Content-Type": "application/json",
+    ...(token ? { Authorization: `Bearer ${token}` } : {}),
     ...(userName ? { "X-User": userName } : {}),
     ...(role ? { "X-Role": role } : {}),
     ...(roles ? { "X-Roles": Array.isArray(roles) ? roles.join(",") : roles } : {}),
@@ -112,6 +115,61 @@ export async function fetchPlannedAnalyses(): Promise<PlannedAnalysisCard[]> {
   return (await res.json()) as PlannedAnalysisCard[];
 }
 
+export type ApiPlannedAnalysis = { id: number; sample_id: string; analysis_type: string; status: string; assigned_to?: string[] | string };
+
+export async function fetchBoard(): Promise<{ samples: KanbanCard[]; plannedAnalyses: ApiPlannedAnalysis[] }> {
+  const res = await fetch("/api/board");
+  if (!res.ok) throw new Error(`Failed to load board (${res.status})`);
+  const data = (await res.json()) as (Record<string, any> & { planned_analyses: ApiPlannedAnalysis[] })[];
+  return {
+    samples: data.map(mapSampleToCard),
+    plannedAnalyses: data.flatMap((sample) => sample.planned_analyses),
+  };
+}
+
+export type BoardChanges = {
+  revision: number;
+  full: boolean;
+  samples: KanbanCard[];
+  plannedAnalyses: PlannedAnalysisCard[];
+  deletedSamples: string[];
+  deletedPlannedAnalyses: number[];
+};
+
+export async function fetchBoardChanges(since: number): Promise<BoardChanges> {
+  const res = await fetch(`/api/sync?since=${since}`);
+  if (!res.ok) throw new Error(`Failed to sync board (${res.status})`);
+  const data = await res.json();
+  return {
+    revision: data.revision,
+    full: data.full,
+    samples: (data.samples as any[]).map(mapSampleToCard),
+    plannedAnalyses: (data.planned_analyses as any[]).map(mapApiAnalysis),
+    deletedSamples: data.deleted_samples as string[],
+    deletedPlannedAnalyses: (data.deleted_planned_analyses as string[]).map(Number),
+  };
+}
+
+export type BoardChange = { entity_type: string; action: string; entity_id: string };
+
+export function subscribeToBoardChanges(
+  onChange: (change: BoardChange) => void,
+  onStatus?: (live: boolean) => void,
+): () => void {
+  if (typeof EventSource === "undefined") return () => {};
+  const source = new EventSource("/api/changes/stream");
+  source.onopen = () => onStatus?.(true);
+  source.onerror = () => onStatus?.(false);
+  source.addEventListener("change", (event) => {
+    try {
+      onChange(JSON.parse((event as MessageEvent).data) as BoardChange);
+    } catch {
+      // ignore malformed events
+    }
+  });
+  return () => source.close();
+}
+
 export async function createPlannedAnalysis(payload: { sampleId: string; analysisType: string; assignedTo?: string }) {
   const res = await fetch("/api/planned-analyses", {
     method: "POST",
@@ -126,6 +184,16 @@ export async function createPlannedAnalysis(payload: { sampleId: string; analysi
   return (await res.json()) as { id: number; sample_id: string; analysis_type: string; status: string; assigned_to?: string[] | string };
 }
 
+export async function ensureDefaultAnalyses(sampleIds: string[], methods?: string[]) {
+  const res = await fetch("/api/planned-analyses/ensure-defaults", {
+    method: "POST",
+    headers: authHeaders(),
+    body: JSON.stringify({ sample_ids: sampleIds, methods }),
+  });
+  if (!res.ok) throw new Error(`Failed to create default analyses (${res.status})`);
+  return (await res.json()) as ApiPlannedAnalysis[];
+}
+
 export async function updatePlannedAnalysis(id: number, status: string | undefined, assignedTo?: string[] | string) {
   const res = await fetch(`/api/planned-analyses/${id}`, {
     method: "PATCH",